@@ -10,118 +10,325 @@
 
 #include <iostream>
 #include <string>
+#include <thread>
+#include <algorithm>
 
 using namespace DLX_M;
 
+int DLX_M::int_size() {
+    return sizeof(INT);
+}
+
 DLX::DLX(vector<tuple<AbstrItem*, INT, INT>> primary,
          vector<AbstrItem*> secondary, 
          vector<tuple<vector<AbstrItem*>, vector<tuple<AbstrItem*, COLOR>>>> rows) :
-    DLX(primary, secondary, rows, [](DLX* dlx) -> INT {
-        INT i = dlx->items[0].rlink;
-        INT p;
-
-        for (p = i; p != 0; p = dlx->items[p].rlink)
-            if (dlx->options[p].tl < dlx->options[i].tl)
-                i = p;
-
-        return i;
-    }) {}
+    DLX(primary, secondary, rows, nullptr) {}
 
 DLX::DLX(vector<tuple<AbstrItem*, INT, INT>> primary,
          vector<AbstrItem*> secondary, 
          vector<tuple<vector<AbstrItem*>, vector<tuple<AbstrItem*, COLOR>>>> rows,
          function<INT(DLX*)> choose) {
+    vector<AbstrItem*> names(primary.size());
+    vector<INT> low(primary.size()), high(primary.size());
+    for (size_t k = 0; k < primary.size(); k++)
+        tie(names[k], low[k], high[k]) = primary[k];
+
+    this->init_items(primary.size(), names.data(), low.data(), high.data(),
+                     secondary.size(), secondary.data());
+
+    for (auto row : rows) {
+        vector<AbstrItem*> row_primary;
+        vector<tuple<AbstrItem*, COLOR>> row_secondary;
+        tie(row_primary, row_secondary) = row;
+        this->add_row(row_primary, row_secondary);
+    }
+
+    this->choose = choose;
+}
+
+DLX::DLX(INT nb_primary, const INT* low, const INT* high, INT nb_secondary) :
+    DLX(nb_primary, low, high, nb_secondary, nullptr) {}
+
+DLX::DLX(INT nb_primary, const INT* low, const INT* high, INT nb_secondary,
+         function<INT(DLX*)> choose) {
+    this->init_items(nb_primary, nullptr, low, high, nb_secondary, nullptr);
+    this->choose = choose;
+}
+
+void DLX::init_items(INT nb_primary, AbstrItem* const* primary_names,
+                     const INT* low, const INT* high,
+                     INT nb_secondary, AbstrItem* const* secondary_names) {
     INT i = 0;
-    AbstrItem* name;
-    INT u, v;
+    AbstrItem* name = nullptr;
 
-    this->items.push_back(Item(nullptr, primary.size(), 1, -1, -1));
+    this->items.push_back(Item(nullptr, nb_primary, 1, -1, -1));
     this->options.push_back(SepNode(0, 0));
 
-    for (auto item : primary) {
+    for (INT k = 0; k < nb_primary; k++) {
         // le numéro de la colonne actuelle est i + 1
         // les numéros de colonnes commencent à 1
-        tie(name, u, v) = item;
-        this->items.push_back(Primary(name, i, i + 2, v - u, v));
-        this->corresp.emplace(name, i + 1);
-        // cout << "Set dlx_id for item " << i + 1 << endl;
-        name->set_id(i + 1);
+        if (primary_names != nullptr) {
+            name = primary_names[k];
+            this->corresp.emplace(name, i + 1);
+            // cout << "Set dlx_id for item " << i + 1 << endl;
+            name->set_id(i + 1);
+        }
+        this->items.push_back(Primary(name, i, i + 2, high[k] - low[k], high[k]));
         this->options.push_back(HNode(0, i + 1, i + 1, -1));
         this->nb_option_nodes++;
         i++;
     }
-    this->items.back().rlink = 0;
+    this->items.rlink.back() = 0;
 
     this->nb_primary = this->nb_option_nodes - 1;
     
     INT j = i + 1;
-    for (auto item : secondary) {
-        this->items.push_back(Secondary(item, i, i + 2));
-        this->corresp.emplace(item, i + 1);
+    name = nullptr;
+    for (INT k = 0; k < nb_secondary; k++) {
+        if (secondary_names != nullptr) {
+            name = secondary_names[k];
+            this->corresp.emplace(name, i + 1);
+        }
+        this->items.push_back(Secondary(name, i, i + 2));
         this->options.push_back(HNode(0, i + 1, i + 1, -1));
         this->nb_option_nodes++;
         i++;
     }
     this->items.push_back(Secondary(nullptr, i, j));
-    this->items[j].llink = i + 1;
+    this->items.llink[j] = i + 1;
 
     this->nb_items = this->nb_option_nodes - 1;
     
     this->options.push_back(SepNode(0, 0));
     this->nb_option_nodes++;
 
-    for (auto row : rows) {
-        vector<AbstrItem*> row_primary;
-        vector<tuple<AbstrItem*, COLOR>> row_secondary;
-        tie(row_primary, row_secondary) = row;
-        this->add_row(row_primary, row_secondary);
-    }
-
-    this->choose = choose;
-    this->covered = (bool *) malloc(sizeof(bool) * (this->nb_primary + 1));
+    this->covered.assign(this->nb_items + 1, false);
     this->covered[0] = true;
-    for (int k = 1; k <= this->nb_primary; k++)
-        this->covered[k] = false;
+    this->item_active.assign(this->nb_primary + 1, true);
+    this->interval_ptr.assign(1, 0);
 }
 
 void DLX::add_row(vector<AbstrItem*> row_primary, 
                   vector<tuple<AbstrItem*, COLOR>> row_secondary) {
+    this->reset();
+    this->has_pristine = false;
     INT first_node = this->nb_option_nodes;
-    INT item_id, last_item_node;
-
-    this->rows.push_back(make_tuple(row_primary, row_secondary));
-
-    for (auto option : row_primary) {
-        item_id = this->corresp[option];
-        last_item_node = this->options[item_id].ulink;
-        this->options.push_back(ONode(item_id, last_item_node, item_id, 
-                                      EMPTY_COLOR, this->nb_rows));
-        this->options[last_item_node].dlink = this->nb_option_nodes;
-        this->options[item_id].ulink = this->nb_option_nodes;
-        this->options[item_id].tl++;
-        this->nb_option_nodes++;
-    }
+
+    for (auto option : row_primary)
+        this->append_node(this->corresp[option], EMPTY_COLOR);
     
     AbstrItem* element;    
     COLOR color;
     for (auto option : row_secondary) {
         tie(element, color) = option;
-        item_id = this->corresp[element];
-        last_item_node = this->options[item_id].ulink;
-        this->options.push_back(ONode(item_id, last_item_node, item_id, 
-                                      color, this->nb_rows));
-        this->options[last_item_node].dlink = this->nb_option_nodes;
-        this->options[item_id].ulink = this->nb_option_nodes;
-        this->options[item_id].tl++;
-        this->nb_option_nodes++;
+        this->append_node(this->corresp[element], color);
+    }
+
+    this->end_row(first_node);
+}
+
+void DLX::add_rows(INT nb_rows, const INT* indptr, const INT* indices,
+                   const INT* sec_indptr, const INT* sec_indices,
+                   const COLOR* sec_colors) {
+    this->add_rows(nb_rows, indptr, indices, sec_indptr, sec_indices,
+                   sec_colors, nullptr, nullptr, nullptr, nullptr);
+}
+
+void DLX::add_rows(INT nb_rows, const INT* indptr, const INT* indices,
+                   const INT* sec_indptr, const INT* sec_indices,
+                   const COLOR* sec_colors, const INT* iv_indptr,
+                   const INT* iv_timelines, const INT* iv_first,
+                   const INT* iv_last) {
+    this->reset();
+    this->has_pristine = false;
+    INT nb_secondary = this->nb_items - this->nb_primary;
+    this->options.reserve(this->options.size() + nb_rows
+                          + indptr[nb_rows] - indptr[0]
+                          + sec_indptr[nb_rows] - sec_indptr[0]);
+    this->row_start.reserve(this->row_start.size() + nb_rows);
+
+    for (INT r = 0; r < nb_rows; r++) {
+        INT first_node = this->nb_option_nodes;
+        for (INT k = indptr[r]; k < indptr[r + 1]; k++) {
+            if (indices[k] < 0 || indices[k] >= this->nb_primary)
+                throw out_of_range("add_rows : élément primaire inexistant");
+            this->append_node(indices[k] + 1, EMPTY_COLOR);
+        }
+        for (INT k = sec_indptr[r]; k < sec_indptr[r + 1]; k++) {
+            if (sec_indices[k] < 0 || sec_indices[k] >= nb_secondary)
+                throw out_of_range("add_rows : élément secondaire inexistant");
+            this->append_node(this->nb_primary + 1 + sec_indices[k],
+                              sec_colors[k]);
+        }
+        for (INT k = iv_indptr ? iv_indptr[r] : 0;
+             iv_indptr && k < iv_indptr[r + 1]; k++) {
+            INT t = iv_timelines[k];
+            if (t < 0 || t >= (INT) this->timeline_capacity.size())
+                throw out_of_range("add_rows : ressource inexistante");
+            INT length = (t + 1 < (INT) this->timeline_start.size()
+                          ? this->timeline_start[t + 1]
+                          : (INT) this->usage.size()) - this->timeline_start[t];
+            if (iv_first[k] < 0 || iv_first[k] > iv_last[k] || iv_last[k] >= length)
+                throw out_of_range("add_rows : intervalle invalide");
+            this->interval_timeline.push_back(t);
+            this->interval_first.push_back(this->timeline_start[t] + iv_first[k]);
+            this->interval_last.push_back(this->timeline_start[t] + iv_last[k]);
+        }
+        this->end_row(first_node);
     }
+}
 
-    this->options[first_node - 1].dlink = this->nb_option_nodes - 1;
+void DLX::append_node(INT item_id, COLOR color) {
+    INT last_item_node = ULINK(item_id);
+    this->options.push_back(ONode(item_id, last_item_node, item_id, 
+                                  color, this->nb_rows));
+    DLINK(last_item_node) = this->nb_option_nodes;
+    ULINK(item_id) = this->nb_option_nodes;
+    LEN(item_id)++;
+    this->nb_option_nodes++;
+}
+
+void DLX::end_row(INT first_node) {
+    this->row_start.push_back(first_node);
+    this->interval_ptr.push_back(this->interval_timeline.size());
+    this->row_active.push_back(true);
+    DLINK(first_node - 1) = this->nb_option_nodes - 1;
     this->options.push_back(SepNode(first_node, 0));
     this->nb_option_nodes++;
     this->nb_rows++;
 }
 
+void DLX::reset() {
+    if (this->dirty) {
+        this->items = this->pristine_items;
+        this->options = this->pristine_options;
+        this->covered.assign(this->nb_items + 1, false);
+        this->covered[0] = true;
+        fill(this->usage.begin(), this->usage.end(), 0);
+        this->dirty = false;
+    }
+    this->l = 0;
+    this->interrupted = false;
+}
+
+INT DLX::add_timeline(INT capacity, INT length) {
+    if (capacity < 0 || length < 0)
+        throw invalid_argument("add_timeline : capacité ou longueur négative");
+    this->reset();
+    this->timeline_capacity.push_back(capacity);
+    this->timeline_start.push_back(this->usage.size());
+    this->usage.resize(this->usage.size() + length, 0);
+    return this->timeline_capacity.size() - 1;
+}
+
+/* Occupe les intervalles de la ligne r, s'il reste de la place à chacun de
+ * leurs instants. Sinon, rien n'est modifié et la fonction renvoie false.
+ * `holds` reçoit le nombre d'instants des ressources de `hold_timeline`
+ * occupés deux fois à cause de la ligne (cf. set_hold_costs). */
+bool DLX::take_intervals(INT r, INT& holds) {
+    INT a = this->interval_ptr[r], b = this->interval_ptr[r + 1];
+    holds = 0;
+    for (INT k = a; k < b; k++) {
+        INT tl = this->interval_timeline[k];
+        INT capacity = this->timeline_capacity[tl];
+        bool hold = tl < (INT) this->hold_timeline.size() && this->hold_timeline[tl];
+        for (INT t = this->interval_first[k]; t <= this->interval_last[k]; t++) {
+            if (this->usage[t] >= capacity) {
+                // les intervalles d'une même ligne peuvent se chevaucher
+                for (INT u = t - 1; u >= this->interval_first[k]; u--)
+                    this->usage[u]--;
+                for (INT q = a; q < k; q++)
+                    for (INT u = this->interval_first[q]; u <= this->interval_last[q]; u++)
+                        this->usage[u]--;
+                return false;
+            }
+            if (++this->usage[t] == 2 && hold) holds++;
+        }
+    }
+    return true;
+}
+
+void DLX::release_intervals(INT r) {
+    for (INT k = this->interval_ptr[r]; k < this->interval_ptr[r + 1]; k++)
+        for (INT t = this->interval_first[k]; t <= this->interval_last[k]; t++)
+            this->usage[t]--;
+}
+
+// Compte les éléments de `hold_item` que la ligne r couvre pour la deuxième fois
+INT DLX::take_holds(INT r) {
+    INT holds = 0;
+    for (INT q = this->row_start[r]; TOP(q) > 0; q++) {
+        INT j = TOP(q);
+        if (j < (INT) this->hold_item.size() && this->hold_item[j]
+                && ++this->hold_count[j] == 2)
+            holds++;
+    }
+    return holds;
+}
+
+void DLX::release_holds(INT r) {
+    for (INT q = this->row_start[r]; TOP(q) > 0; q++) {
+        INT j = TOP(q);
+        if (j < (INT) this->hold_item.size() && this->hold_item[j])
+            this->hold_count[j]--;
+    }
+}
+
+void DLX::set_row_active(INT r, bool active) {
+    if (r < 0 || r >= this->nb_rows)
+        throw out_of_range("set_row_active : ligne inexistante");
+    if (this->row_active[r] == active) return;
+    this->reset();
+    for (INT q = this->row_start[r]; TOP(q) > 0; q++) {
+        INT x = TOP(q);
+        if (active) {
+            // q est remis avant le premier noeud de x créé après lui
+            INT d = DLINK(x);
+            while (d != x && d < q) d = DLINK(d);
+            INT u = ULINK(d);
+            ULINK(q) = u;
+            DLINK(q) = d;
+            DLINK(u) = q;
+            ULINK(d) = q;
+            LEN(x)++;
+        } else {
+            DLINK(ULINK(q)) = DLINK(q);
+            ULINK(DLINK(q)) = ULINK(q);
+            LEN(x)--;
+        }
+    }
+    this->row_active[r] = active;
+    this->has_pristine = false;
+}
+
+void DLX::set_item(INT k, INT low, INT high, bool active) {
+    if (k < 0 || k >= this->nb_primary)
+        throw out_of_range("set_item : élément primaire inexistant");
+    if (low < 0 || high < low)
+        throw invalid_argument("set_item : bornes invalides");
+    this->reset();
+    INT i = k + 1;
+    BOUND(i) = high;
+    SLACK(i) = high - low;
+    if (this->item_active[i] != active) {
+        if (active) {
+            // i est remis avant le premier élément actif créé après lui
+            INT r = LLINK(0);
+            while (r != 0 && r < i) r = LLINK(r);
+            INT l = RLINK(r);
+            LLINK(i) = r;
+            RLINK(i) = l;
+            LLINK(l) = i;
+            RLINK(r) = i;
+        } else {
+            RLINK(LLINK(i)) = RLINK(i);
+            LLINK(RLINK(i)) = LLINK(i);
+        }
+        this->item_active[i] = active;
+    }
+    this->has_pristine = false;
+}
+
 void DLX::cover(INT i) {
     INT p = DLINK(i);
     while (p != i) {
@@ -132,6 +339,7 @@ void DLX::cover(INT i) {
     INT r = RLINK(i);
     RLINK(l) = r;
     LLINK(r) = l;
+    STAT(this->counters.mems += 2);
     this->covered[i] = true;
 }
 
@@ -147,6 +355,7 @@ void DLX::hide(INT p) {
         else {
             DLINK(u) = d;
             ULINK(d) = u;
+            STAT(this->counters.mems += 2);
             LEN(x)--;
             q++;
         }
@@ -158,6 +367,7 @@ void DLX::uncover(INT i) {
     INT r = RLINK(i);
     RLINK(l) = i;
     LLINK(r) = i;
+    STAT(this->counters.mems += 2);
     INT p = ULINK(i);
     while (p != i) {
         this->unhide(p);
@@ -178,6 +388,7 @@ void DLX::unhide(INT p) {
         else {
             DLINK(u) = q;
             ULINK(d) = q;
+            STAT(this->counters.mems += 2);
             LEN(x)++;
             q--;
         }
@@ -225,6 +436,7 @@ void DLX::tweak(INT x, INT p) {
     INT d = DLINK(x);
     DLINK(p) = d;
     ULINK(d) = p;
+    STAT(this->counters.mems += 2);
     LEN(p)--;
 }
 
@@ -233,6 +445,7 @@ void DLX::tweak_special(INT x, INT p) {
     INT d = DLINK(x);
     DLINK(p) = d;
     ULINK(d) = p;
+    STAT(this->counters.mems += 2);
     LEN(p)--;
 }
 
@@ -246,12 +459,14 @@ void DLX::untweak(vector<INT> &ft, INT l) {
     while (x != z) {
         // cout << "untweak " << x << endl;
         ULINK(x) = y;
+        STAT(this->counters.mems++);
         k++;
         this->unhide(x);
         y = x;
         x = DLINK(x);
     }
     ULINK(z) = y;
+    STAT(this->counters.mems += 2);
     LEN(p) += k;
 }
 
@@ -265,30 +480,164 @@ void DLX::untweak_special(vector<INT> &ft, INT l) {
     while (x != z) {
         // cout << "untweak " << x << endl;
         ULINK(x) = y;
+        STAT(this->counters.mems++);
         k++;
         y = x;
         x = DLINK(x);
     }
     ULINK(z) = y;
+    STAT(this->counters.mems += 2);
     LEN(p) += k;
     this->uncover(p);
 }
 
-// INT DLX::choose() {
-//     INT i = this->items[0].rlink;
-//     INT p;
+void DLX::set_costs(INT nb_costs, const double* costs,
+                    vector<INT> bound_items) {
+    if (nb_costs != 0 && nb_costs != this->nb_rows)
+        throw invalid_argument("set_costs : il faut un coût par ligne");
+    for (INT r = 0; r < nb_costs; r++)
+        if (costs[r] < 0)
+            throw invalid_argument("set_costs : coût négatif");
+    this->costs.assign(costs, costs + nb_costs);
+    this->bound_items = bound_items;
+}
+
+void DLX::set_hold_costs(double cost, vector<INT> items,
+                         vector<INT> timelines) {
+    if (cost < 0)
+        throw invalid_argument("set_hold_costs : coût négatif");
+    this->reset();
+    this->hold_cost = cost;
+    this->hold_item.assign(this->nb_items + 1, false);
+    this->hold_timeline.assign(this->timeline_capacity.size(), false);
+    if (cost == 0) return;
+    for (INT k : items) {
+        if (k <= 0 || k > this->nb_primary)
+            throw out_of_range("set_hold_costs : élément primaire inexistant");
+        this->hold_item[k] = true;
+    }
+    for (INT t : timelines) {
+        if (t < 0 || t >= (INT) this->timeline_capacity.size())
+            throw out_of_range("set_hold_costs : ressource inexistante");
+        this->hold_timeline[t] = true;
+    }
+}
+
+double DLX::lower_bound() {
+    double lb = this->path_cost[this->l];
+    for (INT k : this->bound_items) {
+        INT need = BOUND(k) - SLACK(k);
+        if (this->covered[k] || need <= 0) continue;
+        double m = INFINITY;  // aucune option : la branche est sans issue
+        for (INT p = DLINK(k); p != k; p = DLINK(p))
+            m = min(m, this->costs[this->options.row_number[p]]);
+        lb += need * m;
+    }
+    return lb;
+}
+
+void DLX::set_priority(vector<INT> items) {
+    this->priority.assign(this->nb_items + 1, items.size());
+    for (size_t k = 0; k < items.size(); k++)
+        this->priority[items[k]] = k;
+}
 
-//     for (p = i; p != 0; p = this->items[p].rlink)
-//         if (this->options[p].tl < this->options[i].tl)
-//             i = p;
+void DLX::set_keys(vector<INT> keys) {
+    this->keys = keys;
+}
 
-//     return i;
-// }
+void DLX::set_seed(unsigned long long seed) {
+    this->seed = seed;
+    this->rng.seed(seed);
+    this->randomized = true;
+}
+
+void DLX::shuffle_options() {
+    this->reset();
+    vector<INT> nodes;
+    for (INT i = 1; i <= this->nb_items; i++) {
+        nodes.clear();
+        for (INT p = DLINK(i); p != i; p = DLINK(p))
+            nodes.push_back(p);
+        // on part de l'ordre de création pour que le résultat ne dépende
+        // que de la graine
+        sort(nodes.begin(), nodes.end());
+        shuffle(nodes.begin(), nodes.end(), this->rng);
+        INT q = i;
+        for (INT p : nodes) {
+            DLINK(q) = p;
+            ULINK(p) = q;
+            q = p;
+        }
+        DLINK(q) = i;
+        ULINK(i) = q;
+    }
+    this->has_pristine = false;
+}
+
+INT DLX::choose_builtin() {
+    INT i = 0;
+    INT best_rank = 0, best_key = 0, best_measure = 0;
+    bool has_priority = !this->priority.empty();
+    bool has_keys = !this->keys.empty();
+    unsigned long long ties = 0;
+
+    // Parcours dans l'ordre de création des éléments
+    for (INT p = LLINK(0); p != 0; p = LLINK(p)) {
+        INT measure = (this->strategy == MRV) ? branch_degree(p) : LEN(p);
+        if (measure == 0) return p;
+
+        INT rank = has_priority ? this->priority[p] : 0;
+        INT key = has_keys ? this->keys[p] : 0;
+        if (i == 0 || rank < best_rank
+                || (rank == best_rank && (key < best_key
+                    || (key == best_key && measure < best_measure)))) {
+            i = p;
+            best_rank = rank;
+            best_key = key;
+            best_measure = measure;
+            ties = 1;
+        } else if (this->randomized && rank == best_rank && key == best_key
+                   && measure == best_measure) {
+            // tirage uniforme parmi les ex aequo
+            if (this->rng() % ++ties == 0) i = p;
+        }
+    }
+
+    return i;
+}
+
+void DLX::count_degree(INT l, INT d) {
+    auto& degrees = this->counters.degrees;
+    if ((INT) degrees.size() <= l) degrees.resize(l + 1);
+    if ((INT) degrees[l].size() <= d) degrees[l].resize(d + 1, 0);
+    degrees[l][d]++;
+}
+
+void DLX::merge_stats(const Stats& s) {
+    Stats& c = this->counters;
+    c.nodes += s.nodes;
+    c.solutions += s.solutions;
+    c.mems += s.mems;
+    c.pruned += s.pruned;
+    c.max_depth = max(c.max_depth, s.max_depth);
+    if (s.first_solution_time >= 0 && (c.first_solution_time < 0 
+            || s.first_solution_time < c.first_solution_time))
+        c.first_solution_time = s.first_solution_time;
+    if (c.degrees.size() < s.degrees.size()) c.degrees.resize(s.degrees.size());
+    for (size_t l = 0; l < s.degrees.size(); l++) {
+        if (c.degrees[l].size() < s.degrees[l].size())
+            c.degrees[l].resize(s.degrees[l].size(), 0);
+        for (size_t d = 0; d < s.degrees[l].size(); d++)
+            c.degrees[l][d] += s.degrees[l][d];
+    }
+}
 
 void DLX::print_table() {
     cout << this->nb_items << " items (" << this->nb_primary << " primary)" << endl;
 
-    for (auto& item : this->items) {
+    for (size_t j = 0; j < this->items.size(); j++) {
+        Item item = this->items[j];
         cout << "Item(";
         if (item.name == nullptr) cout << "Null, ";
         else { item.name->print(); cout << ", "; }
@@ -301,8 +650,8 @@ void DLX::print_table() {
         cout << ")" << endl;
     }
 
-    INT i = 0;
-    for (auto& option : this->options) {
+    for (INT i = 0; i < (INT) this->options.size(); i++) {
+        Node option = this->option(i);
         cout << i << " : " 
              << ((option.type == Header)?"Header":"Option") << "("
              << option.tl << ", "
@@ -312,7 +661,6 @@ void DLX::print_table() {
             cout << ", " << option.color << ")" << endl;
         else
             cout << ")" << endl;
-        i++;
     }
 }
 
@@ -321,34 +669,30 @@ vector<INT> DLX::solution_rows(vector<INT> x, INT l) {
     INT i = 0;
 
     for (auto& opt_id : x) {
-        if (i >= l) break;
+        if (i++ >= l) break;
         if (opt_id <= this->nb_items) continue;
 
-        sol.push_back(this->options[opt_id].row_number);
+        sol.push_back(this->options.row_number[opt_id]);
     }
 
     return sol;
 }
 
 void DLX::print_rows(vector<INT> rows) {
-    vector<AbstrItem*> row_primary;
-    vector<tuple<AbstrItem*, COLOR>> row_secondary;
-
     for (auto& row_id : rows) {
-        tie(row_primary, row_secondary) = this->rows[row_id];
-        for (auto& elem : row_primary) {
-            elem->print();
+        for (INT p = this->row_start[row_id]; TOP(p) > 0; p++) {
+            // les éléments sans nom sont affichés par leur numéro
+            if (NAME(TOP(p)) != nullptr)
+                NAME(TOP(p))->print();
+            else if (TOP(p) <= this->nb_primary)
+                cout << TOP(p) - 1;
+            else
+                cout << TOP(p) - this->nb_primary - 1;
+            if (TOP(p) > this->nb_primary)
+                cout << ":" << CLR(p);
             cout << " ";
         }
 
-        AbstrItem* elem;
-        COLOR clr;
-        for (auto& elem_color : row_secondary) {
-            tie(elem, clr) = elem_color;
-            elem->print();
-            cout << ":" << clr << " ";
-        }
-
         cout << endl;
     }
 }
@@ -362,202 +706,229 @@ void DLX::print_solution(vector<INT> sol) {
 }
 
 vector<vector<INT>> DLX::all_solutions(bool verbose) {
-    vector<INT> x(this->options.size());
-    vector<INT> ft(this->options.size());
-    INT l = 0;
-    INT i, p, j, q;
-    unsigned int nb_solutions = 0;
-
     vector<vector<INT>> solutions;
 
-    auto ppx = [](vector<INT> x, INT l) {
-        INT i = 0;
-        for (auto& e : x) {
-            if (i++ >= l) break;
-            cout << e << " ";
-        }
-        cout << endl;
-    };
+    this->set_limits(0, 0);
+    bool found = this->next(false);
+    while (found) {
+        vector<INT> sol = this->solution_rows(this->x, this->l);
+        if (verbose) this->print_solution(sol);
+        solutions.push_back(sol);
+        found = this->next(true);
+    }
+    this->end_call();
 
-    M2: // cout << "M2" << endl;
-        ppx(x, l);
-        if (RLINK(0) == 0) {
-            // cout << "====================================================" << endl;
-            // cout << "Found solution :" << endl;
-            // this->print_solution(x, l, pp);
-            vector<INT> sol = this->solution_rows(x, l);
-            solutions.push_back(sol);
-            if (verbose) this->print_solution(sol);
-            nb_solutions++;
-            // cout << "====================================================" << endl;
-            goto M9;
-        }
-    M3: // cout << "M3" << endl;
-        ppx(x, l);
-        i = this->choose(this);
-        // cout << "Choose " << i << endl;
-        // cout << "Branch degree " << branch_degree(i) << endl;
-        // cout << "BOUND(i) " << BOUND(i) << endl;
-        if (branch_degree(i) == 0) goto M9;
-    M4: // cout << "M4" << endl;
-        ppx(x, l);
-        x[l] = DLINK(i);
-        BOUND(i)--;
-        if (BOUND(i) == 0) this->cover(i);
-        if (BOUND(i) != 0 || SLACK(i) != 0)
-            ft[l] = x[l];
-    M5: // cout << "M5" << endl;
-        ppx(x, l);
-        if (BOUND(i) == 0 && SLACK(i) == 0) {
-            if (x[l] != i) goto M6;
-            else goto M8;
-        } else if (LEN(i) <= BOUND(i) - SLACK(i)) {
-            goto M8;
-        } else if (x[l] != i) {
-            if (BOUND(i) == 0) this->tweak_special(x[l], i);
-            else this->tweak(x[l], i);
-        } else if (BOUND(i) != 0) {
-            p = LLINK(i);
-            q = RLINK(i);
-            RLINK(p) = q;
-            LLINK(q) = p;
-        }
-    M6: // cout << "M6" << endl;
-        ppx(x, l);
-        if (x[l] != i) {
-            p = x[l] + 1;
-            while (p != x[l]) {
-                j = TOP(p);
-                if (j <= 0) p = ULINK(p);
-                else if (j <= this->nb_primary) {
-                    BOUND(j)--;
-                    p++;
-                    if (BOUND(j) == 0) this->cover(j);
-                } else {
-                    this->commit(p, j);
-                    p++;
-                }
-            }
-        }
-        // print_table();
-        l++;
-        goto M2;
-    M7: // cout << "M7" << endl;
-        ppx(x, l);
-        // if (x[l] != i) {
-        p = x[l] - 1;
-        while (p != x[l]) {
-            j = TOP(p);
-            if (j <= 0) p = DLINK(p);
-            else if (j <= this->nb_primary) {
-                BOUND(j)++;
-                p--;
-                if (BOUND(j) == 1) this->uncover(j);
-            } else {
-                this->uncommit(p, j);
-                p--;
-            }
-        }
-        // }
-        x[l] = DLINK(x[l]);
-        // cout << "x_l " << x[l] << endl;
-        goto M5;
-    M8: // cout << "M8" << endl;
-        ppx(x, l);
-        // cout << "BOUND(i) " << BOUND(i) << endl;
-        // cout << "SLACK(i) " << SLACK(i) << endl;
-        if (BOUND(i) == 0 && SLACK(i) == 0)
-            this->uncover(i);
-        else if (BOUND(i) == 0) this->untweak_special(ft, l);
-        else this->untweak(ft, l);
-        BOUND(i)++;
-        // cout << "BOUND(i) " << BOUND(i) << endl;
-    M9: // cout << "M9" << endl;
-        // cout << "M9 - l=" << l << endl;
-        ppx(x, l);
-        if (l == 0) {
-            if (verbose) {
-                cout << "---------------------------------" << endl;
-                cout << nb_solutions << " solutions found." << endl;
-                cout << "---------------------------------" << endl; 
+    if (verbose) {
+        cout << "---------------------------------" << endl;
+        cout << solutions.size() << " solutions found." << endl;
+        cout << "---------------------------------" << endl; 
+    }
+    return solutions;
+}
+
+vector<vector<INT>> DLX::all_solutions_parallel(INT nb_workers,
+                                                INT split_depth,
+                                                bool verbose) {
+    // Chaque thread explore une copie de la structure et ne garde que les
+    // sous-arbres du niveau `split_depth` qui lui sont attribués. Les
+    // niveaux supérieurs sont parcourus par tous les threads, ce qui ne
+    // coûte presque rien tant que `split_depth` reste petit.
+    vector<vector<pair<INT, vector<INT>>>> found(nb_workers);
+    vector<Stats> stats(nb_workers);
+    vector<thread> workers;
+
+    this->set_limits(0, 0);
+    for (INT w = 0; w < nb_workers; w++)
+        workers.push_back(thread([this, &found, &stats, w, nb_workers,
+                                  split_depth]() {
+            DLX dlx(*this);
+            dlx.set_split(w, nb_workers, split_depth);
+            bool ok = dlx.next(false);
+            while (ok) {
+                found[w].push_back(make_pair(dlx.solution_key,
+                                             dlx.solution_rows(dlx.x, dlx.l)));
+                ok = dlx.next(true);
             }
-            return solutions;
-        } else l--;
-        // cout << "M9 - l=" << l << endl;
-        // cout << "x_l " << x[l] << endl;
-        // cout << "N " << this->nb_items << endl;
-        if (x[l] <= this->nb_items) {
-            i = x[l];
-            p = LLINK(i);
-            q = RLINK(i);
-            RLINK(p) = i;
-            LLINK(q) = i;
-            goto M8;
-        } else {
-            i = TOP(x[l]);
-            goto M7;
-        }
+            stats[w] = dlx.counters;
+        }));
+    for (auto& worker : workers)
+        worker.join();
+    this->last_status = *this->cancelled ? Cancelled : NoMoreSolutions;
+    this->end_call();
+
+    // Les noeuds au-dessus du niveau de découpage sont comptés par chaque
+    // thread
+    this->counters = Stats();
+    for (auto& s : stats)
+        this->merge_stats(s);
+
+    // Fusion dans l'ordre du parcours séquentiel
+    vector<pair<INT, vector<INT>>> merged;
+    for (auto& sols : found)
+        merged.insert(merged.end(), sols.begin(), sols.end());
+    stable_sort(merged.begin(), merged.end(),
+                [](const pair<INT, vector<INT>>& a,
+                   const pair<INT, vector<INT>>& b) {
+                    return a.first < b.first;
+                });
+
+    vector<vector<INT>> solutions;
+    for (auto& sol : merged) {
+        if (verbose) this->print_solution(sol.second);
+        solutions.push_back(sol.second);
+    }
+
+    if (verbose) {
+        cout << "---------------------------------" << endl;
+        cout << solutions.size() << " solutions found." << endl;
+        cout << "---------------------------------" << endl; 
+    }
+    return solutions;
+}
+
+long long DLX::count_solutions() {
+    long long nb_solutions = 0;
+
+    this->set_limits(0, 0);
+    bool found = this->next(false);
+    while (found) {
+        nb_solutions++;
+        found = this->next(true);
+    }
+    this->end_call();
+    return nb_solutions;
 }
 
 vector<INT> DLX::search(bool resume) {
-    vector<INT> x(this->options.size());
-    vector<INT> ft(this->options.size());
-    INT l = 0;
-    INT i, p, j, q;
-
-    auto ppx = [](vector<INT> x, INT l) {
-        INT i = 0;
-        for (auto& e : x) {
-            if (i++ >= l) break;
-            cout << e << " ";
-        }
-        cout << endl;
-    };
+    this->set_limits(0, 0);
+    bool found = this->next(resume);
+    this->end_call();
+    if (!found)
+        throw NoSolution();
+    return this->solution_rows(this->x, this->l);
+}
+
+Status DLX::search_within(bool resume, unsigned long long max_nodes,
+                          double timeout) {
+    this->set_limits(max_nodes, timeout);
+    this->next(resume);
+    this->end_call();
+    return this->last_status;
+}
+
+void DLX::set_limits(unsigned long long max_nodes, double timeout) {
+    this->nodes_left = max_nodes > 0 ? max_nodes : -1;
+    if (timeout > 0)
+        this->deadline = chrono::steady_clock::now()
+            + chrono::duration_cast<chrono::steady_clock::duration>(
+                  chrono::duration<double>(timeout));
+    else
+        this->deadline = chrono::steady_clock::time_point::max();
+}
+
+void DLX::end_call() {
+    // une annulation ne vaut que pour la recherche qu'elle interrompt
+    if (this->last_status == Cancelled)
+        *this->cancelled = false;
+}
+
+/* Boucle principale de l'algorithme M. Elle s'arrête à chaque solution
+ * (renvoie true) en laissant l'état de la recherche dans x, ft, l et i, de
+ * sorte qu'un appel avec `resume` à true reprend là où elle s'était
+ * arrêtée. Renvoie false quand tout l'arbre a été parcouru. */
+bool DLX::next(bool resume) {
+    vector<INT> &x = this->x;
+    vector<INT> &ft = this->ft;
+    INT &l = this->l;
+    INT &i = this->i;
+    INT p, j, q;
 
     if (resume) {
-        x  = this->x;
-        ft = this->ft;
-        l  = this->l;
-        i  = this->i;
-        goto M9;
+        if (!this->interrupted) goto M9;
+        this->interrupted = false;
+        goto M2;
     }
 
+    this->reset();
+    if (!this->has_pristine) {
+        this->pristine_items = this->items;
+        this->pristine_options = this->options;
+        this->has_pristine = true;
+    }
+    this->dirty = true;
+    x.assign(this->options.size(), 0);
+    ft.assign(this->options.size(), 0);
+    this->depth.assign(this->options.size() + 1, 0);
+    this->path_cost.assign(this->options.size() + 1, 0);
+    this->hold_count.assign(this->nb_items + 1, 0);
+    l = 0;
+    this->split_count = 0;
+    this->split_nodes = 0;
+    this->counters = Stats();
+    this->start_time = chrono::steady_clock::now();
+
     M2: // cout << "M2" << endl;
-        // ppx(x, l);
-        if (RLINK(0) == 0) {
-            // cout << "====================================================" << endl;
-            // cout << "Found solution :" << endl;
-            // this->print_solution(x, l, pp);
-            vector<INT> sol = this->solution_rows(x, l);
-            // this->print_solution(sol);
-            
-            // Sauvegarde de l'état de la recherche
-            this->x  = x;
-            this->ft = ft;
-            this->l  = l;
-            this->i  = i;
-
-            return sol;
-
-            // cout << "====================================================" << endl;
+        // Budget et annulation (l'horloge n'est lue que tous les 1024 noeuds)
+        if (this->cancelled->load(memory_order_relaxed)) {
+            this->last_status = Cancelled;
+            this->interrupted = true;
+            return false;
+        }
+        if (this->nodes_left == 0 || ((++this->ticks & 1023) == 0 &&
+                chrono::steady_clock::now() > this->deadline)) {
+            this->last_status = BudgetExhausted;
+            this->interrupted = true;
+            return false;
+        }
+        this->nodes_left--;
+        if (this->split_workers > 1 && l <= this->split_depth) {
+            // Les noeuds jusqu'au niveau de découpage sont numérotés de la
+            // même façon par tous ; le choix fait en chacun d'eux et le
+            // sous-arbre qui le suit ne dépendent alors que de ce numéro
+            if (this->randomized)
+                this->rng.seed(this->seed + 0x9e3779b97f4a7c15ULL * ++this->split_nodes);
+            if (l == this->split_depth
+                    && this->split_count++ % this->split_workers != this->split_worker)
+                goto M9;
+        }
+        STAT(this->counters.nodes++);
+        STAT(if (l > this->counters.max_depth) this->counters.max_depth = l);
+        if (!this->costs.empty() && this->lower_bound() >= this->upper_bound) {
+            STAT(this->counters.pruned++);
             goto M9;
         }
+        if (RLINK(0) == 0) {
+            if (this->split_workers > 1 && l < this->split_depth) {
+                // Les solutions au-dessus du niveau de découpage sont
+                // trouvées par tous, seul le premier les garde
+                if (this->split_worker != 0) goto M9;
+                this->solution_key = 2 * this->split_count;
+            } else if (this->split_workers > 1) {
+                this->solution_key = 2 * this->split_count - 1;
+            }
+            STAT(
+                if (this->counters.solutions++ == 0)
+                    this->counters.first_solution_time =
+                        chrono::duration<double>(chrono::steady_clock::now()
+                                                 - this->start_time).count();
+            );
+            this->last_status = Solved;
+            return true;
+        }
     M3: // cout << "M3" << endl;
-        // ppx(x, l);
-        i = this->choose(this);
+        i = this->choose ? this->choose(this) : this->choose_builtin();
         // cout << "Choose " << i << endl;
         // cout << "Branch degree " << branch_degree(i) << endl;
         // cout << "BOUND(i) " << BOUND(i) << endl;
+        STAT(this->count_degree(l, branch_degree(i)));
         if (branch_degree(i) == 0) goto M9;
     M4: // cout << "M4" << endl;
-        // ppx(x, l);
         x[l] = DLINK(i);
         BOUND(i)--;
         if (BOUND(i) == 0) this->cover(i);
         if (BOUND(i) != 0 || SLACK(i) != 0)
             ft[l] = x[l];
     M5: // cout << "M5" << endl;
-        // ppx(x, l);
         if (BOUND(i) == 0 && SLACK(i) == 0) {
             if (x[l] != i) goto M6;
             else goto M8;
@@ -571,10 +942,30 @@ vector<INT> DLX::search(bool resume) {
             q = RLINK(i);
             RLINK(p) = q;
             LLINK(q) = p;
+            STAT(this->counters.mems += 2);
         }
     M6: // cout << "M6" << endl;
-        // ppx(x, l);
+        this->depth[l + 1] = this->depth[l] + (x[l] != i);
+        if (!this->costs.empty())
+            this->path_cost[l + 1] = this->path_cost[l] + (x[l] != i
+                ? this->costs[this->options.row_number[x[l]]] : 0);
         if (x[l] != i) {
+            // la capacité des ressources est vérifiée avant de couvrir les
+            // éléments de l'option, qui est passée directement si elle est
+            // dépassée
+            INT holds = 0;
+            if (!this->interval_timeline.empty() &&
+                    !this->take_intervals(this->options.row_number[x[l]], holds)) {
+                STAT(this->counters.pruned++);
+                goto M7_next;
+            }
+            // les options qui multiplexent un élément coûtent plus cher
+            // (cf. set_hold_costs)
+            if (this->hold_cost > 0) {
+                holds += this->take_holds(this->options.row_number[x[l]]);
+                if (!this->costs.empty())
+                    this->path_cost[l + 1] += holds * this->hold_cost;
+            }
             p = x[l] + 1;
             while (p != x[l]) {
                 j = TOP(p);
@@ -588,12 +979,20 @@ vector<INT> DLX::search(bool resume) {
                     p++;
                 }
             }
+            if (this->propagator &&
+                    !this->propagator(this->options.row_number[x[l]],
+                                      this->depth[l])) {
+                STAT(this->counters.pruned++);
+                goto M7;
+            }
         }
         l++;
         goto M2;
     M7: // cout << "M7" << endl;
-        // ppx(x, l);
-        // if (x[l] != i) {
+        if (!this->interval_timeline.empty())
+            this->release_intervals(this->options.row_number[x[l]]);
+        if (this->hold_cost > 0)
+            this->release_holds(this->options.row_number[x[l]]);
         p = x[l] - 1;
         while (p != x[l]) {
             j = TOP(p);
@@ -607,12 +1006,11 @@ vector<INT> DLX::search(bool resume) {
                 p--;
             }
         }
-        // }
+    M7_next:
         x[l] = DLINK(x[l]);
         // cout << "x_l " << x[l] << endl;
         goto M5;
     M8: // cout << "M8" << endl;
-        // ppx(x, l);
         // cout << "BOUND(i) " << BOUND(i) << endl;
         // cout << "SLACK(i) " << SLACK(i) << endl;
         if (BOUND(i) == 0 && SLACK(i) == 0)
@@ -623,11 +1021,14 @@ vector<INT> DLX::search(bool resume) {
         // cout << "BOUND(i) " << BOUND(i) << endl;
     M9: // cout << "M9" << endl;
         // cout << "M9 - l=" << l << endl;
-        // ppx(x, l);
         if (l == 0) {
-            throw NoSolution();
-        } else l--;
-        // cout << "M9 - l=" << l << endl;
+            // l'arbre a été entièrement parcouru : tous les liens ont été
+            // restaurés
+            this->dirty = false;
+            this->last_status = NoMoreSolutions;
+            return false;
+        }
+        l--;
         // cout << "x_l " << x[l] << endl;
         // cout << "N " << this->nb_items << endl;
         if (x[l] <= this->nb_items) {
@@ -636,9 +1037,10 @@ vector<INT> DLX::search(bool resume) {
             q = RLINK(i);
             RLINK(p) = i;
             LLINK(q) = i;
+            STAT(this->counters.mems += 2);
             goto M8;
         } else {
             i = TOP(x[l]);
             goto M7;
         }
-}
\ No newline at end of file
+}
@@ -3,12 +3,29 @@
 #include <functional>
 #include <cmath>
 #include <stdexcept>
+#include <utility>
+#include <chrono>
+#include <cstdint>
+#include <atomic>
+#include <memory>
+#include <random>
 
 namespace DLX_M {
 
-typedef long int INT;
+/* Les indices sont sur 32 bits, ce qui suffit tant que l'instance a moins
+ * de 2^31 noeuds. Pour des instances plus grandes, compiler avec
+ * -DDLX_M_INT64 (make lib INT64=1, avec la variable d'environnement
+ * DLX_M_INT64 définie pour le module Python). */
+#ifdef DLX_M_INT64
+typedef int64_t INT;
+#else
+typedef int32_t INT;
+#endif
 typedef int COLOR;
 
+// Taille des indices avec laquelle la bibliothèque a été compilée
+int int_size();
+
 #define EMPTY_COLOR 0
 #define IGNORE_COLOR -1
 
@@ -57,22 +74,116 @@ struct Node {
 #define ONode(top, ulink, dlink, color, rnum) Node(Option, top, ulink, dlink, color, rnum)
 #define SepNode(ulink, dlink) Node(Option, 0, ulink, dlink, EMPTY_COLOR, 0)
 
+/* Stockage des éléments et des noeuds : un tableau par champ plutôt qu'un
+ * tableau de Item ou de Node, pour que les boucles de hide et unhide ne
+ * chargent que les champs qu'elles lisent (TOP, ULINK, DLINK et CLR). */
+struct Items {
+    vector<INT> llink;
+    vector<INT> rlink;
+    vector<AbstrItem*> name;
+    vector<INT> slack;
+    vector<INT> bound;
+
+    void push_back(const Item& item) {
+        this->llink.push_back(item.llink);
+        this->rlink.push_back(item.rlink);
+        this->name.push_back(item.name);
+        this->slack.push_back(item.slack);
+        this->bound.push_back(item.bound);
+    }
+
+    Item operator[](INT i) const {
+        return Item(this->name[i], this->llink[i], this->rlink[i],
+                    this->slack[i], this->bound[i]);
+    }
+
+    size_t size() const { return this->llink.size(); }
+};
+
+struct Nodes {
+    vector<INT> tl;
+    vector<INT> ulink;
+    vector<INT> dlink;
+    vector<COLOR> color;
+    vector<INT> row_number;
+
+    void push_back(const Node& node) {
+        this->tl.push_back(node.tl);
+        this->ulink.push_back(node.ulink);
+        this->dlink.push_back(node.dlink);
+        this->color.push_back(node.color);
+        this->row_number.push_back(node.row_number);
+    }
+
+    void reserve(size_t n) {
+        this->tl.reserve(n);
+        this->ulink.reserve(n);
+        this->dlink.reserve(n);
+        this->color.reserve(n);
+        this->row_number.reserve(n);
+    }
+
+    size_t size() const { return this->tl.size(); }
+};
+
 /* Définition de macros pour que le code écrit ressemble au code de Knuth */
-#define DLINK(x) this->options[x].dlink
-#define ULINK(x) this->options[x].ulink
-#define TOP(x) this->options[x].tl
-#define LEN(x) this->options[x].tl
-#define CLR(x) this->options[x].color
-
-#define LLINK(x) this->items[x].rlink
-#define RLINK(x) this->items[x].llink
-#define NAME(x) this->items[x].name
-#define SLACK(x) this->items[x].slack
-#define BOUND(x) this->items[x].bound
+#define DLINK(x) this->options.dlink[x]
+#define ULINK(x) this->options.ulink[x]
+#define TOP(x) this->options.tl[x]
+#define LEN(x) this->options.tl[x]
+#define CLR(x) this->options.color[x]
+
+#define LLINK(x) this->items.rlink[x]
+#define RLINK(x) this->items.llink[x]
+#define NAME(x) this->items.name[x]
+#define SLACK(x) this->items.slack[x]
+#define BOUND(x) this->items.bound[x]
 
 #define monus(x, y) max(x - y, (INT) 0)
 #define branch_degree(p) monus(LEN(p) + 1, monus(BOUND(p), SLACK(p)))
 
+/* Stratégies précompilées de choix de l'élément à couvrir (étape M3).
+ * L'élément choisi est, parmi les éléments actifs, celui de plus petite
+ * priorité (cf. set_priority), puis de plus petite clé (cf. set_keys), puis
+ * ayant le moins d'options (MinLength) ou le plus petit degré de
+ * branchement (MRV). Un élément qui fait échouer la branche est toujours
+ * choisi en premier. */
+enum Strategy {
+    MinLength,
+    MRV
+};
+
+/* Compteurs de la recherche. Ils peuvent être retirés à la compilation en
+ * définissant DLX_M_NO_STATS. */
+#ifndef DLX_M_NO_STATS
+#define STAT(x) x
+#else
+#define STAT(x)
+#endif
+
+struct Stats {
+    unsigned long long nodes = 0;      // noeuds de l'arbre de recherche
+    unsigned long long solutions = 0;
+    unsigned long long mems = 0;       // mises à jour de liens
+    // options rejetées par le propagateur ou faute de capacité (cf.
+    // add_timeline) et noeuds coupés par la borne (cf. set_costs)
+    unsigned long long pruned = 0;
+    INT max_depth = 0;
+    // degrees[l][d] : nombre de fois où l'élément choisi au niveau l avait
+    // un degré de branchement d
+    vector<vector<unsigned long long>> degrees;
+    // temps (en secondes) avant la première solution, -1 si aucune
+    double first_solution_time = -1;
+};
+
+/* Issue de la dernière recherche */
+enum Status {
+    Solved,             // une solution a été trouvée
+    NoMoreSolutions,    // l'arbre de recherche a été entièrement parcouru
+    BudgetExhausted,    // limite de noeuds ou de temps atteinte
+    Cancelled           // recherche annulée par cancel()
+};
+
 class NoSolution : public std::exception {
     public:
         const char *what() const throw() {
@@ -89,12 +200,70 @@ class DLX {
             vector<AbstrItem*> secondary, 
             vector<tuple<vector<AbstrItem*>, vector<tuple<AbstrItem*, COLOR>>>> rows,
             function<INT(DLX*)> choose);
+        /* Éléments sans nom : les éléments primaires sont numérotés de 0 à
+         * nb_primary - 1 et ont entre low[k] et high[k] occurrences, les
+         * éléments secondaires sont numérotés de 0 à nb_secondary - 1. Les
+         * lignes sont ajoutées avec add_rows. */
+        DLX(INT nb_primary, const INT* low, const INT* high, INT nb_secondary);
+        DLX(INT nb_primary, const INT* low, const INT* high, INT nb_secondary,
+            function<INT(DLX*)> choose);
 
         void add_row(vector<AbstrItem*> row_primary, 
                      vector<tuple<AbstrItem*, COLOR>> row_secondary);
+        /* Ajout de `nb_rows` lignes au format CSR : les éléments primaires
+         * de la ligne r sont indices[indptr[r]..indptr[r+1]-1] (numéros dans
+         * la liste `primary` du constructeur, à partir de 0), ses éléments
+         * secondaires sont sec_indices[sec_indptr[r]..sec_indptr[r+1]-1]
+         * (numéros dans la liste `secondary`), de couleurs sec_colors. */
+        void add_rows(INT nb_rows, const INT* indptr, const INT* indices,
+                      const INT* sec_indptr, const INT* sec_indices,
+                      const COLOR* sec_colors);
+        /* Même chose, la ligne r utilisant en plus les intervalles
+         * iv_timelines[k], [iv_first[k], iv_last[k]] pour k dans
+         * iv_indptr[r]..iv_indptr[r+1]-1 (cf. add_timeline). Avec iv_indptr
+         * à nullptr, les lignes n'utilisent aucun intervalle. */
+        void add_rows(INT nb_rows, const INT* indptr, const INT* indices,
+                      const INT* sec_indptr, const INT* sec_indices,
+                      const COLOR* sec_colors, const INT* iv_indptr,
+                      const INT* iv_timelines, const INT* iv_first,
+                      const INT* iv_last);
+        /* Ajoute une ressource de capacité `capacity` sur les instants 0 à
+         * length - 1 et renvoie son numéro (à partir de 0). Une ligne qui
+         * utilise l'intervalle [a, b] de la ressource en occupe une unité à
+         * chacun de ces instants : elle remplace les éléments primaires
+         * (t, ressource) de bornes (0, capacity) pour t de a à b, sans créer
+         * de noeud par instant. La capacité n'est vérifiée qu'au choix d'une
+         * option (étape M6), qui est rejetée comme par le propagateur si
+         * elle est dépassée. */
+        INT add_timeline(INT capacity, INT length);
         
         vector<vector<INT>> all_solutions(bool verbose = false);
+        vector<vector<INT>> all_solutions_parallel(INT nb_workers,
+                                                   INT split_depth = 3,
+                                                   bool verbose = false);
+        long long count_solutions();
         vector<INT> search(bool resume);
+        /* Recherche de la solution suivante en visitant au plus `max_nodes`
+         * noeuds et en s'arrêtant après `timeout` secondes (0 pour ne pas
+         * limiter). Si le budget est épuisé ou si la recherche est annulée,
+         * un nouvel appel avec `resume` à true la poursuit là où elle
+         * s'était arrêtée. La solution trouvée est donnée par solution(). */
+        Status search_within(bool resume, unsigned long long max_nodes,
+                             double timeout);
+        vector<INT> solution() { return this->solution_rows(this->x, this->l); }
+        /* Coût de la solution trouvée, multiplexages compris (cf. set_costs
+         * et set_hold_costs). */
+        double solution_cost() { return this->path_cost[this->l]; }
+        Status status() { return this->last_status; }
+        /* Interrompt la recherche en cours, ou la prochaine si aucune n'est
+         * en cours. Peut être appelé depuis un autre thread ; l'indicateur
+         * est partagé avec les copies de la structure (cf.
+         * all_solutions_parallel). */
+        void cancel() { *this->cancelled = true; }
+        /* Remet la structure dans l'état où elle était avant la première
+         * recherche. Une recherche qui ne reprend pas la précédente
+         * (search(false), all_solutions, ...) commence par cet appel. */
+        void reset();
         // vector<INT> get_solution();
 
         vector<INT> solution_rows(vector<INT> x, INT l);
@@ -104,17 +273,109 @@ class DLX {
         void print_solution(vector<INT> sol);
 
         Item item(INT i) { return this->items[i]; }
-        Node option(INT i) { return this->options[i]; }
+        Node option(INT i) {
+            return Node((i > 0 && i <= this->nb_items) ? Header : Option,
+                        TOP(i), ULINK(i), DLINK(i), CLR(i),
+                        this->options.row_number[i]);
+        }
 
         bool is_covered(INT i) { return this->covered[i]; }
 
+        Stats stats() { return this->counters; }
+
         void set_choose_function(function<INT(DLX*)> choose) { this->choose = choose; }
+        /* Fonction appelée après le choix de chaque option (étape M6), avec
+         * le numéro de sa ligne et le nombre k de lignes de la solution
+         * partielle à laquelle elle s'ajoute : ce sont les k premières
+         * lignes transmises lors des appels précédents qui n'ont pas été
+         * rejetées, les suivantes ont été abandonnées. Si elle renvoie
+         * false, l'option est rejetée et la suivante est essayée. */
+        void set_propagator(function<bool(INT, INT)> propagator) {
+            this->propagator = propagator;
+        }
+
+        /* Modification de la structure entre deux recherches, sans la
+         * reconstruire (la recherche en cours est abandonnée). Une ligne
+         * désactivée est détachée des listes de ses éléments et y reprend
+         * sa place quand elle est réactivée ; les numéros des lignes ne
+         * changent pas. */
+        void set_row_active(INT r, bool active);
+        bool is_row_active(INT r) { return this->row_active[r]; }
+        /* Change les bornes de l'élément primaire k (numéroté à partir de 0,
+         * comme pour add_rows) et le retire de la liste des éléments à
+         * couvrir, ou l'y remet à sa place, selon `active`. Un élément
+         * retiré ne doit apparaître dans aucune ligne active. */
+        void set_item(INT k, INT low, INT high, bool active);
+
+        // Désactive aussi le départage aléatoire (cf. set_seed)
+        void set_strategy(Strategy strategy) {
+            this->choose = nullptr;
+            this->strategy = strategy;
+            this->randomized = false;
+        }
+        /* Coût de chaque ligne (positif ou nul, `nb_costs` doit être le
+         * nombre de lignes) : les noeuds dont la borne inférieure du coût
+         * atteint la borne supérieure (cf. set_upper_bound) ne sont pas
+         * explorés. La borne inférieure est le coût des lignes choisies,
+         * plus, pour chaque élément de `bound_items` encore à couvrir k
+         * fois, k fois le plus petit coût de ses options restantes. Elle
+         * n'est valable que si aucune ligne ne contient deux éléments de
+         * `bound_items`. Avec nb_costs à 0, les coûts sont retirés. */
+        void set_costs(INT nb_costs, const double* costs,
+                       vector<INT> bound_items);
+        /* Coût `cost` ajouté à celui d'une option (cf. set_costs) chaque
+         * fois qu'elle est la deuxième à couvrir un élément de `items`, ou
+         * la deuxième à occuper un instant d'une ressource de `timelines`
+         * (cf. add_timeline). Ce coût ne dépend que des options déjà
+         * choisies, la borne inférieure reste donc valable. Avec `cost` à
+         * 0, il est retiré. */
+        void set_hold_costs(double cost, vector<INT> items,
+                            vector<INT> timelines);
+        /* Seules les solutions de coût strictement inférieur à `bound` sont
+         * cherchées. Pour une recherche du meilleur coût, on appelle
+         * search_within avec `resume` à true en abaissant la borne à
+         * chaque solution acceptée. */
+        void set_upper_bound(double bound) { this->upper_bound = bound; }
+        void set_priority(vector<INT> items);
+        void set_keys(vector<INT> keys);
+        /* Départage aléatoire (et reproductible) des éléments ex aequo par la
+         * stratégie précompilée. */
+        void set_seed(unsigned long long seed);
+        /* Mélange l'ordre des options de chaque élément, c'est-à-dire
+         * l'ordre dans lequel elles sont essayées, avec le générateur
+         * initialisé par set_seed. Interrompt la recherche en cours. */
+        void shuffle_options();
+
+        /* Découpage de l'arbre de recherche : les noeuds du niveau
+         * `depth` sont numérotés dans l'ordre du parcours et seuls ceux dont
+         * le numéro vaut `worker` modulo `nb_workers` sont explorés. Avec le
+         * départage aléatoire, le générateur est réinitialisé à chaque noeud
+         * jusqu'au niveau `depth` à partir de la graine et du numéro du
+         * noeud, pour que tous les découpages parcourent le même arbre. */
+        void set_split(INT worker, INT nb_workers, INT depth) {
+            this->split_worker = worker;
+            this->split_workers = nb_workers;
+            this->split_depth = depth;
+        }
 
     private:
-        vector<Item> items;
-        vector<Node> options;
+        Items items;
+        Nodes options;
         unordered_map<AbstrItem*, INT> corresp;
-        vector<tuple<vector<AbstrItem*>, vector<tuple<AbstrItem*, COLOR>>>> rows;
+        vector<INT> row_start;  // premier noeud de chaque ligne
+        vector<bool> row_active;
+        vector<bool> item_active;
+
+        // Ressources (cf. add_timeline) : occupation de chaque instant, mise
+        // bout à bout, et intervalles utilisés par chaque ligne au format
+        // CSR, les bornes étant des positions dans `usage`
+        vector<INT> timeline_capacity;
+        vector<INT> timeline_start;
+        vector<INT> usage;
+        vector<INT> interval_ptr;
+        vector<INT> interval_timeline;
+        vector<INT> interval_first;
+        vector<INT> interval_last;
 
         INT nb_option_nodes = 1;
         INT nb_items = 0;
@@ -124,11 +385,66 @@ class DLX {
         // Variables de sauvegarde de l'état de la recherche
         vector<INT> x;
         vector<INT> ft;
-        INT l, i, p, j, q;
+        vector<INT> depth;  // nombre de lignes choisies avant chaque niveau
+        vector<double> path_cost;  // coût des lignes choisies avant chaque niveau
+        INT l = 0, i = 0;
+
+        // Découpage de l'arbre de recherche (cf. set_split)
+        INT split_worker = 0;
+        INT split_workers = 1;
+        INT split_depth = 0;
+        INT split_count = 0;
+        INT split_nodes = 0;  // noeuds visités jusqu'au niveau de découpage
+        // Position de la dernière solution trouvée dans l'ordre du parcours
+        // séquentiel, utilisée pour fusionner les résultats des découpages
+        INT solution_key = 0;
 
         function<INT(DLX*)> choose;
-        bool *covered;
+        function<bool(INT, INT)> propagator;
+        vector<double> costs;
+        vector<INT> bound_items;
+        double hold_cost = 0;
+        vector<bool> hold_item;
+        vector<bool> hold_timeline;
+        vector<INT> hold_count;  // nombre d'options choisies couvrant chaque élément
+        double upper_bound = INFINITY;
+        Strategy strategy = MinLength;
+        vector<INT> priority;  // rang de chaque élément dans la liste de priorité
+        vector<INT> keys;
+        bool randomized = false;
+        unsigned long long seed = 0;
+        mt19937_64 rng;
+        vector<bool> covered;
+
+        // Copie des liens avant toute recherche, utilisée par reset. Elle
+        // est faite au début de la première recherche qui suit l'ajout de
+        // lignes. `dirty` indique qu'une recherche a été interrompue.
+        Items pristine_items;
+        Nodes pristine_options;
+        bool has_pristine = false;
+        bool dirty = false;
+
+        Stats counters;
+        chrono::steady_clock::time_point start_time;
+
+        // Budget de la recherche en cours (cf. search_within)
+        unsigned long long nodes_left = -1;
+        chrono::steady_clock::time_point deadline =
+            chrono::steady_clock::time_point::max();
+        unsigned int ticks = 0;
+        shared_ptr<atomic<bool>> cancelled = make_shared<atomic<bool>>(false);
+        bool interrupted = false;
+        Status last_status = NoMoreSolutions;
 
+        void init_items(INT nb_primary, AbstrItem* const* primary_names,
+                        const INT* low, const INT* high,
+                        INT nb_secondary, AbstrItem* const* secondary_names);
+        void append_node(INT item_id, COLOR color);
+        void end_row(INT first_node);
+        bool take_intervals(INT r, INT& holds);
+        void release_intervals(INT r);
+        INT take_holds(INT r);
+        void release_holds(INT r);
         void cover(INT i);
         void hide(INT i);
         void uncover(INT i);
@@ -141,7 +457,13 @@ class DLX {
         void tweak_special(INT x, INT p);
         void untweak(vector<INT> &ft, INT l);
         void untweak_special(vector<INT> &ft, INT l);
-        // INT choose();
+        void set_limits(unsigned long long max_nodes, double timeout);
+        void end_call();
+        bool next(bool resume);
+        void count_degree(INT l, INT d);
+        void merge_stats(const Stats& s);
+        INT choose_builtin();
+        double lower_bound();
 };
 
 }
\ No newline at end of file
@@ -1,12 +1,27 @@
-from typing import List, Tuple, Any, Dict, Callable, Hashable, Iterator, Union, Set, Optional
+from typing import List, Tuple, Any, Dict, Callable, Hashable, Iterator, Union, Set, Optional, Iterable, Sequence
 from typing_extensions import Protocol
+from bisect import bisect_right
+from enum import Enum
 import cppyy
+import numpy as np
 import os
+import itertools
+import random
+import time
+import weakref
+
+try:
+    from .zdd import SolutionZDD, build_zdd
+except ImportError:  # dlxm.py importé depuis le répertoire DLX
+    from zdd import SolutionZDD, build_zdd
 
 _dir_path = os.path.dirname(os.path.realpath(__file__))
 _cur_path = os.getcwd()
 os.chdir(_dir_path)
 
+# Doit correspondre à la compilation de dlx_m.so (make lib INT64=1)
+if os.environ.get('DLX_M_INT64'):
+    cppyy.cppdef('#define DLX_M_INT64')
 cppyy.include('dlx_m.hpp')
 cppyy.load_library('dlx_m.so')
 
@@ -15,11 +30,51 @@ os.chdir(_cur_path)
 _std = cppyy.gbl.std
 _DLX_M = cppyy.gbl.DLX_M
 _INT = _DLX_M.INT
+if _DLX_M.int_size() != cppyy.sizeof(_INT):
+    raise ImportError("dlx_m.so n'a pas été compilée avec la même taille "
+                      "d'indices que dlx_m.hpp (variable DLX_M_INT64)")
 _COLOR = _DLX_M.COLOR
 _DLX = _DLX_M.DLX
 _EMPTY_COLOR = 0
 _AbstrItem: Any = _DLX_M.AbstrItem
 _NoSolution = _DLX_M.NoSolution
+_MinLength = _DLX_M.MinLength
+_MRV = _DLX_M.MRV
+
+# Les threads de all_solutions_parallel ne doivent pas attendre le GIL
+_DLX.all_solutions_parallel.__release_gil__ = True
+_DLX.count_solutions.__release_gil__ = True
+# ... ni search_within, pour qu'un autre thread puisse l'annuler
+_DLX.search_within.__release_gil__ = True
+
+# cppyy compile un adaptateur pour chaque objet Python converti en
+# std::function, ce qui prend un dixième de seconde : tous les propagateurs
+# passent donc par la même fonction `_call_propagator`, qui retrouve celui
+# de chaque structure par son numéro
+cppyy.cppdef("""
+std::function<bool(DLX_M::INT, DLX_M::INT)> dlxm_bind_propagator(
+        std::function<bool(long, DLX_M::INT, DLX_M::INT)> f, long id) {
+    return [f, id](DLX_M::INT i, DLX_M::INT k) { return f(id, i, k); };
+}
+""")
+_propagators: Dict[int, Callable[[int, int], bool]] = {}
+_propagator_ids = itertools.count()
+
+
+def _call_propagator(id: int, i: int, k: int) -> bool:
+    return _propagators[id](i, k)
+
+
+def _bind_propagator(dlx, propagator: Optional[Callable[[int, int], bool]]):
+    """ Installe `propagator` dans la structure C++ `dlx`. """
+    if propagator is None:
+        dlx.set_propagator(_nullptr)
+        return
+    id = next(_propagator_ids)
+    _propagators[id] = propagator
+    weakref.finalize(dlx, _propagators.pop, id, None)
+    dlx.set_propagator(cppyy.gbl.dlxm_bind_propagator(_call_propagator, id))
+
 
 _primary_tpl = _std.make_tuple['DLX_M::AbstrItem*', _INT, _INT]
 _primary_vct = _std.vector[_std.tuple['DLX_M::AbstrItem*', _INT, _INT]]
@@ -30,6 +85,28 @@ _row_secondary_tpl = _std.make_tuple['DLX_M::AbstrItem*', _COLOR]
 _row_secondary_vct = _std.vector[_std.tuple['DLX_M::AbstrItem*', _COLOR]]
 _row_tpl = _std.make_tuple[_row_primary_vct, _row_secondary_vct]
 _row_vct = _std.vector[_std.tuple[_row_primary_vct, _row_secondary_vct]]
+_int_vct = _std.vector[_INT]
+
+# Types NumPy des tableaux lus directement par DLX::add_rows
+_INT_DTYPE = np.int64 if cppyy.sizeof(_INT) == 8 else np.int32
+_COLOR_DTYPE = np.intc
+_nullptr = cppyy.nullptr
+
+
+class SearchStatus(Enum):
+    """ Issue de la dernière recherche d'une instance. """
+    SOLVED = 'solved'
+    NO_SOLUTION = 'no solution'
+    BUDGET_EXHAUSTED = 'budget exhausted'
+    CANCELLED = 'cancelled'
+
+
+_STATUS = {
+    int(_DLX_M.Solved): SearchStatus.SOLVED,
+    int(_DLX_M.NoMoreSolutions): SearchStatus.NO_SOLUTION,
+    int(_DLX_M.BudgetExhausted): SearchStatus.BUDGET_EXHAUSTED,
+    int(_DLX_M.Cancelled): SearchStatus.CANCELLED
+}
 
 
 def _P(x: List[Tuple[_AbstrItem, int, int]]):
@@ -151,22 +228,178 @@ class DLXMVariable():
         return self.dict.__iter__()
 
 
+class _CSRRows():
+    """ Bloc de lignes ajouté par `DLXM.add_rows`, conservé au format CSR.
+    Les lignes ne sont reconstruites sous forme de listes d'éléments que
+    lorsqu'on y accède. """
+
+    def __init__(self, primary, indptr, indices,
+                 secondary, sec_indptr, sec_indices, sec_colors,
+                 intervals=None):
+        self.primary = list(primary)
+        self.indptr = indptr
+        self.indices = indices
+        self.secondary = list(secondary)
+        self.sec_indptr = sec_indptr
+        self.sec_indices = sec_indices
+        self.sec_colors = sec_colors
+        # (iv_indptr, iv_timelines, iv_first, iv_last), cf. DLXM.add_rows
+        self.intervals = intervals
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __getitem__(self, r: int) -> Tuple[List[ConcItem], List[Tuple[ConcItem, int]]]:
+        a, b = self.indptr[r], self.indptr[r + 1]
+        p = [self.primary[k] for k in self.indices[a:b]]
+        a, b = self.sec_indptr[r], self.sec_indptr[r + 1]
+        s = [(self.secondary[k], int(c))
+             for k, c in zip(self.sec_indices[a:b], self.sec_colors[a:b])]
+        return p, s
+
+    def row_intervals(self, r: int) -> List[Tuple[int, int, int]]:
+        if self.intervals is None:
+            return []
+        iv_indptr, timelines, first, last = self.intervals
+        a, b = iv_indptr[r], iv_indptr[r + 1]
+        return [(int(k), int(u), int(v))
+                for k, u, v in zip(timelines[a:b], first[a:b], last[a:b])]
+
+    def arrays(self, prim_index: Optional[Dict[int, int]],
+               sec_index: Optional[Dict[int, int]]):
+        """ Renvoie les tableaux à passer à `DLX::add_rows`, les numéros
+        d'éléments étant traduits en positions dans la structure C++ (sauf si
+        les dictionnaires de traduction sont `None`). Les tableaux d'indices
+        sont ramenés à la partie utilisée par le bloc, qui commence à
+        `indptr[0]` (de même pour les éléments secondaires et les
+        intervalles). """
+        indices = self.indices[self.indptr[0]:self.indptr[-1]]
+        sec_indices = self.sec_indices[self.sec_indptr[0]:self.sec_indptr[-1]]
+        sec_colors = self.sec_colors[self.sec_indptr[0]:self.sec_indptr[-1]]
+        if prim_index is not None:
+            prim_pos = np.array([prim_index[id(e)] for e in self.primary],
+                                dtype=_INT_DTYPE)
+            indices = prim_pos[indices]
+        if sec_index is not None:
+            sec_pos = np.array([sec_index[id(e)] for e in self.secondary],
+                               dtype=_INT_DTYPE)
+            sec_indices = sec_pos[sec_indices]
+        intervals = (None,) * 4
+        if self.intervals is not None:
+            iv_indptr, timelines, first, last = self.intervals
+            a, b = iv_indptr[0], iv_indptr[-1]
+            intervals = (iv_indptr - a, timelines[a:b], first[a:b], last[a:b])
+        return (self.indptr - self.indptr[0], indices,
+                self.sec_indptr - self.sec_indptr[0], sec_indices,
+                sec_colors) + intervals
+
+
+class _Rows():
+    """ Lignes d'une instance, dans l'ordre d'ajout : des listes de lignes
+    ajoutées par `DLXM.add_row` et des blocs ajoutés par `DLXM.add_rows`. """
+
+    def __init__(self):
+        self.blocks: List[Union[list, _CSRRows]] = []
+        self.starts: List[int] = []
+        self.size = 0
+        # intervalles des lignes ajoutées par `DLXM.add_row`
+        self.list_intervals: Dict[int, List[Tuple[int, int, int]]] = {}
+
+    def append(self, row: Tuple[List[ConcItem], List[Tuple[ConcItem, int]]],
+               intervals: Sequence[Tuple[int, int, int]] = ()):
+        if len(self.blocks) == 0 or not isinstance(self.blocks[-1], list):
+            self.starts.append(self.size)
+            self.blocks.append([])
+        self.blocks[-1].append(row)
+        if len(intervals) > 0:
+            self.list_intervals[self.size] = [tuple(iv) for iv in intervals]
+        self.size += 1
+
+    def extend(self, block: _CSRRows):
+        self.starts.append(self.size)
+        self.blocks.append(block)
+        self.size += len(block)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, i: int) -> Tuple[List[ConcItem], List[Tuple[ConcItem, int]]]:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError("row index out of range")
+        b = bisect_right(self.starts, i) - 1
+        return self.blocks[b][i - self.starts[b]]
+
+    def intervals(self, i: int) -> List[Tuple[int, int, int]]:
+        """ Intervalles (ressource, début, fin) utilisés par la ligne `i`. """
+        b = bisect_right(self.starts, i) - 1
+        block = self.blocks[b]
+        if isinstance(block, _CSRRows):
+            return block.row_intervals(i - self.starts[b])
+        return self.list_intervals.get(i, [])
+
+    def __iter__(self) -> Iterator[Tuple[List[ConcItem], List[Tuple[ConcItem, int]]]]:
+        for block in self.blocks:
+            for r in range(len(block)):
+                yield block[r]
+
+
+def _rows_to_csr(rows: List[Tuple[List[Any], List[Tuple[Any, int]]]],
+                 prim_index: Optional[Dict[int, int]],
+                 sec_index: Optional[Dict[int, int]],
+                 intervals: List[List[Tuple[int, int, int]]]):
+    indptr, indices = [0], []
+    sec_indptr, sec_indices, sec_colors = [0], [], []
+    iv_indptr, iv = [0], []
+    for (p, s), row_intervals in zip(rows, intervals):
+        iv.extend(row_intervals)
+        iv_indptr.append(len(iv))
+        if prim_index is None:
+            indices.extend(p)
+        else:
+            indices.extend(prim_index[id(e)] for e in p)
+        indptr.append(len(indices))
+        for e, c in s:
+            sec_indices.append(e if sec_index is None else sec_index[id(e)])
+            sec_colors.append(c)
+        sec_indptr.append(len(sec_indices))
+    return (np.array(indptr, dtype=_INT_DTYPE),
+            np.array(indices, dtype=_INT_DTYPE),
+            np.array(sec_indptr, dtype=_INT_DTYPE),
+            np.array(sec_indices, dtype=_INT_DTYPE),
+            np.array(sec_colors, dtype=_COLOR_DTYPE)) \
+        + ((np.array(iv_indptr, dtype=_INT_DTYPE),)
+           + tuple(np.array(a, dtype=_INT_DTYPE) for a in zip(*iv))
+           if len(iv) > 0 else (None,) * 4)
+
+
 class DLXM():
     variables: List[DLXMVariable]
     new_id: NewId
-    rows: List[Tuple[List[ConcItem], List[Tuple[ConcItem, int]]]]
+    rows: _Rows
     resume: bool
-    compiled_only: bool
+    compiled_size: Optional[Tuple[int, int]]
+    status: Optional[SearchStatus]
 
     def __init__(self, choose=None):
         self.variables = []
         self.new_id = _new_id_generator()
-        self.rows = []
-        self.rows_cpp = []
+        self.rows = _Rows()
         self.resume = False
-        self.compiled_only = False
+        self.compiled_size = None
+        self.status = None
         self.dlx = None
+        self.last_dlx = None
         self.choose = choose
+        self.strategy = (False, [], {}, None)
+        self.propagator = None
+        self.costs = None
+        self.bound_items = []
+        self.hold_costs = (0.0, [], [])
+        self.best_cost = None
+        self.inactive_rows: Set[int] = set()
+        self.timelines: List[Tuple[int, int]] = []
 
     def new_variable(self, lower_bound: int = 0, upper_bound: int = 1,
                      secondary: bool = False) -> DLXMVariable:
@@ -187,10 +420,53 @@ class DLXM():
         self.variables.append(x)
         return x
 
+    def new_timeline(self, capacity: int, length: int) -> int:
+        """ Crée une ressource de capacité `capacity` sur les instants 0 à
+        `length - 1` et renvoie son numéro. Une ligne qui utilise l'intervalle
+        (k, a, b) (cf. `add_row` et `add_rows`) occupe une unité de la
+        ressource k à chaque instant de a à b : c'est l'équivalent d'un
+        élément primaire de bornes (0, capacity) par instant, mais sans
+        noeud par instant dans la structure. La capacité n'est vérifiée
+        qu'au choix d'une ligne, qui est rejetée si elle la dépasse (ces
+        rejets sont comptés dans `stats['pruned']`).
+
+        >>> x = DLXM()
+        >>> tasks = x.new_variable(1, 1)
+        >>> hand = x.new_timeline(2, 4)
+        >>> for k in range(3):
+        ...     for start in range(3):
+        ...         x.add_row([tasks[k]], intervals=[(hand, start, start + 1)])
+        >>> len(x.all_solutions()), x.zdd().count()
+        (12, 12)
+        >>> x.add_row([tasks[0]], intervals=[(hand, 3, 4)])
+        Traceback (most recent call last):
+        ...
+        IndexError: add_row : intervalle invalide
+        """
+        if capacity < 0 or length < 0:
+            raise ValueError("new_timeline : capacité ou longueur négative")
+        self.timelines.append((capacity, length))
+        if self.dlx is not None:
+            self.dlx.add_timeline(capacity, length)
+            self.resume = False
+        return len(self.timelines) - 1
+
+    def _check_intervals(self, timelines, first, last, where: str):
+        if len(timelines) == 0:
+            return
+        timelines, first, last = np.asarray(timelines), np.asarray(first), np.asarray(last)
+        if timelines.min() < 0 or timelines.max() >= len(self.timelines):
+            raise IndexError(where + " : ressource inexistante")
+        length = np.array([n for _, n in self.timelines])[timelines]
+        if (first < 0).any() or (first > last).any() or (last >= length).any():
+            raise IndexError(where + " : intervalle invalide")
+
     def add_row(self, row_primary: List[ConcItem] = [],
-                row_secondary: List[Tuple[ConcItem, int]] = []):
+                row_secondary: List[Tuple[ConcItem, int]] = [],
+                intervals: Sequence[Tuple[int, int, int]] = ()):
         """ Ajoute une nouvelle ligne à l'instance de exact cover avec
-        multiplicités.
+        multiplicités. La ligne utilise de plus les intervalles
+        (ressource, début, fin) de `intervals` (cf. `new_timeline`).
 
         >>> x = DLXM()
         >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
@@ -206,8 +482,82 @@ class DLXM():
         >>> [([e.get_repr() for e in p], [(e.get_repr(), c) for (e, c) in s]) for (p, s) in x.rows]
         [(['x_0', 'x_1'], [('x_2', 1)]), (['x_0'], [('x_2', 0)]), (['x_1'], [('x_2', 1)]), (['x_1'], [('x_2', 0)])]
         """
-        self.rows.append((row_primary, row_secondary))
-        self.rows_cpp.append((_RP(row_primary), _RS(row_secondary)))
+        if len(intervals) > 0:
+            self._check_intervals(*zip(*intervals), "add_row")
+        self.rows.append((row_primary, row_secondary), intervals)
+
+    def add_rows(self, primary: Sequence[ConcItem], indptr, indices,
+                 secondary: Sequence[ConcItem] = [], sec_indptr=None,
+                 sec_indices=None, sec_colors=None, intervals=None):
+        """ Ajoute plusieurs lignes données au format CSR : les éléments
+        primaires de la ligne r sont les `primary[k]` pour `k` dans
+        `indices[indptr[r]:indptr[r + 1]]`, et ses éléments secondaires les
+        `secondary[k]` pour `k` dans `sec_indices[sec_indptr[r]:sec_indptr[r + 1]]`,
+        avec les couleurs correspondantes de `sec_colors`. Les tableaux
+        (des tableaux NumPy ou des listes d'entiers) sont lus directement par
+        le moteur C++ à la compilation, sans passer par des objets Python
+        pour chaque ligne. Si `intervals` est donné, c'est un quadruplet
+        `(iv_indptr, iv_timelines, iv_first, iv_last)` : la ligne r utilise
+        les intervalles `(iv_timelines[k], iv_first[k], iv_last[k])` pour `k`
+        de `iv_indptr[r]` à `iv_indptr[r + 1] - 1` (cf. `new_timeline`).
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=1, upper_bound=1)
+        >>> sv = x.new_variable(secondary=True)
+        >>> p, q, r, a, b = pv[0], pv[1], pv[2], sv[0], sv[1]
+        >>> x.add_rows([p, q, r], [0, 2, 4, 5, 6, 7], [0, 1, 0, 2, 0, 1, 2],
+        ...            [a, b], [0, 2, 4, 5, 6, 7], [0, 1, 0, 1, 0, 0, 1],
+        ...            [0, 1, 1, 0, 2, 1, 1])
+        >>> len(x.rows), x.row_repr(1)
+        (5, ['x_0', 'x_2', ('x_3', 1), ('x_4', 0)])
+        >>> x.all_solutions()
+        [{0, 4}, {1, 3}]
+        >>> x.add_row([q, r])
+        >>> x.add_rows([p], [0, 1], [0])
+        >>> x.row_repr(6), x.all_solutions()
+        (['x_0'], [{0, 4}, {1, 3}, {3, 4, 6}, {2, 5}, {5, 6}])
+        >>> x.add_rows([p], [0, 1], [1])
+        Traceback (most recent call last):
+        ...
+        IndexError: add_rows : élément primaire inexistant
+
+        Les tableaux peuvent être des morceaux de tableaux plus grands,
+        `indptr[0]` n'étant pas forcément nul :
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=1, upper_bound=1)
+        >>> sv = x.new_variable(secondary=True)
+        >>> p, q, a, b = pv[0], pv[1], sv[0], sv[1]
+        >>> x.add_rows([p, q], [1, 3], [0, 0, 1], [a, b], [1, 2], [1, 0], [5, 3])
+        >>> x.row_repr(0), x.all_solutions()
+        (['x_0', 'x_1', ('x_2', 3)], [{0}])
+        """
+        indptr = np.ascontiguousarray(indptr, dtype=_INT_DTYPE)
+        indices = np.ascontiguousarray(indices, dtype=_INT_DTYPE)
+        if sec_indptr is None:
+            sec_indptr = np.zeros(len(indptr), dtype=_INT_DTYPE)
+        sec_indptr = np.ascontiguousarray(sec_indptr, dtype=_INT_DTYPE)
+        sec_indices = np.ascontiguousarray([] if sec_indices is None else sec_indices,
+                                           dtype=_INT_DTYPE)
+        sec_colors = np.ascontiguousarray([] if sec_colors is None else sec_colors,
+                                          dtype=_COLOR_DTYPE)
+        if len(sec_indptr) != len(indptr) or len(sec_indices) != len(sec_colors) \
+                or indptr[-1] > len(indices) or sec_indptr[-1] > len(sec_indices):
+            raise ValueError("add_rows : tableaux de tailles incompatibles")
+        if len(indices) > 0 and (indices.min() < 0 or indices.max() >= len(primary)):
+            raise IndexError("add_rows : élément primaire inexistant")
+        if len(sec_indices) > 0 and (sec_indices.min() < 0
+                                     or sec_indices.max() >= len(secondary)):
+            raise IndexError("add_rows : élément secondaire inexistant")
+        if intervals is not None:
+            intervals = tuple(np.ascontiguousarray(a, dtype=_INT_DTYPE) for a in intervals)
+            iv_indptr, timelines, first, last = intervals
+            if len(iv_indptr) != len(indptr) or len(timelines) < iv_indptr[-1] \
+                    or len(first) != len(timelines) or len(last) != len(timelines):
+                raise ValueError("add_rows : tableaux de tailles incompatibles")
+            self._check_intervals(timelines, first, last, "add_rows")
+        self.rows.extend(_CSRRows(primary, indptr, indices, secondary,
+                                  sec_indptr, sec_indices, sec_colors, intervals))
 
     def primary_variables(self, lower_bound: int, upper_bound: int) -> Optional[DLXMVariable]:
         for var in self.variables:
@@ -249,7 +599,10 @@ class DLXM():
         p, s = self.rows[i]
         return [e.get_obj() for e in p] + [(e.get_obj(), c) for (e, c) in s]
 
-    def compile(self):
+    def _new_dlx(self):
+        """ Construit la structure C++ de l'instance. Les statistiques
+        renvoyées par `stats` sont celles de la dernière structure construite.
+        """
         primary_items: List[Tuple[ConcItem, int, int]] = []
         secondary_items: List[ConcItem] = []
 
@@ -268,20 +621,361 @@ class DLXM():
 
         dlx = _DLX(primary, secondary, rows, self.choose) \
             if self.choose is not None else _DLX(primary, secondary, rows)
-        for p, s in self.rows_cpp:
-            dlx.add_row(p, s)
 
-        self.dlx = dlx
-        self.compiled_only = True
+        self._load_timelines(dlx)
+        self._load_rows(dlx, *self._row_indexes())
+        self._apply_patches(dlx)
+        if self.choose is None:
+            self._apply_strategy(dlx)
+        self._apply_hooks(dlx)
+
+        self.last_dlx = dlx
+        return dlx
+
+    def _row_indexes(self) -> Tuple[Optional[Dict[int, int]], Optional[Dict[int, int]]]:
+        """ Positions des éléments primaires et secondaires dans la
+        structure C++, à partir de leur `id`. """
+        primary = [x[k] for x in self.variables if not x.secondary for k in x]
+        secondary = [x[k] for x in self.variables if x.secondary for k in x]
+        return ({id(e): k for k, e in enumerate(primary)},
+                {id(e): k for k, e in enumerate(secondary)})
+
+    def _load_timelines(self, dlx):
+        for capacity, length in self.timelines:
+            dlx.add_timeline(capacity, length)
+
+    def _load_rows(self, dlx, prim_index: Optional[Dict[int, int]],
+                   sec_index: Optional[Dict[int, int]], start: int = 0):
+        """ Charge dans `dlx` les lignes à partir de la ligne `start`. """
+        for first, block in zip(self.rows.starts, self.rows.blocks):
+            if first + len(block) <= start:
+                continue
+            if first < start:
+                # lignes de `add_row` ajoutées à un bloc déjà chargé
+                block = block[start - first:]
+            if isinstance(block, _CSRRows):
+                arrays = block.arrays(prim_index, sec_index)
+            else:
+                first = max(first, start)
+                arrays = _rows_to_csr(block, prim_index, sec_index,
+                                      [self.rows.list_intervals.get(first + r, [])
+                                       for r in range(len(block))])
+            # cppyy ne sait pas passer un tableau vide comme pointeur
+            dlx.add_rows(len(block), *(a if a is not None and len(a) > 0 else _nullptr
+                                       for a in arrays))
+
+    def _apply_patches(self, dlx):
+        for r in self.inactive_rows:
+            dlx.set_row_active(r, False)
+
+    def _item_id(self, item) -> int:
+        """ Numéro de l'élément primaire `item` dans la structure C++. """
+        return item.get_id()
+
+    def _nb_items(self) -> int:
+        return sum(len(x.dict) for x in self.variables)
+
+    def _apply_hooks(self, dlx):
+        if self.propagator is not None:
+            _bind_propagator(dlx, self.propagator)
+        if self.costs is not None:
+            dlx.set_costs(len(self.costs), self.costs,
+                          _int_vct([self._item_id(item) for item in self.bound_items]))
+            hold_cost, hold_items, hold_timelines = self.hold_costs
+            dlx.set_hold_costs(hold_cost,
+                               _int_vct([self._item_id(item) for item in hold_items]),
+                               _int_vct(hold_timelines))
+
+    def _apply_strategy(self, dlx):
+        mrv, priority, keys, seed = self.strategy
+        dlx.set_strategy(_MRV if mrv else _MinLength)
+        if seed is not None:
+            dlx.set_seed(seed)
+        dlx.set_priority(_int_vct([self._item_id(item) for item in priority]))
+        if len(keys) == 0:
+            dlx.set_keys(_int_vct())
+        else:
+            default = max(keys.values()) + 1
+            ids = [default for _ in range(self._nb_items() + 1)]
+            for item, key in keys.items():
+                ids[self._item_id(item)] = key
+            dlx.set_keys(_int_vct(ids))
+
+    def compile(self):
+        self.dlx = self._new_dlx()
+        self.compiled_size = (self._nb_items(), len(self.rows))
+        self.resume = False
+
+    def _compiled(self):
+        """ Renvoie la structure compilée, en la reconstruisant seulement
+        si des éléments ont été ajoutés depuis la dernière compilation (ou
+        des lignes, si des coûts ont été donnés). Les autres lignes ajoutées
+        depuis sont chargées dans la structure existante. """
+        if self.dlx is None or self.compiled_size[0] != self._nb_items() \
+                or (self.costs is not None and self.compiled_size[1] != len(self.rows)):
+            self.compile()
+        elif self.compiled_size[1] != len(self.rows):
+            self._load_rows(self.dlx, *self._row_indexes(), start=self.compiled_size[1])
+            self.compiled_size = (self._nb_items(), len(self.rows))
+            self.resume = False
+        self.last_dlx = self.dlx
+        return self.dlx
+
+    def set_rows_active(self, rows: Iterable[int], active: bool):
+        """ Désactive (ou réactive) les lignes `rows` : une ligne
+        désactivée ne fait partie d'aucune solution mais garde son numéro.
+        La structure compilée est modifiée sur place, sans être
+        reconstruite, et la recherche en cours est abandonnée.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=1, upper_bound=1)
+        >>> a, b = pv[0], pv[1]
+        >>> x.add_row([a, b])
+        >>> x.add_row([a])
+        >>> x.add_row([b])
+        >>> x.all_solutions()
+        [{0}, {1, 2}]
+        >>> dlx = x.dlx
+        >>> x.set_rows_active([0], False)
+        >>> x.all_solutions()
+        [{1, 2}]
+        >>> x.add_row([a, b])
+        >>> x.set_rows_active([0], True)
+        >>> x.set_rows_active([1], False)
+        >>> x.all_solutions(), x.dlx is dlx, x.zdd().count()
+        ([{0}, {3}], True, 2)
+        """
+        rows = list(rows)
+        for r in rows:
+            if not 0 <= r < len(self.rows):
+                raise IndexError("set_rows_active : ligne inexistante")
+            if active:
+                self.inactive_rows.discard(r)
+            else:
+                self.inactive_rows.add(r)
+        if self.dlx is not None:
+            dlx = self._compiled()
+            for r in rows:
+                dlx.set_row_active(r, active)
+        self.resume = False
+
+    def reset(self):
+        """ Abandonne la recherche en cours : le prochain appel à `search`
+        renverra de nouveau la première solution. La structure compilée est
+        remise dans son état initial sans être reconstruite.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=3)
+        >>> a = pv[0]
+        >>> for k in range(3):
+        ...     x.add_row([a])
+        >>> x.compile()
+        >>> dlx = x.dlx
+        >>> x.search(), x.search()
+        ({0, 1, 2}, {0, 1})
+        >>> x.reset()
+        >>> x.search(), len(x.all_solutions()), x.search()
+        ({0, 1, 2}, 8, {0, 1, 2})
+        >>> x.dlx is dlx
+        True
+        >>> x.add_row([a])
+        >>> len(x.all_solutions()), x.dlx is dlx
+        (15, True)
+        """
+        self.resume = False
+        if self.dlx is not None:
+            self.dlx.reset()
 
     def set_choose_function(self, choose):
         self.choose = choose
         self.dlx.set_choose_function(choose)
 
-    def all_solutions(self, verbose: bool = False) -> List[Set[int]]:
+    def set_propagator(self, propagator: Optional[Callable[[int, int], bool]]):
+        """ Fait appeler `propagator(i, k)` par le moteur à chaque fois que
+        la ligne `i` est ajoutée à une solution partielle de `k` lignes :
+        celles-ci sont les `k` premières lignes transmises lors des appels
+        précédents qui n'ont pas été rejetées, les suivantes ont été
+        abandonnées. Si `propagator` renvoie `False`, la ligne est rejetée et
+        la recherche continue avec la suivante. Le nombre de lignes rejetées
+        est donné par `stats['pruned']`. Avec `None`, aucune fonction n'est
+        appelée.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=1)
+        >>> a, b, c = pv[0], pv[1], pv[2]
+        >>> x.add_row([a, b])
+        >>> x.add_row([b, c])
+        >>> x.add_row([c])
+        >>> chosen = []
+        >>> def no_row_0_with_row_2(i, k):
+        ...     del chosen[k:]
+        ...     chosen.append(i)
+        ...     return not {0, 2} <= set(chosen)
+        >>> x.set_propagator(no_row_0_with_row_2)
+        >>> x.all_solutions(), x.stats['pruned']
+        ([{0}, {1}, {2}, set()], 1)
+        >>> x.set_propagator(None)
+        >>> x.all_solutions()
+        [{0, 2}, {0}, {1}, {2}, set()]
+        """
+        self.propagator = propagator
+        if self.dlx is not None:
+            _bind_propagator(self.dlx, propagator)
+
+    def set_costs(self, costs: Optional[Sequence[float]],
+                  bound_items: Sequence[Any] = [],
+                  hold_items: Sequence[Any] = [], hold_timelines: Sequence[int] = [],
+                  hold_cost: float = 0.0):
+        """ Donne un coût (positif ou nul) à chaque ligne, pour `optimize`.
+        La recherche est guidée par une borne inférieure du coût : celui des
+        lignes choisies, plus, pour chaque élément de `bound_items` restant à
+        couvrir, le plus petit coût de ses options. Aucune ligne ne doit
+        contenir deux éléments de `bound_items`. Avec `None`, les coûts sont
+        retirés.
+
+        Chaque élément de `hold_items` couvert par au moins deux lignes, et
+        chaque instant d'une ressource de `hold_timelines` (cf.
+        `new_timeline`) occupé par au moins deux lignes, coûte en plus
+        `hold_cost`.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=1, upper_bound=1)
+        >>> a, b = pv[0], pv[1]
+        >>> w = x.new_variable(lower_bound=0, upper_bound=2)[0]
+        >>> x.add_row([a, w])
+        >>> x.add_row([b, w])
+        >>> x.add_row([a])
+        >>> x.add_row([b])
+        >>> x.set_costs([0, 0, 1, 2], bound_items=[a])
+        >>> x.optimize(), x.best_cost
+        ({0, 1}, 0.0)
+        >>> x.set_costs([0, 0, 1, 2], bound_items=[a], hold_items=[w], hold_cost=5)
+        >>> x.optimize(), x.best_cost
+        ({1, 2}, 1.0)
+        """
+        if costs is None:
+            self.costs = None
+            self.bound_items = []
+            self.hold_costs = (0.0, [], [])
+        else:
+            self.costs = np.ascontiguousarray(costs, dtype=np.double)
+            self.bound_items = list(bound_items)
+            self.hold_costs = (float(hold_cost), list(hold_items), list(hold_timelines))
+        if self.dlx is not None:
+            if self.costs is None:
+                self.dlx.set_costs(0, _nullptr, _int_vct())
+                self.dlx.set_hold_costs(0, _int_vct(), _int_vct())
+            else:
+                self._apply_hooks(self.dlx)
+
+    def optimize(self, accept: Optional[Callable[[Set[int]], bool]] = None,
+                 max_nodes: Optional[int] = None,
+                 timeout: Optional[float] = None) -> Optional[Set[int]]:
+        """ Renvoie une solution de coût minimal (cf. `set_costs`) parmi
+        celles acceptées par `accept` (toutes si `accept` vaut `None`), ou
+        `None` s'il n'y en a pas. Chaque solution acceptée abaisse la borne
+        supérieure du coût, si bien que les solutions suivantes sont
+        strictement meilleures. `status` vaut `SOLVED` si l'optimalité est
+        prouvée ; si la recherche a visité `max_nodes` noeuds, duré
+        `timeout` secondes ou été annulée, la meilleure solution trouvée est
+        renvoyée. Son coût est donné par `best_cost`.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=1, upper_bound=1)
+        >>> a, b, c = pv[0], pv[1], pv[2]
+        >>> x.add_row([a, b])
+        >>> x.add_row([c])
+        >>> x.add_row([a])
+        >>> x.add_row([b, c])
+        >>> x.add_row([b])
+        >>> x.set_costs([5, 1, 1, 2, 2], bound_items=[a])
+        >>> x.optimize(), x.best_cost, x.status
+        ({2, 3}, 3.0, <SearchStatus.SOLVED: 'solved'>)
+        >>> x.optimize(accept=lambda sol: 3 not in sol), x.best_cost
+        ({1, 2, 4}, 4.0)
+        >>> x.optimize(accept=lambda sol: 2 not in sol), x.best_cost
+        ({0, 1}, 6.0)
+        >>> x.optimize(accept=lambda sol: False), x.status
+        (None, <SearchStatus.NO_SOLUTION: 'no solution'>)
+        """
+        if self.costs is None:
+            raise ValueError("optimize : aucun coût n'a été donné (cf. set_costs)")
+        dlx = self._compiled()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        best = None
+        self.best_cost = None
+        self.resume = False
+        dlx.set_upper_bound(np.inf)
+        while True:
+            remaining_nodes = None
+            if max_nodes is not None:
+                remaining_nodes = max_nodes - (self.stats['nodes'] if self.resume else 0)
+                if remaining_nodes <= 0:
+                    self.status = SearchStatus.BUDGET_EXHAUSTED
+                    break
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 1e-6)
+            sol = self.search(max_nodes=remaining_nodes, timeout=remaining)
+            if sol is None:
+                break
+            if accept is None or accept(sol):
+                best = sol
+                self.best_cost = float(dlx.solution_cost())
+                dlx.set_upper_bound(self.best_cost)
+        dlx.set_upper_bound(np.inf)
+        if self.status == SearchStatus.NO_SOLUTION and best is not None:
+            self.status = SearchStatus.SOLVED
+        return best
+
+    def set_strategy(self, mrv: bool = False, priority: List[ConcItem] = [],
+                     keys: Dict[ConcItem, int] = {}, seed: Optional[int] = None):
+        """ Remplace la fonction de choix par la stratégie précompilée du
+        moteur : l'élément primaire à couvrir est le premier encore actif de
+        `priority`, puis celui de plus petite clé dans `keys` (les éléments
+        absents passent après les autres), puis celui ayant le moins
+        d'options, ou le plus petit degré de branchement si `mrv` est vrai.
+        Si `seed` est donné, les éléments restant ex aequo sont départagés
+        au hasard (de façon reproductible), sinon le premier est choisi.
+        Aucune compilation n'est nécessaire.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=1)
+        >>> a, b, c = pv[0], pv[1], pv[2]
+        >>> x.add_row([a, b])
+        >>> x.add_row([b, c])
+        >>> x.add_row([c])
+        >>> x.all_solutions()[:3]
+        [{0, 2}, {0}, {1}]
+        >>> x.set_strategy(priority=[c])
+        >>> x.all_solutions()[:3]
+        [{1}, {0, 2}, {2}]
+        >>> x.set_strategy(keys={b: 0, c: 1})
+        >>> x.all_solutions()[:3]
+        [{0, 2}, {0}, {1}]
+        >>> x.set_strategy(mrv=True)
+        >>> len(x.all_solutions())
+        5
+        >>> x.set_strategy(seed=3)
+        >>> sorted(map(sorted, x.all_solutions()))
+        [[], [0], [0, 2], [1], [2]]
+        """
+        self.choose = None
+        self.strategy = (mrv, list(priority), dict(keys), seed)
+        if self.dlx is not None:
+            self._apply_strategy(self.dlx)
+
+    def all_solutions(self, verbose: bool = False, workers: int = 1,
+                      split_depth: int = 3) -> List[Set[int]]:
         """ Renvoie toutes les solutions à l'instance de exact cover avec
         multiplicité.
 
+        Si `workers` est supérieur à 1, l'arbre de recherche est découpé au
+        niveau `split_depth` et les sous-arbres obtenus sont répartis entre
+        `workers` threads. Les solutions sont renvoyées dans le même ordre
+        que pour la recherche séquentielle, sauf avec le départage aléatoire
+        de `set_strategy` : ce sont alors les mêmes dans un autre ordre.
+
         >>> x = DLXM()
         >>> pv = x.new_variable(lower_bound=0, upper_bound=3)
         >>> a = pv[0]
@@ -320,75 +1014,551 @@ class DLXM():
         >>> x.add_row([C], [(Y, 1)])
         >>> x.all_solutions()
         [{1, 3, 4}]
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
+        >>> a, b = pv[0], pv[1]
+        >>> for k in range(6):
+        ...     x.add_row([a, b] if k % 2 == 0 else [a])
+        >>> sols = x.all_solutions()
+        >>> len(sols)
+        22
+        >>> all(x.all_solutions(workers=w, split_depth=d) == sols
+        ...     for w in (2, 3, 4) for d in (0, 1, 2))
+        True
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
+        >>> for row in ([0, 1], [2, 3], [1, 4], [0, 2, 3], [4], [1, 3], [0, 4, 2], [3]):
+        ...     x.add_row([pv[k] for k in row])
+        >>> x.set_strategy(seed=5)
+        >>> sols = sorted(map(sorted, x.all_solutions()))
+        >>> len(sols)
+        128
+        >>> all(sorted(map(sorted, x.all_solutions(workers=w, split_depth=d))) == sols
+        ...     for w in (2, 3) for d in (1, 2, 3))
+        True
         """
-        primary_items: List[Tuple[ConcItem, int, int]] = []
-        secondary_items: List[ConcItem] = []
+        if workers > 1 and self.propagator is not None:
+            raise ValueError("all_solutions : la recherche parallèle ne "
+                             "supporte pas les propagateurs")
+        dlx = self._compiled()
+        self.resume = False
+        if workers > 1:
+            sols = dlx.all_solutions_parallel(workers, split_depth, verbose)
+        else:
+            sols = dlx.all_solutions(verbose)
+        self.status = _STATUS[int(dlx.status())]
+        return [set(sol) for sol in sols]
 
-        x: DLXMVariable
-        for x in self.variables:
-            if x.secondary:
-                for k in x:
-                    secondary_items.append(x[k])
-            else:
-                for k in x:
-                    primary_items.append((x[k], x.lower_bound, x.upper_bound))
+    def iter_solutions(self) -> Iterator[Set[int]]:
+        """ Renvoie un itérateur sur les solutions de l'instance, dans le
+        même ordre que `all_solutions`. Chaque solution est produite dès
+        qu'elle est trouvée et aucune n'est conservée.
 
-        primary = _P(primary_items)
-        secondary = _S(secondary_items)
-        rows = _R([])
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=3)
+        >>> a = pv[0]
+        >>> for k in range(3):
+        ...     x.add_row([a])
+        >>> it = x.iter_solutions()
+        >>> next(it)
+        {0, 1, 2}
+        >>> list(it) == x.all_solutions()[1:]
+        True
+        """
+        dlx = self._new_dlx()
+        try:
+            sol = dlx.search(False)
+            while True:
+                yield set(sol)
+                sol = dlx.search(True)
+        except _NoSolution:
+            return
 
-        dlx = _DLX(primary, secondary, rows, self.choose) \
-            if self.choose is not None else _DLX(primary, secondary, rows)
-        for p, s in self.rows_cpp:
-            dlx.add_row(p, s)
-        sols = dlx.all_solutions(verbose)
-        return [set(sol) for sol in sols]
+    def count_solutions(self) -> int:
+        """ Renvoie le nombre de solutions de l'instance sans les stocker.
 
-    def search(self) -> Optional[Set[int]]:
-        if self.compiled_only:
-            self.compiled_only = False
-            try:
-                sol = self.dlx.search(False)
-                self.resume = True
-                return set(sol)
-            except _NoSolution:
-                return None
-        elif self.resume:
-            try:
-                sol = self.dlx.search(True)
-                return set(sol)
-            except _NoSolution:
-                return None
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
+        >>> a, b = pv[0], pv[1]
+        >>> for k in range(6):
+        ...     x.add_row([a, b] if k % 2 == 0 else [a])
+        >>> x.count_solutions()
+        22
+        """
+        self.resume = False
+        dlx = self._compiled()
+        n = dlx.count_solutions()
+        self.status = _STATUS[int(dlx.status())]
+        return n
 
-        primary_items: List[Tuple[ConcItem, int, int]] = []
-        secondary_items: List[ConcItem] = []
+    def sample_solutions(self, k: int,
+                         rng: Optional[random.Random] = None) -> List[Set[int]]:
+        """ Tire uniformément `k` solutions distinctes (ou toutes s'il y en
+        a moins de `k`) par échantillonnage par réservoir sur
+        `iter_solutions` : la mémoire utilisée ne dépend que de `k`.
 
-        x: DLXMVariable
-        for x in self.variables:
-            if x.secondary:
-                for k in x:
-                    secondary_items.append(x[k])
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
+        >>> a, b = pv[0], pv[1]
+        >>> for k in range(6):
+        ...     x.add_row([a, b] if k % 2 == 0 else [a])
+        >>> sample = x.sample_solutions(5, random.Random(0))
+        >>> len(sample), all(s in x.all_solutions() for s in sample)
+        (5, True)
+        """
+        if rng is None:
+            rng = random.Random()
+        sample: List[Set[int]] = []
+        for n, sol in enumerate(self.iter_solutions()):
+            if n < k:
+                sample.append(sol)
             else:
-                for k in x:
-                    primary_items.append((x[k], x.lower_bound, x.upper_bound))
+                j = rng.randrange(n + 1)
+                if j < k:
+                    sample[j] = sol
+        return sample
+
+    def zdd(self) -> SolutionZDD:
+        """ Construit le ZDD de toutes les solutions (cf. `zdd.build_zdd`),
+        qui permet de les compter, d'en tirer uniformément ou d'en extraire
+        une de coût minimal sans relancer la recherche. Les lignes sont
+        traitées dans leur ordre d'ajout : le diagramme reste petit si les
+        éléments n'apparaissent que dans des lignes proches. Les lignes
+        désactivées (cf. `set_rows_active`) sont ignorées. Les intervalles
+        des ressources (cf. `new_timeline`) y sont remplacés par un élément
+        par instant.
 
-        primary = _P(primary_items)
-        secondary = _S(secondary_items)
-        rows = _R([])
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=2)
+        >>> a, b = pv[0], pv[1]
+        >>> for k in range(6):
+        ...     x.add_row([a, b] if k % 2 == 0 else [a])
+        >>> z = x.zdd()
+        >>> z.count(), sorted(map(sorted, z)) == sorted(map(sorted, x.all_solutions()))
+        (22, True)
+        >>> z.min_cost([3, 1, 3, 1, 3, 2])
+        (0.0, set())
+        >>> all(s in x.all_solutions() for s in z.sample(5, seed=0))
+        True
+        """
+        active = [i for i in range(len(self.rows)) if i not in self.inactive_rows]
+        rows = [self._zdd_row(i) for i in active]
+        bounds = self._zdd_bounds()
+        if len(self.timelines) > 0:
+            for i, (p, _) in zip(active, rows):
+                p.extend(("timeline", k, t) for k, a, b in self.rows.intervals(i)
+                         for t in range(a, b + 1))
+            bounds.update((("timeline", k, t), (0, capacity))
+                          for k, (capacity, length) in enumerate(self.timelines)
+                          for t in range(length))
+        z = build_zdd([p for p, _ in rows], [s for _, s in rows], bounds)
+        # numéros des lignes dans l'instance complète
+        z.row = z.row[:2] + [active[r] for r in z.row[2:]]
+        return z
+
+    def _zdd_row(self, i: int) -> Tuple[List[Hashable], List[Tuple[Hashable, int]]]:
+        p, s = self.rows[i]
+        return [id(e) for e in p], [(id(e), int(c)) for (e, c) in s]
+
+    def _zdd_bounds(self) -> Dict[Hashable, Tuple[int, int]]:
+        return {id(x[k]): (x.lower_bound, x.upper_bound)
+                for x in self.variables if not x.secondary for k in x}
+
+    @property
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """ Statistiques de la dernière recherche : nombre de noeuds
+        visités, de solutions trouvées, de mises à jour de liens (`mems`), de
+        lignes rejetées par le propagateur ou faute de capacité (`pruned`, cf.
+        `set_propagator` et `new_timeline`),
+        profondeur maximale, histogramme des degrés de branchement par
+        niveau (`degrees[l][d]`) et temps avant la première solution (en
+        secondes, -1 si aucune).
 
-        dlx = _DLX(primary, secondary, rows, self.choose) \
-            if self.choose is not None else _DLX(primary, secondary, rows)
-        for p, s in self.rows_cpp:
-            dlx.add_row(p, s)
+        >>> x = DLXM()
+        >>> pv = x.new_variable(1, 1)
+        >>> sv = x.new_variable(secondary=True)
+        >>> p, q, r = pv[0], pv[1], pv[2]
+        >>> a, b = sv[0], sv[1]
+        >>> x.add_row([p, q], [(a, 0), (b, 1)])
+        >>> x.add_row([p, r], [(a, 1), (b, 0)])
+        >>> x.add_row([p], [(a, 2)])
+        >>> x.add_row([q], [(a, 1)])
+        >>> x.add_row([r], [(b, 1)])
+        >>> x.stats is None
+        True
+        >>> x.all_solutions()
+        [{0, 4}, {1, 3}]
+        >>> s = x.stats
+        >>> s['nodes'], s['solutions'], s['mems'], s['max_depth'], s['degrees']
+        (5, 2, 76, 2, [[0, 0, 1], [0, 2]])
+        >>> s['first_solution_time'] >= 0
+        True
+        """
+        if self.last_dlx is None:
+            return None
+        s = self.last_dlx.stats()
+        return {
+            'nodes': s.nodes,
+            'solutions': s.solutions,
+            'mems': s.mems,
+            'pruned': s.pruned,
+            'max_depth': s.max_depth,
+            'degrees': [list(d) for d in s.degrees],
+            'first_solution_time': s.first_solution_time
+        }
+
+    def search(self, max_nodes: Optional[int] = None,
+               timeout: Optional[float] = None) -> Optional[Set[int]]:
+        """ Renvoie la solution suivant celle renvoyée par l'appel précédent
+        (la première solution lors du premier appel ou après `reset`), ou
+        `None` si aucune n'a été trouvée. La raison est alors donnée par
+        `status` : s'il n'y a plus de solution, la recherche reprend ensuite
+        depuis le début ; si elle a visité `max_nodes` noeuds, duré `timeout`
+        secondes ou été annulée par `cancel`, le prochain appel la poursuit
+        là où elle s'est arrêtée. Le GIL est relâché pendant la recherche.
 
-        try:
-            sol = dlx.search(False)
-            self.dlx = dlx
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=3)
+        >>> a = pv[0]
+        >>> for k in range(3):
+        ...     x.add_row([a])
+        >>> x.search(max_nodes=1), x.status
+        (None, <SearchStatus.BUDGET_EXHAUSTED: 'budget exhausted'>)
+        >>> x.search(), x.status
+        ({0, 1, 2}, <SearchStatus.SOLVED: 'solved'>)
+        >>> x.search(timeout=10.0)
+        {0, 1}
+        >>> len([x.search() for k in range(6)]), x.search(), x.status
+        (6, None, <SearchStatus.NO_SOLUTION: 'no solution'>)
+        """
+        dlx = self._compiled()
+        status = _STATUS[int(dlx.search_within(self.resume, max_nodes or 0,
+                                               timeout or 0))]
+        self.status = status
+        if status == SearchStatus.SOLVED:
             self.resume = True
+            return set(dlx.solution())
+        self.resume = status != SearchStatus.NO_SOLUTION
+        return None
 
-            return set(sol)
-        except _NoSolution:
-            return None
+    def search_with_restarts(self, seed: int,
+                             accept: Optional[Callable[[Set[int]], bool]] = None,
+                             schedule: str = 'luby', base_nodes: int = 1000,
+                             factor: float = 2.0,
+                             timeout: Optional[float] = None) -> Optional[Set[int]]:
+        """ Cherche une solution acceptée par `accept` (n'importe laquelle si
+        `accept` vaut `None`) par une suite de recherches aléatoires de plus
+        en plus longues. Avant chaque recherche, l'ordre des options est
+        mélangé et les éléments ex aequo sont départagés au hasard ; la
+        recherche numéro r visite au plus `base_nodes` fois le r-ième terme
+        de la suite de Luby (1, 1, 2, 1, 1, 2, 4, ...) si `schedule` vaut
+        `'luby'`, ou `base_nodes * factor ** (r - 1)` noeuds si `schedule`
+        vaut `'geometric'`. Le résultat ne dépend que de `seed` (et de
+        `timeout`, s'il est atteint). Renvoie `None` si l'arbre de recherche
+        a été entièrement parcouru sans trouver de solution acceptée, si
+        `timeout` secondes se sont écoulées ou si la recherche a été annulée
+        (cf. `status`). Les recherches suivantes ne sont pas modifiées par
+        le mélange des options ni par le départage aléatoire.
+
+        >>> x = DLXM()
+        >>> pv = x.new_variable(lower_bound=0, upper_bound=3)
+        >>> a = pv[0]
+        >>> for k in range(6):
+        ...     x.add_row([a])
+        >>> sol = x.search_with_restarts(7, accept=lambda s: len(s) == 2,
+        ...                              base_nodes=2)
+        >>> len(sol), x.search_with_restarts(7, lambda s: len(s) == 2, base_nodes=2) == sol
+        (2, True)
+        >>> x.search_with_restarts(1, accept=lambda s: len(s) == 4), x.status
+        (None, <SearchStatus.NO_SOLUTION: 'no solution'>)
+        >>> x.all_solutions()[:3], x.strategy
+        ([{0, 1, 2}, {0, 1, 3}, {0, 1, 4}], (False, [], {}, None))
+        """
+        if schedule not in ('luby', 'geometric'):
+            raise ValueError("schedule doit valoir 'luby' ou 'geometric'")
+        # les recherches se font sur une copie de la structure compilée, qui
+        # garde l'ordre des options et la stratégie de `set_strategy`
+        compiled = self._compiled()
+        dlx = self.dlx = self._new_dlx()
+        try:
+            rng = random.Random(seed)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            run = 0
+            while True:
+                run += 1
+                if schedule == 'luby':
+                    budget = base_nodes * _luby(run)
+                else:
+                    budget = int(base_nodes * factor ** (run - 1))
+                dlx.set_seed(rng.getrandbits(63))
+                dlx.shuffle_options()
+                self.resume = False
+                used = 0
+                while True:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = max(deadline - time.monotonic(), 1e-6)
+                    sol = self.search(max_nodes=max(budget - used, 1), timeout=remaining)
+                    if sol is not None and (accept is None or accept(sol)):
+                        return sol
+                    if self.status in (SearchStatus.NO_SOLUTION, SearchStatus.CANCELLED):
+                        return None
+                    if deadline is not None and time.monotonic() >= deadline:
+                        self.status = SearchStatus.BUDGET_EXHAUSTED
+                        return None
+                    used = self.stats['nodes']
+                    if self.status == SearchStatus.BUDGET_EXHAUSTED or used >= budget:
+                        break
+        finally:
+            self.dlx = compiled
+            self.resume = False
+
+    def cancel(self):
+        """ Interrompt la recherche (`search`, `all_solutions` ou
+        `count_solutions`) en cours sur la structure compilée. Cette méthode
+        est destinée à être appelée depuis un autre thread. """
+        if self.dlx is not None:
+            self.dlx.cancel()
+
+
+def _luby(i: int) -> int:
+    """ Renvoie le i-ème terme (i >= 1) de la suite de Luby.
+
+    >>> [_luby(i) for i in range(1, 16)]
+    [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8]
+    """
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+class IntDLXM(DLXM):
+    """ Instance de exact cover avec multiplicités dont les éléments sont des
+    entiers : les éléments primaires sont 0, ..., len(low) - 1, l'élément k
+    devant être couvert entre low[k] et high[k] fois, et les éléments
+    secondaires sont 0, ..., nb_secondary - 1. Aucun objet Python n'est
+    associé aux éléments, la construction de la structure C++ ne fait donc
+    aucun appel vers Python et l'instance peut être sérialisée avec `pickle`
+    (par exemple pour être envoyée à d'autres processus). Si elles sont
+    données, les listes `primary_objs` et `secondary_objs` sont utilisées
+    par `row_obj` pour retrouver les objets correspondant aux éléments.
+
+    >>> x = IntDLXM([1, 1, 1], [1, 1, 1], 2)
+    >>> x.add_row([0, 1], [(0, 0), (1, 1)])
+    >>> x.add_row([0, 2], [(0, 1), (1, 0)])
+    >>> x.add_rows([0, 1, 2, 3], [0, 1, 2], [0, 1, 2, 3], [0, 0, 1], [2, 1, 1])
+    >>> x.row_repr(2), x.row_repr(3)
+    ([0, (0, 2)], [1, (0, 1)])
+    >>> x.all_solutions()
+    [{0, 4}, {1, 3}]
+    >>> import pickle
+    >>> y = pickle.loads(pickle.dumps(x))
+    >>> y.all_solutions(), y.count_solutions()
+    ([{0, 4}, {1, 3}], 2)
+    >>> y.set_strategy(priority=[2])
+    >>> y.search()
+    {1, 3}
+    >>> z = IntDLXM([1], [2], primary_objs=['a'])
+    >>> z.add_row([0])
+    >>> z.add_row([0])
+    >>> z.row_obj(1), z.all_solutions()
+    (['a'], [{0, 1}, {0}, {1}])
+    """
+
+    def __init__(self, low: Iterable[int], high: Iterable[int],
+                 nb_secondary: int = 0,
+                 primary_objs: Optional[Sequence[Any]] = None,
+                 secondary_objs: Optional[Sequence[Any]] = None,
+                 choose=None):
+        super().__init__(choose)
+        self.low = np.ascontiguousarray(low, dtype=_INT_DTYPE)
+        self.high = np.ascontiguousarray(high, dtype=_INT_DTYPE)
+        if len(self.low) != len(self.high):
+            raise ValueError("low et high doivent avoir la même taille")
+        self.nb_secondary = nb_secondary
+        self.primary_objs = primary_objs
+        self.secondary_objs = secondary_objs
+        self.inactive_items: Set[int] = set()
+
+    def __getstate__(self):
+        # la structure C++ et le générateur de noms ne sont pas sérialisables
+        state = self.__dict__.copy()
+        state.update(new_id=None, dlx=None, last_dlx=None,
+                     resume=False, compiled_size=None)
+        return state
+
+    def new_variable(self, lower_bound: int = 0, upper_bound: int = 1,
+                     secondary: bool = False) -> DLXMVariable:
+        raise TypeError("les éléments d'une instance IntDLXM sont fixés à sa création")
+
+    def add_row(self, row_primary: List[int] = [],
+                row_secondary: List[Tuple[int, int]] = [],
+                intervals: Sequence[Tuple[int, int, int]] = ()):
+        super().add_row(list(row_primary), list(row_secondary), intervals)
+
+    def add_rows(self, indptr, indices, sec_indptr=None,
+                 sec_indices=None, sec_colors=None, intervals=None):
+        """ Ajoute plusieurs lignes au format CSR, comme `DLXM.add_rows`, les
+        éléments étant directement donnés par leurs numéros. """
+        super().add_rows(range(len(self.low)), indptr, indices,
+                         range(self.nb_secondary), sec_indptr,
+                         sec_indices, sec_colors, intervals)
+
+    def row_repr(self, i: int) -> List[Union[Any, Tuple[Any, int]]]:
+        p, s = self.rows[i]
+        return [int(e) for e in p] + [(int(e), c) for (e, c) in s]
+
+    def row_obj(self, i: int) -> List[Union[Any, Tuple[Any, int]]]:
+        p, s = self.rows[i]
+        pobj = self.primary_objs if self.primary_objs is not None else range(len(self.low))
+        sobj = self.secondary_objs if self.secondary_objs is not None else range(self.nb_secondary)
+        return [pobj[e] for e in p] + [(sobj[e], c) for (e, c) in s]
+
+    def _new_dlx(self):
+        n = len(self.low)
+        low = self.low if n > 0 else _nullptr
+        high = self.high if n > 0 else _nullptr
+        dlx = _DLX(n, low, high, self.nb_secondary, self.choose) \
+            if self.choose is not None else _DLX(n, low, high, self.nb_secondary)
+        self._load_timelines(dlx)
+        self._load_rows(dlx, None, None)
+        self._apply_patches(dlx)
+        if self.choose is None:
+            self._apply_strategy(dlx)
+        self._apply_hooks(dlx)
+
+        self.last_dlx = dlx
+        return dlx
+
+    def set_item(self, k: int, low: int, high: int, active: bool = True,
+                 obj: Any = None):
+        """ Change les bornes de l'élément primaire `k` et, si `obj` est
+        donné, l'objet qui lui est associé (cf. `row_obj`). Si `active` est
+        faux, l'élément est retiré de la liste des éléments à couvrir : il
+        ne doit alors apparaître dans aucune ligne active. Comme pour
+        `set_rows_active`, la structure compilée est modifiée sur place, ce
+        qui permet de réutiliser les éléments d'une instance qu'on modifie.
+
+        >>> x = IntDLXM([1, 1], [1, 1], primary_objs=['a', 'b'])
+        >>> x.add_row([0])
+        >>> x.add_row([1])
+        >>> x.all_solutions()
+        [{0, 1}]
+        >>> x.set_rows_active([1], False)
+        >>> x.all_solutions()
+        []
+        >>> x.set_item(1, 0, 1, active=False)
+        >>> x.all_solutions()
+        [{0}]
+        >>> x.set_item(1, 1, 2, obj='c')
+        >>> x.add_row([1])
+        >>> x.all_solutions(), x.row_obj(2)
+        ([{0, 2}], ['c'])
+        """
+        self.low[k] = low
+        self.high[k] = high
+        if obj is not None and self.primary_objs is not None:
+            self.primary_objs[k] = obj  # type: ignore
+        if active:
+            self.inactive_items.discard(k)
+        else:
+            self.inactive_items.add(k)
+        if self.dlx is not None:
+            self.dlx.set_item(k, low, high, active)
+        self.resume = False
+
+    def _row_indexes(self) -> Tuple[Optional[Dict[int, int]], Optional[Dict[int, int]]]:
+        return None, None
+
+    def _apply_patches(self, dlx):
+        super()._apply_patches(dlx)
+        for k in self.inactive_items:
+            dlx.set_item(k, int(self.low[k]), int(self.high[k]), False)
+
+    def _zdd_row(self, i: int) -> Tuple[List[Hashable], List[Tuple[Hashable, int]]]:
+        p, s = self.rows[i]
+        return [int(e) for e in p], [(int(e), int(c)) for (e, c) in s]
+
+    def _zdd_bounds(self) -> Dict[Hashable, Tuple[int, int]]:
+        return {k: (int(self.low[k]), int(self.high[k])) for k in range(len(self.low))}
+
+    def _item_id(self, item: int) -> int:
+        return item + 1
+
+    def _nb_items(self) -> int:
+        return len(self.low) + self.nb_secondary
+
+
+def read_instance(lines: Iterable[str], verbose: bool = False) -> DLXM:
+    """ Construit une instance à partir d'une description au format des
+    fichiers `tests/*.dlx` : une première ligne donnant les éléments
+    primaires (`bas:haut|nom` ou `nom`) puis, après `|`, les éléments
+    secondaires, suivie d'une ligne par option (`nom` ou `nom:couleur`).
+
+    >>> x = read_instance(["0:1|a 1:1|b | c", "a b c:1", "b c:2"])
+    >>> x.row_obj(0), x.row_obj(1)
+    (['a', 'b', ('c', 1)], ['b', ('c', 2)])
+    >>> x.all_solutions()
+    [{0}, {1}]
+    """
+    it = iter(lines)
+    vars_line = next(it)
+    primary_mode = True
+    primary_vars = []
+    secondary_vars = []
+    for p in vars_line.split():
+        if p == "|":
+            primary_mode = False
+        elif primary_mode:
+            d = p.split('|')
+            if len(d) == 1:
+                primary_vars.append((d[0], 1, 1))
+            elif len(d) == 2:
+                b = d[0].split(':')
+                if len(b) == 2:
+                    primary_vars.append((d[1], int(b[0]), int(b[1])))
+                else:
+                    raise SyntaxError('syntax error on bounds')
+            else:
+                raise SyntaxError('syntax error in primary items')
+        else:
+            secondary_vars.append(p)
+    if verbose:
+        print("primary :", primary_vars)
+        print("secondary :", secondary_vars)
+
+    dlx = DLXM()
+    d_primary = {}
+    vars_primary = {}
+    for (v, l, h) in primary_vars:
+        if (l, h) not in d_primary:
+            d_primary[(l, h)] = dlx.new_variable(l, h)
+    vars_secondary = dlx.new_variable(secondary=True)
+
+    for (v, l, h) in primary_vars:
+        vars_primary[v] = d_primary[(l, h)][v]
+
+    for line in it:
+        if line.strip() == "" or line.strip()[0] == "#":
+            continue
+        row_primary = []
+        row_secondary = []
+        for v in line.split():
+            if v in vars_primary:
+                row_primary.append(vars_primary[v])
+            else:
+                s = v.split(':')
+                if len(s) == 2:
+                    row_secondary.append((vars_secondary[s[0]], int(s[1])))
+                else:
+                    raise SyntaxError('syntax error on secondary item on line ' + line)
+        dlx.add_row(row_primary, row_secondary)
+
+    return dlx
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 #include "dlx_m.hpp"
 #include <iostream>
 #include <string>
+#include <algorithm>
 
 using namespace std;
 using namespace DLX_M;
@@ -212,6 +213,504 @@ void test9() {
     cout << "c : " << c->get_id() << endl;
 }
 
+void test10() {
+    Conc *p = new Conc("p");
+    Conc *q = new Conc("q");
+    Conc *r = new Conc("r");
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(p, 0, 2), 
+        make_tuple(q, 1, 1), 
+        make_tuple(r, 0, 1)
+    };
+    vector<AbstrItem*> secondary = {x, y};
+
+    DLX dlx(primary, secondary, {});
+    dlx.add_row({p, q}, {make_tuple(x, EMPTY_COLOR), make_tuple(y, 1)});
+    dlx.add_row({p, r}, {make_tuple(x, 1), make_tuple(y, EMPTY_COLOR)});
+    dlx.add_row({p}, {make_tuple(x, 2)});
+    dlx.add_row({q}, {make_tuple(x, 1)});
+    dlx.add_row({r}, {make_tuple(y, 1)});
+    dlx.add_row({p, q}, {});
+    dlx.add_row({p}, {});
+
+    vector<vector<INT>> seq = dlx.all_solutions(false);
+    for (INT depth = 0; depth <= 3; depth++)
+        for (INT workers = 1; workers <= 4; workers++)
+            if (dlx.all_solutions_parallel(workers, depth) != seq)
+                cout << "Different solutions with " << workers 
+                     << " workers split at depth " << depth << endl;
+
+    dlx.all_solutions_parallel(3, 1, true);
+}
+
+void test11() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+
+    cout << dlx.all_solutions().size() << " solutions, "
+         << dlx.count_solutions() << " counted" << endl;
+}
+
+void test12() {
+    Conc *p = new Conc("p");
+    Conc *q = new Conc("q");
+    Conc *r = new Conc("r");
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(p, 1, 1), 
+        make_tuple(q, 1, 1), 
+        make_tuple(r, 1, 1)
+    };
+    vector<AbstrItem*> secondary = {x, y};
+
+    DLX dlx(primary, secondary, {});
+    dlx.add_row({p, q}, {make_tuple(x, EMPTY_COLOR), make_tuple(y, 1)});
+    dlx.add_row({p, r}, {make_tuple(x, 1), make_tuple(y, EMPTY_COLOR)});
+    dlx.add_row({p}, {make_tuple(x, 2)});
+    dlx.add_row({q}, {make_tuple(x, 1)});
+    dlx.add_row({r}, {make_tuple(y, 1)});
+
+    dlx.all_solutions();
+    Stats stats = dlx.stats();
+    cout << stats.nodes << " nodes, "
+         << stats.solutions << " solutions, "
+         << stats.mems << " mems, "
+         << "max depth " << stats.max_depth << endl;
+    for (size_t l = 0; l < stats.degrees.size(); l++) {
+        cout << "level " << l << " :";
+        for (auto& n : stats.degrees[l])
+            cout << " " << n;
+        cout << endl;
+    }
+}
+
+void test13() {
+    Conc *a = new Conc("a");
+    Conc *b = new Conc("b");
+    Conc *c = new Conc("c");
+    Conc *d = new Conc("d");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(a, 0, 2),
+        make_tuple(b, 1, 1),
+        make_tuple(c, 1, 1),
+        make_tuple(d, 0, 1)
+    };
+
+    DLX dlx(primary, {}, {});
+    dlx.add_row({a, b}, {});
+    dlx.add_row({a, c}, {});
+    dlx.add_row({b, d}, {});
+    dlx.add_row({c, d}, {});
+    dlx.add_row({a}, {});
+    dlx.add_row({b}, {});
+    dlx.add_row({c}, {});
+
+    vector<vector<INT>> sols = dlx.all_solutions();
+    cout << "MinLength : " << sols.size() << " solutions, "
+         << dlx.stats().nodes << " nodes" << endl;
+
+    dlx.set_strategy(MRV);
+    cout << "MRV : " << dlx.all_solutions().size() << " solutions, "
+         << dlx.stats().nodes << " nodes" << endl;
+
+    dlx.set_priority({3, 1});
+    dlx.print_solution(dlx.all_solutions()[0]);
+
+    dlx.set_priority({});
+    dlx.set_keys({0, 4, 3, 2, 1});
+    dlx.print_solution(dlx.all_solutions()[0]);
+}
+
+void test14() {
+    Conc *p = new Conc("p");
+    Conc *q = new Conc("q");
+    Conc *r = new Conc("r");
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(p, 1, 1), 
+        make_tuple(q, 1, 1), 
+        make_tuple(r, 1, 1)
+    };
+    vector<AbstrItem*> secondary = {x, y};
+
+    // mêmes lignes que test1, au format CSR
+    INT indptr[] = {0, 2, 4, 5, 6, 7};
+    INT indices[] = {0, 1, 0, 2, 0, 1, 2};
+    INT sec_indptr[] = {0, 2, 4, 5, 6, 7};
+    INT sec_indices[] = {0, 1, 0, 1, 0, 0, 1};
+    COLOR sec_colors[] = {EMPTY_COLOR, 1, 1, EMPTY_COLOR, 2, 1, 1};
+
+    DLX dlx(primary, secondary, {});
+    dlx.add_rows(5, indptr, indices, sec_indptr, sec_indices, sec_colors);
+    for (auto& sol : dlx.all_solutions())
+        dlx.print_solution(sol);
+}
+
+void test15() {
+    // instance de test14, avec des éléments sans nom
+    INT low[] = {1, 1, 1};
+    INT high[] = {1, 1, 1};
+    INT indptr[] = {0, 2, 4, 5, 6, 7};
+    INT indices[] = {0, 1, 0, 2, 0, 1, 2};
+    INT sec_indptr[] = {0, 2, 4, 5, 6, 7};
+    INT sec_indices[] = {0, 1, 0, 1, 0, 0, 1};
+    COLOR sec_colors[] = {EMPTY_COLOR, 1, 1, EMPTY_COLOR, 2, 1, 1};
+
+    DLX dlx(3, low, high, 2);
+    dlx.add_rows(5, indptr, indices, sec_indptr, sec_indices, sec_colors);
+    for (auto& sol : dlx.all_solutions())
+        dlx.print_solution(sol);
+}
+
+void test16() {
+    Conc *a = new Conc("a");
+    Conc *b = new Conc("b");
+    Conc *c = new Conc("c");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(a, 0, 2),
+        make_tuple(b, 1, 1),
+        make_tuple(c, 1, 1)
+    };
+
+    DLX dlx(primary, {}, {});
+    dlx.add_row({a, b}, {});
+    dlx.add_row({a, c}, {});
+    dlx.add_row({b}, {});
+    dlx.add_row({c}, {});
+
+    // recherches interrompues puis reprises depuis le début
+    dlx.print_solution(dlx.search(false));
+    dlx.print_solution(dlx.search(true));
+    dlx.print_solution(dlx.search(false));
+    dlx.search(true);
+    dlx.reset();
+    cout << dlx.all_solutions().size() << " solutions" << endl;
+    dlx.search(false);
+    dlx.add_row({a}, {});
+    cout << dlx.all_solutions().size() << " solutions" << endl;
+}
+
+void test17() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+
+    // recherche par tranches de 2 noeuds
+    int solutions = 0, interruptions = 0;
+    Status status = dlx.search_within(false, 2, 0);
+    while (status != NoMoreSolutions) {
+        if (status == Solved) solutions++;
+        else interruptions++;
+        status = dlx.search_within(true, 2, 0);
+    }
+    cout << solutions << " solutions, " << interruptions << " interruptions, "
+         << dlx.stats().nodes << " nodes" << endl;
+}
+
+void test18() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+    DLX copy(dlx);
+
+    vector<vector<INT>> sols = dlx.all_solutions();
+    for (auto& sol : sols) sort(sol.begin(), sol.end());
+    sort(sols.begin(), sols.end());
+
+    // options mélangées : mêmes solutions, dans un autre ordre
+    dlx.set_seed(42);
+    dlx.shuffle_options();
+    vector<vector<INT>> shuffled = dlx.all_solutions();
+    copy.set_seed(42);
+    copy.shuffle_options();
+    bool same_order = copy.all_solutions() == shuffled;
+    for (auto& sol : shuffled) sort(sol.begin(), sol.end());
+    sort(shuffled.begin(), shuffled.end());
+    cout << shuffled.size() << " solutions, "
+         << (shuffled == sols ? "same" : "different") << " solutions, "
+         << (same_order ? "same" : "different") << " order with the same seed"
+         << endl;
+}
+
+void test19() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+
+    // solutions sans les lignes 0 et 1 ensemble
+    int expected = 0;
+    for (auto& sol : dlx.all_solutions())
+        if (find(sol.begin(), sol.end(), 0) == sol.end()
+                || find(sol.begin(), sol.end(), 1) == sol.end())
+            expected++;
+
+    // même contrainte vérifiée pendant la recherche
+    vector<INT> chosen;
+    dlx.set_propagator([&chosen](INT row, INT k) {
+        chosen.resize(k);
+        for (auto& r : chosen)
+            if ((r == 0 && row == 1) || (r == 1 && row == 0))
+                return false;
+        chosen.push_back(row);
+        return true;
+    });
+    int solutions = dlx.all_solutions().size();
+    cout << solutions << " solutions, " << expected << " expected, "
+         << dlx.stats().pruned << " pruned" << endl;
+}
+
+void test20() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+    double costs[] = {5, 1, 4, 2, 3, 1, 6, 2};
+
+    // coût minimal parmi toutes les solutions
+    double expected = INFINITY;
+    for (auto& sol : dlx.all_solutions()) {
+        double c = 0;
+        for (auto& r : sol) c += costs[r];
+        expected = min(expected, c);
+    }
+
+    // séparation et évaluation : la borne est abaissée à chaque solution
+    dlx.set_costs(8, costs, {2});
+    int improvements = 0;
+    double best = INFINITY;
+    Status status = dlx.search_within(false, 0, 0);
+    while (status == Solved) {
+        double c = 0;
+        for (auto& r : dlx.solution()) c += costs[r];
+        improvements++;
+        best = c;
+        dlx.set_upper_bound(best);
+        status = dlx.search_within(true, 0, 0);
+    }
+    cout << "cost " << best << ", " << expected << " expected, "
+         << improvements << " improvements, " << dlx.stats().nodes
+         << " nodes" << endl;
+}
+
+void test21() {
+    Conc *x = new Conc("x");
+    Conc *y = new Conc("y");
+    Conc *z = new Conc("z");
+
+    vector<tuple<AbstrItem*, INT, INT>> primary = {
+        make_tuple(x, 0, 3),
+        make_tuple(y, 1, 2),
+        make_tuple(z, 1, 1)
+    };
+
+    DLX dlx(primary, {}, {});
+    for (int k = 0; k < 8; k++)
+        if (k % 2 == 0) dlx.add_row({x, y}, {});
+        else dlx.add_row({x}, {});
+    vector<vector<INT>> sols = dlx.all_solutions();
+
+    // z n'a pas de ligne : on le retire, puis on retire et remet des lignes
+    dlx.set_item(2, 0, 1, false);
+    int with_z_removed = dlx.all_solutions().size();
+    dlx.set_row_active(2, false);
+    dlx.set_row_active(5, false);
+    int without_rows = 0;
+    for (auto& sol : dlx.all_solutions())
+        if (find(sol.begin(), sol.end(), 2) != sol.end()
+                || find(sol.begin(), sol.end(), 5) != sol.end())
+            without_rows = -1;
+        else if (without_rows >= 0)
+            without_rows++;
+    dlx.set_row_active(5, true);
+    dlx.set_row_active(2, true);
+    dlx.set_item(2, 1, 1, true);
+    bool restored = dlx.all_solutions() == sols;
+    dlx.set_item(2, 0, 1, false);
+    cout << sols.size() << " solutions, " << with_z_removed
+         << " without z, " << without_rows << " without rows 2 and 5, "
+         << (restored ? "same" : "different") << " solutions when restored, "
+         << dlx.all_solutions().size() << " without z again" << endl;
+}
+
+void test22() {
+    // trois tâches de durée 2, à placer sur les instants 0 à 3, au plus deux
+    // à la fois : avec un élément par instant, puis avec une ressource
+    INT low[] = {1, 1, 1, 0, 0, 0, 0};
+    INT high[] = {1, 1, 1, 2, 2, 2, 2};
+    INT indptr[10], indices[27], no_secondary[10] = {0};
+    INT iv_indptr[10], iv_timelines[9], iv_first[9], iv_last[9];
+    INT n = 0;
+    indptr[0] = iv_indptr[0] = 0;
+    for (INT r = 0; r < 9; r++) {
+        INT task = r / 3, start = r % 3;
+        indices[n++] = task;
+        indices[n++] = 3 + start;
+        indices[n++] = 4 + start;
+        indptr[r + 1] = n;
+        iv_indptr[r + 1] = r + 1;
+        iv_timelines[r] = 0;
+        iv_first[r] = start;
+        iv_last[r] = start + 1;
+    }
+    INT tasks[10];
+    for (INT r = 0; r < 9; r++) tasks[r] = r / 3;
+    INT task_indptr[10];
+    for (INT r = 0; r <= 9; r++) task_indptr[r] = r;
+
+    DLX items(7, low, high, 0);
+    items.add_rows(9, indptr, indices, no_secondary, nullptr, nullptr);
+    DLX timeline(3, low, high, 0);
+    INT t = timeline.add_timeline(2, 4);
+    timeline.add_rows(9, task_indptr, tasks, no_secondary, nullptr, nullptr,
+                      iv_indptr, iv_timelines, iv_first, iv_last);
+    // les solutions ne sont pas trouvées dans le même ordre
+    auto sorted_solutions = [](DLX& dlx) {
+        vector<vector<INT>> sols = dlx.all_solutions();
+        for (auto& sol : sols) sort(sol.begin(), sol.end());
+        sort(sols.begin(), sols.end());
+        return sols;
+    };
+    vector<vector<INT>> expected = sorted_solutions(items);
+    bool same = sorted_solutions(timeline) == expected;
+
+    // une recherche interrompue laisse des intervalles occupés, que reset
+    // libère
+    timeline.search_within(false, 3, 0);
+    bool same_after_reset = sorted_solutions(timeline) == expected;
+    cout << "timeline " << t << ", " << expected.size() << " solutions, "
+         << (same ? "same" : "different") << " solutions, "
+         << (same_after_reset ? "same" : "different") << " after an interrupted search, "
+         << timeline.stats().pruned << " options rejected" << endl;
+}
+
+void test23() {
+    // trois tâches de durée 2, à placer sur les instants 0 à 4, au plus deux
+    // à la fois, avec un coût par ligne et un coût de 10 pour chaque instant
+    // occupé par deux tâches : avec un élément par instant, puis avec une
+    // ressource
+    INT low[] = {1, 1, 1, 0, 0, 0, 0, 0};
+    INT high[] = {1, 1, 1, 2, 2, 2, 2, 2};
+    INT indptr[13], indices[36], no_secondary[13] = {0};
+    INT iv_indptr[13], iv_timelines[12], iv_first[12], iv_last[12];
+    INT tasks[12], task_indptr[13];
+    double costs[12];
+    INT n = 0;
+    indptr[0] = iv_indptr[0] = task_indptr[0] = 0;
+    for (INT r = 0; r < 12; r++) {
+        INT task = r / 4, start = r % 4;
+        indices[n++] = task;
+        indices[n++] = 3 + start;
+        indices[n++] = 4 + start;
+        indptr[r + 1] = n;
+        tasks[r] = task;
+        task_indptr[r + 1] = iv_indptr[r + 1] = r + 1;
+        iv_timelines[r] = 0;
+        iv_first[r] = start;
+        iv_last[r] = start + 1;
+        // les lignes les moins chères se chevauchent
+        costs[r] = start == 1 ? 0 : start == 2 ? 1 : 3;
+    }
+
+    DLX items(8, low, high, 0);
+    items.add_rows(12, indptr, indices, no_secondary, nullptr, nullptr);
+    DLX timeline(3, low, high, 0);
+    timeline.add_timeline(2, 5);
+    timeline.add_rows(12, task_indptr, tasks, no_secondary, nullptr, nullptr,
+                      iv_indptr, iv_timelines, iv_first, iv_last);
+
+    // coût minimal parmi toutes les solutions, avec et sans multiplexages
+    double expected = INFINITY, rows_only = INFINITY;
+    for (auto& sol : items.all_solutions()) {
+        double c = 0;
+        INT count[5] = {0};
+        for (auto& r : sol) {
+            c += costs[r];
+            count[r % 4]++;
+            count[r % 4 + 1]++;
+        }
+        rows_only = min(rows_only, c);
+        for (INT t = 0; t < 5; t++)
+            if (count[t] >= 2) c += 10;
+        expected = min(expected, c);
+    }
+
+    auto best_cost = [](DLX& dlx) {
+        double best = INFINITY;
+        Status status = dlx.search_within(false, 0, 0);
+        while (status == Solved) {
+            best = dlx.solution_cost();
+            dlx.set_upper_bound(best);
+            status = dlx.search_within(true, 0, 0);
+        }
+        dlx.set_upper_bound(INFINITY);
+        return best;
+    };
+    items.set_costs(12, costs, {1, 2, 3});
+    double without_holds = best_cost(items);
+    items.set_hold_costs(10, {4, 5, 6, 7, 8}, {});
+    timeline.set_costs(12, costs, {1, 2, 3});
+    timeline.set_hold_costs(10, {}, {0});
+    double with_items = best_cost(items);
+    double with_timeline = best_cost(timeline);
+    cout << "cost " << with_items << ", " << with_timeline << " with a timeline, "
+         << expected << " expected, " << without_holds << " without holds, "
+         << rows_only << " expected" << endl;
+}
+
 int main(int argc, char** argv) {
     // cout << "======== TEST 1 ========" << endl;
     // test1();
@@ -231,6 +730,34 @@ int main(int argc, char** argv) {
     test8();
     cout << "======== TEST 9 ========" << endl;
     test9();
+    cout << "======== TEST 10 ========" << endl;
+    test10();
+    cout << "======== TEST 11 ========" << endl;
+    test11();
+    cout << "======== TEST 12 ========" << endl;
+    test12();
+    cout << "======== TEST 13 ========" << endl;
+    test13();
+    cout << "======== TEST 14 ========" << endl;
+    test14();
+    cout << "======== TEST 15 ========" << endl;
+    test15();
+    cout << "======== TEST 16 ========" << endl;
+    test16();
+    cout << "======== TEST 17 ========" << endl;
+    test17();
+    cout << "======== TEST 18 ========" << endl;
+    test18();
+    cout << "======== TEST 19 ========" << endl;
+    test19();
+    cout << "======== TEST 20 ========" << endl;
+    test20();
+    cout << "======== TEST 21 ========" << endl;
+    test21();
+    cout << "======== TEST 22 ========" << endl;
+    test22();
+    cout << "======== TEST 23 ========" << endl;
+    test23();
 
     return 0;
 }
\ No newline at end of file
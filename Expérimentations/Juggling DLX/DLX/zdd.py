@@ -0,0 +1,233 @@
+""" Diagrammes de décision à suppression de zéros (ZDD) représentant toutes
+les solutions d'une instance de couverture exacte avec multiplicités et
+couleurs (cf. `DLXM.zdd`).
+
+Le diagramme est construit en parcourant les lignes dans l'ordre, en
+décidant pour chacune si elle fait partie de la solution. Deux solutions
+partielles qui ont décidé des mêmes lignes et laissent les éléments encore
+actifs (ceux qui apparaissent dans les lignes restantes) dans le même état
+ont les mêmes complétions : le sous-problème n'est donc construit qu'une
+fois, comme dans l'algorithme DXZ de Knuth. L'état d'un élément primaire
+est le nombre de lignes choisies qui le contiennent, celui d'un élément
+secondaire est sa couleur. Un élément disparaît de l'état après sa dernière
+ligne, si bien que la taille des états reste petite lorsque les lignes sont
+ordonnées de façon à ce que chaque élément n'apparaisse que dans des lignes
+proches (par exemple par date pour les instances de jonglage).
+"""
+from typing import List, Tuple, Dict, Optional, Sequence, Set, Iterator, Hashable
+import random
+
+_EMPTY_COLOR = 0
+_EXCLUSIVE = -1  # élément secondaire pris par une ligne sans couleur
+
+_State = Tuple[Tuple[Tuple[Hashable, int], ...], Tuple[Tuple[Hashable, int], ...]]
+
+
+class SolutionZDD():
+    """ Ensemble de solutions représenté par un ZDD réduit. Les noeuds 0 et
+    1 sont les terminaux (ensemble vide et ensemble réduit à la solution
+    vide). Le noeud k >= 2 représente les solutions de `lo[k]`, plus celles
+    de `hi[k]` auxquelles on ajoute la ligne `row[k]`. Les lignes sont
+    croissantes le long des chemins et les fils d'un noeud ont un numéro
+    inférieur au sien. """
+    row: List[int]
+    lo: List[int]
+    hi: List[int]
+    root: int
+
+    def __init__(self, row: List[int], lo: List[int], hi: List[int], root: int):
+        self.row = row
+        self.lo = lo
+        self.hi = hi
+        self.root = root
+        self._counts: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        """ Nombre de noeuds du diagramme, terminaux compris. """
+        return len(self.row)
+
+    def counts(self) -> List[int]:
+        """ Nombre de solutions représentées par chaque noeud. """
+        if self._counts is None:
+            counts = [0, 1]
+            for k in range(2, len(self.row)):
+                counts.append(counts[self.lo[k]] + counts[self.hi[k]])
+            self._counts = counts
+        return self._counts
+
+    def count(self) -> int:
+        """ Nombre exact de solutions. """
+        return self.counts()[self.root]
+
+    def __iter__(self) -> Iterator[Set[int]]:
+        """ Énumère les solutions. """
+        stack: List[Tuple[int, List[int]]] = [(self.root, [])]
+        while stack:
+            node, rows = stack.pop()
+            if node == 1:
+                yield set(rows)
+            elif node > 1:
+                stack.append((self.lo[node], rows))
+                stack.append((self.hi[node], rows + [self.row[node]]))
+
+    def sample(self, k: int, seed: Optional[int] = None) -> List[Set[int]]:
+        """ Renvoie `k` solutions tirées uniformément et indépendamment (avec
+        remise), ou une liste vide s'il n'y a pas de solution. """
+        counts = self.counts()
+        if counts[self.root] == 0:
+            return []
+        rng = random.Random(seed)
+        sample = []
+        for _ in range(k):
+            sol = set()
+            node = self.root
+            while node > 1:
+                if rng.randrange(counts[node]) < counts[self.hi[node]]:
+                    sol.add(self.row[node])
+                    node = self.hi[node]
+                else:
+                    node = self.lo[node]
+            sample.append(sol)
+        return sample
+
+    def min_cost(self, costs: Sequence[float]) -> Tuple[float, Optional[Set[int]]]:
+        """ Renvoie le coût minimal d'une solution, la somme des coûts
+        `costs` de ses lignes, et une solution de ce coût (`None` s'il n'y a
+        pas de solution, le coût étant alors infini). """
+        inf = float('inf')
+        best = [inf, 0.0]
+        take = [False, False]
+        for k in range(2, len(self.row)):
+            without = best[self.lo[k]]
+            with_row = best[self.hi[k]] + costs[self.row[k]]
+            take.append(with_row < without)
+            best.append(min(with_row, without))
+        if best[self.root] == inf:
+            return inf, None
+        sol = set()
+        node = self.root
+        while node > 1:
+            if take[node]:
+                sol.add(self.row[node])
+                node = self.hi[node]
+            else:
+                node = self.lo[node]
+        return float(best[self.root]), sol
+
+
+def build_zdd(row_primary: Sequence[Sequence[Hashable]],
+              row_secondary: Sequence[Sequence[Tuple[Hashable, int]]],
+              bounds: Dict[Hashable, Tuple[int, int]]) -> SolutionZDD:
+    """ Construit le ZDD des solutions de l'instance dont la ligne r
+    contient les éléments primaires `row_primary[r]` et les éléments
+    secondaires colorés `row_secondary[r]`, l'élément primaire `i` devant
+    être couvert entre `bounds[i][0]` et `bounds[i][1]` fois.
+
+    >>> z = build_zdd([['a'], ['a', 'b'], ['b']], [[], [], []],
+    ...               {'a': (1, 1), 'b': (0, 1)})
+    >>> z.count(), sorted(map(sorted, z))
+    (3, [[0], [0, 2], [1]])
+    >>> z = build_zdd([['a'], ['a'], ['a']], [[('x', 1)], [('x', 2)], [('x', 1)]],
+    ...               {'a': (1, 3)})
+    >>> sorted(map(sorted, z))
+    [[0], [0, 2], [1], [2]]
+    >>> build_zdd([['a']], [[]], {'a': (1, 1), 'b': (1, 1)}).count()
+    0
+    """
+    nb_rows = len(row_primary)
+    last: Dict[Hashable, int] = {}
+    for r, items in enumerate(row_primary):
+        for i in items:
+            last[i] = r
+    sec_last: Dict[Hashable, int] = {}
+    for r, sec_items in enumerate(row_secondary):
+        for s, _ in sec_items:
+            sec_last[s] = r
+    for i, (low, _) in bounds.items():
+        if i not in last and low > 0:
+            return SolutionZDD([0, 1], [0, 1], [0, 1], 0)
+    exits: List[List[Hashable]] = [[] for _ in range(nb_rows)]
+    for i, r in last.items():
+        exits[r].append(i)
+    sec_exits: List[List[Hashable]] = [[] for _ in range(nb_rows)]
+    for s, r in sec_last.items():
+        sec_exits[r].append(s)
+
+    def child(r: int, state: _State, take: bool):
+        """ État après la décision prise sur la ligne r : `None` si elle
+        mène à une contradiction, `True` si c'était la dernière ligne. """
+        counts = dict(state[0])
+        colors = dict(state[1])
+        if take:
+            for i in row_primary[r]:
+                c = counts.get(i, 0) + 1
+                if c > bounds[i][1]:
+                    return None
+                counts[i] = c
+            for s, color in row_secondary[r]:
+                current = colors.get(s)
+                if color == _EMPTY_COLOR:
+                    if current is not None:
+                        return None
+                    colors[s] = _EXCLUSIVE
+                elif current is None or current == color:
+                    colors[s] = color
+                else:
+                    return None
+        for i in exits[r]:
+            if counts.pop(i, 0) < bounds[i][0]:
+                return None
+        for s in sec_exits[r]:
+            colors.pop(s, None)
+        if r + 1 == nb_rows:
+            return True
+        return (tuple(sorted(counts.items(), key=repr)),
+                tuple(sorted(colors.items(), key=repr)))
+
+    # Parcours des états atteignables, ligne par ligne
+    initial: _State = ((), ())
+    layers: List[Dict[_State, Tuple[object, object]]] = []
+    states: Set[_State] = {initial}
+    for r in range(nb_rows):
+        layer = {}
+        new_states: Set[_State] = set()
+        for state in states:
+            lo, hi = child(r, state, False), child(r, state, True)
+            layer[state] = (lo, hi)
+            for c in (lo, hi):
+                if isinstance(c, tuple):
+                    new_states.add(c)
+        layers.append(layer)
+        states = new_states
+
+    # Construction des noeuds en remontant, avec réduction : un noeud dont
+    # la branche « avec » est vide est remplacé par sa branche « sans », et
+    # les noeuds identiques sont partagés
+    row, lo_list, hi_list = [0, 1], [0, 1], [0, 1]
+    unique: Dict[Tuple[int, int, int], int] = {}
+
+    def node_id(c, ids: Dict[_State, int]) -> int:
+        if c is None:
+            return 0
+        if c is True:
+            return 1
+        return ids[c]
+
+    ids: Dict[_State, int] = {}
+    for r in range(nb_rows - 1, -1, -1):
+        new_ids: Dict[_State, int] = {}
+        for state, (lo, hi) in layers[r].items():
+            lo_id, hi_id = node_id(lo, ids), node_id(hi, ids)
+            if hi_id == 0:
+                new_ids[state] = lo_id
+                continue
+            key = (r, lo_id, hi_id)
+            if key not in unique:
+                unique[key] = len(row)
+                row.append(r)
+                lo_list.append(lo_id)
+                hi_list.append(hi_id)
+            new_ids[state] = unique[key]
+        ids = new_ids
+    root = ids[initial] if nb_rows > 0 else 1
+    return SolutionZDD(row, lo_list, hi_list, root)
@@ -0,0 +1,63 @@
+""" Mesures du temps et de la mémoire de construction des instances.
+
+Usage : python bench_build.py [nombre de notes] [nombre de répétitions]
+
+On construit l'instance de couverture exacte d'un morceau d'environ 200
+notes (Au clair de la lune répété) avec `throws_to_extended_exact_cover`,
+puis l'instance DLX correspondante avec `dlx_solver_instance`. Le pic de
+mémoire est mesuré avec `tracemalloc` pendant la construction de
+l'instance de couverture exacte.
+"""
+import sys
+import time
+import tracemalloc
+
+from juggling_dlx_milp import music_to_throws, \
+    throws_to_extended_exact_cover, dlx_solver_instance
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def piece(nb_notes):
+    repeat = (nb_notes + len(music) - 1) // len(music)
+    return [(t + 14 * k, n) for k in range(repeat) for t, n in music][:nb_notes]
+
+
+def build(balls, throws):
+    return throws_to_extended_exact_cover(balls, throws, 2, 5, 3,
+                                          [(1, 1), (2, 3)], True)
+
+
+def bench(nb_notes, repeat):
+    balls, throws = music_to_throws(piece(nb_notes))
+    build(balls, throws)  # préchauffage
+
+    build_time = dlx_time = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ec_instance = build(balls, throws)
+        build_time += time.perf_counter() - start
+        start = time.perf_counter()
+        dlx_solver_instance(ec_instance)
+        dlx_time += time.perf_counter() - start
+    print("{} notes : {} lignes, {} éléments primaires, {} éléments secondaires"
+          .format(nb_notes, len(ec_instance.rows), len(ec_instance.prim_items),
+                  len(ec_instance.sec_items)))
+    print("construction de l'instance : {:.1f} ms".format(1000 * build_time / repeat))
+    print("construction de l'instance DLX : {:.1f} ms".format(1000 * dlx_time / repeat))
+
+    del ec_instance
+    tracemalloc.start()
+    build(balls, throws)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("pic de mémoire : {:.2f} Mo".format(peak / 1e6))
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 10)
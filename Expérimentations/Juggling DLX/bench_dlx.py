@@ -0,0 +1,77 @@
+""" Mesures de performance du moteur DLX (algorithme M).
+
+Usage : python bench_dlx.py [nombre maximal de threads]
+
+Pour chaque instance, on mesure le débit du parcours de l'arbre de
+recherche (noeuds et mises à jour de liens par seconde) avec
+`DLXM.count_solutions`. L'instance est ensuite résolue par
+`DLXM.all_solutions`, d'abord séquentiellement puis avec 2, 4, ... threads,
+et on vérifie que l'ensemble des solutions est inchangé.
+"""
+from glob import glob
+import os
+import sys
+import time
+
+from DLX.dlxm import read_instance
+from juggling_dlx_milp import music_to_throws, \
+    throws_to_extended_exact_cover, dlx_solver_instance
+
+_dir_path = os.path.dirname(os.path.realpath(__file__))
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def instances():
+    for path in sorted(glob(os.path.join(_dir_path, "DLX", "tests", "*.dlx"))):
+        with open(path) as f:
+            yield os.path.basename(path), read_instance(f)
+
+    balls, throws = music_to_throws(music)
+    ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 4, 2,
+                                                 [], True)
+    yield "au clair de la lune (2 mains)", dlx_solver_instance(ec_instance)
+
+
+def throughput(dlx, min_time=0.5):
+    """ Renvoie le nombre de noeuds et de mises à jour de liens par seconde,
+    en répétant le parcours pendant au moins `min_time` secondes. """
+    dlx.compile()
+    dlx.dlx.count_solutions()  # préchauffage de cppyy
+    nodes = mems = 0
+    t = 0.0
+    while t < min_time:
+        start = time.perf_counter()
+        dlx.dlx.count_solutions()
+        t += time.perf_counter() - start
+        nodes += dlx.stats['nodes']
+        mems += dlx.stats['mems']
+    return nodes / t, mems / t
+
+
+def bench(max_workers):
+    for name, dlx in instances():
+        nodes, mems = throughput(dlx)
+        print("{} : {:.0f} noeuds/s, {:.0f} mems/s".format(name, nodes, mems))
+
+        start = time.perf_counter()
+        ref = dlx.all_solutions()
+        ref_time = time.perf_counter() - start
+        print("{} : {} solutions, {:.3f} s".format(name, len(ref), ref_time))
+        workers = 2
+        while workers <= max_workers:
+            start = time.perf_counter()
+            sols = dlx.all_solutions(workers=workers)
+            t = time.perf_counter() - start
+            print("    {} threads : {:.3f} s (x{:.2f}){}"
+                  .format(workers, t, ref_time / t,
+                          "" if sols == ref else " SOLUTIONS DIFFÉRENTES"))
+            workers *= 2
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1)
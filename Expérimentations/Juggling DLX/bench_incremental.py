@@ -0,0 +1,58 @@
+""" Temps de mise à jour d'`IncrementalExactCover` et de recherche (en
+partant de la solution précédente) après la modification d'une note d'un
+morceau, puis après son annulation, comparés à la construction de
+l'instance modifiée et à la recherche sur celle-ci.
+
+Usage : python bench_incremental.py [nombre maximal de notes]
+
+Le morceau est Au clair de la lune répété, dont on déplace une note au
+milieu.
+"""
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    get_solution_with_dlx, get_solution_with_windows, IncrementalExactCover
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def measure(repeat):
+    full = [(t + 14 * k, n) for k in range(repeat) for t, n in music]
+    middle = 14 * (repeat // 2)
+    edited = [(t + 1, n) if t == middle + 5 else (t, n) for t, n in full]
+    session = IncrementalExactCover(2, 5, 3, [(1, 1), (2, 3)])
+    sol = get_solution_with_windows(session.update(*music_to_throws(full)), 8)
+    times = []
+    for version in (edited, full):
+        balls, throws = music_to_throws(version)
+        start = time.perf_counter()
+        session.update(balls, throws)
+        update = time.perf_counter() - start
+        sol = session.solve(sol)
+        times.append("{:.1f} ms + {:.1f} ms".format(
+            1000 * update, 1000 * (time.perf_counter() - start - update)))
+    balls, throws = music_to_throws(edited)
+    start = time.perf_counter()
+    ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3,
+                                                 [(1, 1), (2, 3)], True)
+    get_solution_with_dlx(ec_instance)
+    return "{} notes : {} (modification), {} (annulation), reconstruction et recherche {:.1f} ms, {}" \
+        .format(11 * repeat, times[0], times[1], 1000 * (time.perf_counter() - start),
+                session.stats)
+
+
+def bench(max_notes):
+    measure(1)  # préchauffage de cppyy
+    repeat = 4
+    while 11 * repeat <= max_notes:
+        print(measure(repeat))
+        repeat *= 4
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 704)
@@ -0,0 +1,77 @@
+""" Temps de construction et de résolution du programme linéaire de
+`solve_exact_cover_with_milp`, construit contrainte par contrainte par Sage
+(`sage_milp_model`) ou assemblé en matrices creuses et résolu par HiGHS
+(`milp_model`, `backend="highs"`).
+
+Usage : python bench_milp.py [nombre maximal de notes]
+
+Le morceau est Au clair de la lune répété, avec l'optimisation du nombre
+de lancers multiplex. Les mesures de Sage ne sont faites que s'il est
+installé. Pour chaque taille, on donne aussi l'objectif, la borne et
+l'écart obtenus par HiGHS en partant de la solution trouvée par DLX, avec
+des limites de temps croissantes.
+"""
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import milp, Bounds, LinearConstraint
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    milp_model, sage_milp_model, MixedIntegerLinearProgram, get_solution_with_dlx, \
+    solve_exact_cover_with_milp
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def piece(nb_notes):
+    repeat = (nb_notes + len(music) - 1) // len(music)
+    return [(t + 14 * k, n) for k in range(repeat) for t, n in music][:nb_notes]
+
+
+def bench(max_notes):
+    nb_notes = 11
+    while nb_notes <= max_notes:
+        balls, throws = music_to_throws(piece(nb_notes))
+        ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3,
+                                                     [], True)
+        print("{} notes : {} lignes, {} éléments primaires"
+              .format(nb_notes, len(ec_instance.rows), len(ec_instance.prim_items)))
+
+        start = time.perf_counter()
+        c, A, lower, upper = milp_model(ec_instance, True, [3])
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        res = milp(c, integrality=np.ones(len(c)), bounds=Bounds(0, 1),
+                   constraints=[LinearConstraint(A, lower, upper)])
+        print("    HiGHS : construction {:.3f} s, résolution {:.3f} s, objectif {}"
+              .format(build, time.perf_counter() - start, res.fun))
+
+        if MixedIntegerLinearProgram is not None:
+            start = time.perf_counter()
+            p, x = sage_milp_model(ec_instance, True, [3])
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            value = p.solve()
+            print("    Sage : construction {:.3f} s, résolution {:.3f} s, objectif {}"
+                  .format(build, time.perf_counter() - start, value))
+
+        first = get_solution_with_dlx(ec_instance)
+        for time_limit in (0.05, 0.2, 1.0):
+            stats = {}
+            start = time.perf_counter()
+            solve_exact_cover_with_milp(ec_instance, True, [3], backend="highs",
+                                        warm_start=first, time_limit=time_limit,
+                                        stats=stats)
+            print("    départ DLX, limite {} s : {} en {:.3f} s, objectif {}, borne {}, écart {:.3f}"
+                  .format(time_limit, stats['status'], time.perf_counter() - start,
+                          stats['objective'], stats['bound'], stats['gap']))
+        nb_notes *= 2
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 176)
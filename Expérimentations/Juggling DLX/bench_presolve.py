@@ -0,0 +1,40 @@
+""" Taille des instances avant et après réduction par `presolve`, et temps
+de la réduction, quand la longueur du morceau augmente.
+
+Usage : python bench_presolve.py [nombre maximal de notes]
+
+Le morceau est Au clair de la lune répété, sans multiplex (1, 1) ni (2, 3).
+"""
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    presolve
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def bench(max_notes):
+    repeat = 1
+    while 11 * repeat <= max_notes:
+        balls, throws = music_to_throws([(t + 14 * k, n) for k in range(repeat)
+                                         for t, n in music])
+        ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3,
+                                                     [(1, 1), (2, 3)], True)
+        stats = {}
+        start = time.perf_counter()
+        small = presolve(ec_instance, stats)
+        print("{} notes : {} lignes, {} éléments -> {} lignes, {} éléments en {:.2f} s, {}"
+              .format(11 * repeat, len(ec_instance.rows),
+                      len(ec_instance.prim_items) + len(ec_instance.sec_items),
+                      len(small.rows), len(small.prim_items) + len(small.sec_items),
+                      time.perf_counter() - start, stats))
+        repeat *= 4
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 176)
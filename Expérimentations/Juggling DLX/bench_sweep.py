@@ -0,0 +1,41 @@
+""" Temps de calcul de `get_solution_with_sweep` quand la longueur du morceau
+augmente.
+
+Usage : python bench_sweep.py [nombre maximal de notes]
+
+Le morceau est Au clair de la lune répété, en maximisant les lancers de
+hauteur 3 et 4 ; on donne le nombre des autres lancers.
+"""
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    XItem, get_solution_with_sweep
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def cost(sol, maximize):
+    return sum(1 for row in sol.rows for item in row
+               if isinstance(item, XItem) and item.flying_time not in maximize)
+
+
+def bench(max_notes):
+    repeat = 1
+    while 11 * repeat <= max_notes:
+        balls, throws = music_to_throws([(t + 14 * k, n) for k in range(repeat)
+                                         for t, n in music])
+        ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3, [], True)
+        start = time.perf_counter()
+        sol = get_solution_with_sweep(ec_instance, [3, 4])
+        print("{} notes : coût {} en {:.2f} s"
+              .format(11 * repeat, cost(sol, [3, 4]), time.perf_counter() - start))
+        repeat *= 4
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 176)
@@ -0,0 +1,60 @@
+""" Comparaison des instances DLX où le poids des mains est donné par des
+éléments w (un par instant) et par des ressources (`dlx_solver_instance`
+avec `timelines`) quand la hauteur maximale des lancers augmente.
+
+Usage : python bench_timelines.py [nombre de notes]
+
+Le morceau fait tourner max_height / 2 balles, de sorte que les lancers
+soient d'autant plus hauts que max_height est grand. Pour chaque hauteur,
+on donne la taille de l'instance (éléments primaires, noeuds des lignes et
+intervalles), le nombre de solutions avec le nombre de noeuds visités pour
+les compter, le débit du parcours de l'arbre de recherche (sans
+vérification des positions des balles) et le temps de recherche d'une
+solution respectant les contraintes sur les mains.
+"""
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    dlx_solver_instance, get_solution_with_dlx
+
+
+def size(dlx):
+    nodes = sum(len(p) + len(s) for p, s in dlx.rows)
+    intervals = sum(len(dlx.rows.intervals(i)) for i in range(len(dlx.rows)))
+    return len(dlx.low), nodes, intervals
+
+
+def bench(nb_notes):
+    balls, throws = music_to_throws([(1, "do"), (2, "re")])
+    get_solution_with_dlx(throws_to_extended_exact_cover(balls, throws, 2, 3, 2, [], True),
+                          timelines=True)  # préchauffage de cppyy
+    for max_height in (4, 6, 8):
+        music = [(t, "n{}".format(t % (max_height // 2))) for t in range(1, nb_notes + 1)]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(balls, throws, 2, max_height, 2,
+                                                     [], True)
+        print("hauteur {} : {} lignes".format(max_height, len(ec_instance.rows)))
+        for timelines in (False, True):
+            start = time.perf_counter()
+            dlx = dlx_solver_instance(ec_instance, timelines)
+            build = time.perf_counter() - start
+            items, nodes, intervals = size(dlx)
+            dlx.compile()
+            start = time.perf_counter()
+            count = dlx.dlx.count_solutions()
+            t = time.perf_counter() - start
+            stats = dlx.stats
+            start = time.perf_counter()
+            sol = get_solution_with_dlx(ec_instance, timelines=timelines)
+            print("    {} : {} éléments, {} noeuds, {} intervalles, construction {:.3f} s"
+                  .format("ressources" if timelines else "éléments w",
+                          items, nodes, intervals, build))
+            print("        {} solutions en {:.3f} s, {} noeuds ({:.0f} noeuds/s, {} rejets), "
+                  "solution {} en {:.3f} s"
+                  .format(count, t, stats['nodes'], stats['nodes'] / t, stats['pruned'],
+                          sol is not None, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,45 @@
+""" Temps de calcul de `get_solution_with_windows` quand la longueur du
+morceau augmente, avec des fenêtres de longueur 8 puis avec des fenêtres
+alignées sur les sections répétées (dont la solution est reprise).
+
+Usage : python bench_windows.py [nombre maximal de notes]
+
+Le morceau est Au clair de la lune répété, en maximisant les lancers de
+hauteur 3 et 4.
+"""
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    get_solution_with_windows
+
+# Au clair de la lune
+music = [(1, "do"), (2, "do"), (3, "do"),
+         (4, "re"), (5, "mi"), (7, "re"),
+         (9, "do"), (10, "mi"), (11, "re"),
+         (12, "re"), (13, "do")]
+
+
+def bench(max_notes):
+    balls, throws = music_to_throws(music)
+    get_solution_with_windows(throws_to_extended_exact_cover(balls, throws, 2, 5, 3, [], True),
+                              8)  # préchauffage de cppyy
+    repeat = 2
+    while 11 * repeat <= max_notes:
+        balls, throws = music_to_throws([(t + 14 * k, n) for k in range(repeat)
+                                         for t, n in music])
+        ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3, [], True)
+        start = time.perf_counter()
+        sol = get_solution_with_windows(ec_instance, 8, [3, 4])
+        t = time.perf_counter() - start
+        stats = {}
+        start = time.perf_counter()
+        sections = get_solution_with_windows(ec_instance, None, [3, 4], stats=stats)
+        print("{} notes : {} en {:.2f} s, sections {} en {:.2f} s ({} reprises sur {} fenêtres)"
+              .format(11 * repeat, sol is not None, t, sections is not None,
+                      time.perf_counter() - start, stats['reused'], stats['windows']))
+        repeat *= 2
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 176)
@@ -1,10 +1,23 @@
 from recordclass import StructClass
 from typing import List, Dict, Tuple, Union, Set, Any, Optional
-from sage.all import MixedIntegerLinearProgram
-from DLX.dlxm import DLXM
+try:
+    from sage.all import MixedIntegerLinearProgram
+except ImportError:  # le programme linéaire peut être résolu par HiGHS
+    MixedIntegerLinearProgram = None
+from DLX.dlxm import IntDLXM, SearchStatus
+from DLX.zdd import SolutionZDD
+from concurrent.futures import ThreadPoolExecutor
+from itertools import permutations, product
+import numpy as np
+from scipy import sparse
+from scipy.optimize import milp, Bounds, LinearConstraint
+try:
+    import highspy
+except ImportError:  # pas de départ à chaud avec scipy.optimize.milp
+    highspy = None
 from queue import Queue
-
-import cppyy
+import threading
+import time
 
 from pylatex import Document
 from pylatex.utils import NoEscape
@@ -13,37 +26,6 @@ import modele
 import ipywidgets as ipw
 import pythreejs
 
-_maximize_model = """
-for (auto i : {{ {} }})
-    if (!dlx->is_covered(i))
-        return i;
-"""
-
-_choose_model = """
-long int choose_{}(DLX_M::DLX* dlx) {{
-    long int i = dlx->item(0).rlink;
-    long int p;
-
-    for (p = i; p != 0; p = dlx->item(p).rlink)
-        if (dlx->option(p).tl == 0)
-            return p;
-        // if (dlx->option(p).tl == 0 && dlx->option(p).tl < dlx->option(i).tl)
-        //     i = p;
-
-    // if (dlx->option(i).tl == 0) return i;
-
-    {}
-
-    for (p = i; p != 0; p = dlx->item(p).rlink)
-        if (dlx->option(p).tl < dlx->option(i).tl)
-            i = p;
-
-    return i;
-}}
-"""
-
-_choose_counter = 0
-
 
 class Throw(StructClass):
     ball: str
@@ -51,7 +33,13 @@ class Throw(StructClass):
     max_height: int
 
     def __hash__(self):
-        return hash(str(self))
+        return hash((self.ball, self.time, self.max_height))
+
+    # comparaison par valeur, comme le hachage, quelle que soit la version de
+    # recordclass (les lancers servent de clés, cf. IncrementalExactCover)
+    def __eq__(self, other):
+        return isinstance(other, Throw) \
+            and (self.ball, self.time, self.max_height) == (other.ball, other.time, other.max_height)
 
     def latex(self):
         return r"T({}, {}, {})".format(self.time, self.ball, self.max_height)
@@ -79,108 +67,128 @@ def music_to_throws(music: List[Tuple[int, str]]) \
 
 
 class Item(object):
-    _name: str
-    _print_order_down: List[str]
-    _print_order_up: List[str]
-    _dict: Dict[str, Any]
+    """ Élément d'une instance de couverture exacte. Les paramètres d'un
+    élément (`_fields`) sont des attributs ordinaires rangés dans des
+    emplacements fixes (`__slots__`), sans dictionnaire par objet, et
+    l'élément est haché à partir de leurs valeurs. Deux éléments distincts
+    ne sont jamais égaux, même s'ils ont les mêmes paramètres. """
+    __slots__ = ('bounds',)
+    _name: str = ""
+    _fields: Tuple[str, ...] = ()
+    _print_order_down: List[str] = []
+    _print_order_up: List[str] = []
 
     bounds: Tuple[int, int]
 
-    def __init__(self, name: str, params: Dict[str, Any],
-                 print_order_down: List[str] = [],
-                 print_order_up: List[str] = [],
-                 low: int = 1, high: int = 1):
-        self._name = name
-        self._dict = params
-        self._print_order_down = print_order_down
-        self._print_order_up = print_order_up
+    def __init__(self, *params, low: int = 1, high: int = 1):
+        for k, v in zip(self._fields, params):
+            setattr(self, k, v)
         self.bounds = (low, high)
 
+    def params(self) -> Dict[str, Any]:
+        """ Paramètres de l'élément. """
+        return {k: getattr(self, k) for k in self._fields}
+
     def __getitem__(self, k):
-        return self._dict[k]
+        return getattr(self, k)
 
     def __str__(self):
-        return self._name + str(self._dict)
+        return self._name + str(self.params())
 
     def __repr__(self):
         s = self._name + "("
-        s += ", ".join(["{}: {}".format(k, self._dict[k]) for k in self._dict])
+        s += ", ".join(["{}: {}".format(k, getattr(self, k)) for k in self._fields])
         s += ")"
         return s
 
     def __hash__(self):
-        return hash(self.__str__())
+        return hash((self._name,) + tuple(getattr(self, k) for k in self._fields))
+
+    def __getstate__(self):
+        return self.bounds, tuple(getattr(self, k) for k in self._fields)
+
+    def __setstate__(self, state):
+        Item.__init__(self, *state[1], low=state[0][0], high=state[0][1])
 
     def latex(self):
         s = "{} + {" % self._name
-        s += ",".join([self._dict[k] for k in self._print_order_down])
+        s += ",".join([getattr(self, k) for k in self._print_order_down])
         s += "}^{"
-        s += ",".join([self._dict[k] for k in self._print_order_up])
+        s += ",".join([getattr(self, k) for k in self._print_order_up])
         s += "}"
         return s
 
-    def __getattribute__(self, name: str) -> Any:
-        if name in object.__getattribute__(self, "_dict"):
-            return object.__getattribute__(self, "_dict")[name]
-        else:
-            return object.__getattribute__(self, name)
+    def replace(self, **params) -> 'Item':
+        """ Renvoie une copie de l'élément où les paramètres donnés sont
+        remplacés. """
+        item = object.__new__(type(self))
+        Item.__init__(item, *[params.get(k, getattr(self, k)) for k in self._fields],
+                      low=self.bounds[0], high=self.bounds[1])
+        return item
 
 
 class LItem(Item):
+    __slots__ = _fields = ("throw",)
+    _name = "l"
+    _print_order_down = ["throw"]
+
     def __init__(self, throw):
-        super().__init__("l", {"throw": throw}, ["throw"])
+        super().__init__(throw)
 
 
 class XItem(Item):
+    __slots__ = _fields = ("throw", "hand", "flying_time")
+    _name = "x"
+    _print_order_down = ["throw"]
+    _print_order_up = ["flying_time"]
+
     def __init__(self, throw, hand, flying_time):
-        super().__init__("x", {
-            "throw": throw,
-            "hand": hand,
-            "flying_time": flying_time
-        }, ["throw"], ["flying_time"], low=0, high=1)
+        super().__init__(throw, hand, flying_time, low=0, high=1)
 
 
 class WItem(Item):
+    __slots__ = _fields = ("time", "hand")
+    _name = "w"
+    _print_order_down = ["time", "hand"]
+
     def __init__(self, max_weight, time, hand):
-        super().__init__("w", {
-            "time": time,
-            "hand": hand
-        }, ["time", "hand"], low=0, high=max_weight)
+        super().__init__(time, hand, low=0, high=max_weight)
 
 
 class DItem(Item):
+    __slots__ = _fields = ("time", "hand", "multiplex")
+    _name = "d"
+    _print_order_down = ["time", "hand", "multiplex"]
+
     def __init__(self, time, hand, multiplex):
-        super().__init__("d", {
-            "time": time,
-            "hand": hand,
-            "multiplex": multiplex
-        }, ["time", "hand", "multiplex"], low=0, high=1)
+        super().__init__(time, hand, multiplex, low=0, high=1)
 
 
 class MItem(Item):
+    __slots__ = _fields = ("time", "hand", "multiplex")
+    _name = "m"
+    _print_order_down = ["time", "hand", "multiplex"]
+
     def __init__(self, time, hand, multiplex):
-        super().__init__("m", {
-            "time": time,
-            "hand": hand,
-            "multiplex": multiplex
-        }, ["time", "hand", "multiplex"])
+        super().__init__(time, hand, multiplex)
 
 
 class CItem(Item):
+    __slots__ = _fields = ("time", "hand")
+    _name = "c"
+    _print_order_down = ["time", "hand"]
+
     def __init__(self, time, hand):
-        super().__init__("c", {
-            "time": time,
-            "hand": hand
-        }, ["time", "hand"], low=0, high=1)
+        super().__init__(time, hand, low=0, high=1)
 
 
 class UItem(Item):
+    __slots__ = _fields = ("time", "ball", "hand")
+    _name = "u"
+    _print_order_down = ["time", "ball", "hand"]
+
     def __init__(self, time, ball, hand):
-        super().__init__("u", {
-            "time": time,
-            "ball": ball,
-            "hand": hand
-        }, ["time", "ball", "hand"], low=0, high=1)
+        super().__init__(time, ball, hand, low=0, high=1)
 
 
 class ExactCoverInstance(StructClass):
@@ -198,6 +206,31 @@ class ExactCoverInstance(StructClass):
 
     rows: List[List[Union[Item, Tuple[Item, int]]]] = []
 
+    # Lignes au format CSR (cf. `IntDLXM.add_rows`), les éléments étant
+    # donnés par leur position dans `prim_items` et `sec_items`, ou `None`
+    # si l'instance n'est décrite que par `rows`
+    csr: Optional[Tuple[List[int], List[int], List[int], List[int], List[int]]] = None
+
+
+class ItemRegistry(object):
+    """ Numérotation dense des éléments d'une instance : chaque famille
+    d'éléments reçoit une plage de numéros consécutifs, dans l'ordre où
+    les familles sont ajoutées. Les numéros des éléments d'une famille se
+    calculent à partir de leurs paramètres, ce qui évite de hacher les
+    éléments pendant la construction des lignes. """
+    __slots__ = ('items', 'families')
+
+    def __init__(self):
+        self.items: List[Item] = []
+        self.families: Dict[str, range] = {}
+
+    def add_family(self, name: str, items: List[Item]) -> int:
+        """ Ajoute une famille d'éléments et renvoie le numéro du premier. """
+        base = len(self.items)
+        self.items.extend(items)
+        self.families[name] = range(base, len(self.items))
+        return base
+
 
 class ExactCoverSolution(StructClass):
     params: Dict[str, Any] = {}
@@ -227,22 +260,28 @@ class JugglingSolution(StructClass):
 def throws_to_extended_exact_cover(balls: Set[str], throws: List[List[Throw]],
                                    nb_hands: int, H: int, max_weight: int,
                                    forbidden_multiplex: List[Tuple[int, ]],
-                                   multiple_throws: bool) \
+                                   multiple_throws: bool,
+                                   symmetric_hands: bool = False) \
         -> ExactCoverInstance:
+    """ Construit l'instance de couverture exacte associée aux lancers.
+
+    Toutes les mains jouent le même rôle dans l'instance : toute permutation
+    des mains d'une solution donne une autre solution. Si `symmetric_hands`
+    est vrai, on ne garde qu'une partie de ces solutions symétriques : le
+    k-ième lancer (dans l'ordre chronologique, en comptant à partir de 0) ne
+    peut être fait que par une main d'indice au plus k. Toute solution a une
+    variante qui respecte cette contrainte (celle où les mains sont numérotées
+    dans l'ordre de leur première utilisation), que l'on retrouve avec
+    `symmetric_solutions`. Avec deux mains, il reste exactement une solution
+    par classe de symétrie.
+
+    Les éléments sont numérotés famille par famille (cf. `ItemRegistry`) et
+    les lignes sont aussi données au format CSR (champ `csr`), ce que
+    `dlx_solver_instance` utilise directement. """
     max_time = 0
-    x_items = {}
-    l_items = {}
-    w_items = {}
-    d_items = {}
-    m_items = {}
-    # m_items_bounds = {}
-    c_items = {}
-    u_items = {}
-
     colors = {}
     fmultiplex: Dict[int, List[Tuple[int, ]]] = {i: [] for i in range(1, H + 1)}
     fflying_time = []
-    rows = []
     # Remplissage du dictionnaire des lancers multiplex interdits
     for fm in forbidden_multiplex:
         if len(fm) == 2:
@@ -251,8 +290,10 @@ def throws_to_extended_exact_cover(balls: Set[str], throws: List[List[Throw]],
             else:
                 fmultiplex[fm[0]].append(fm)
                 fmultiplex[fm[1]].append(fm)
-        # for i in fm:
-        #     fmultiplex[i].append(fm)
+        elif len(fm) == 1 and fm[0] not in fflying_time:
+            fflying_time.append(fm[0])
+        elif len(fm) > 2:
+            raise Exception("Erreur: l'interdiction de lancers multiplex de taille > 2 n'est pas supportée.")
     # Calcul du plus tard temps où atterrit une balle
     for t in range(len(throws) - 1, -1, -1):
         if len(throws[t]) > 0:
@@ -262,107 +303,209 @@ def throws_to_extended_exact_cover(balls: Set[str], throws: List[List[Throw]],
                     max_height = throw.max_height
             if t + max_height > max_time:
                 max_time = t + max_height
-    # Génération des items x et L
-    for t in range(len(throws)):
-        for throw in throws[t]:
-            v = LItem(throw=throw)
-            l_items[throw] = v
-
-            for hand in range(nb_hands):
-                for flying_time in range(min(H, throw.max_height) + 1):
-                    x = XItem(throw=throw, hand=hand, flying_time=flying_time)
-                    x_items[(throw, hand, flying_time)] = x
-    # Génération des items w, D, M, C et U
-    for t in range(max_time + 1):
+    # Génération des éléments, famille par famille : x, L, w, C, U et D sont
+    # primaires, M est secondaire
+    all_throws = [throw for ts in throws for throw in ts]
+    balls_list = list(balls)
+    ball_index = {ball: k for k, ball in enumerate(balls_list)}
+    d_multiplex = list(dict.fromkeys(f for f in forbidden_multiplex
+                                     if len(f) == 2 and f[0] == f[1]))
+    m_multiplex = list(dict.fromkeys(f for f in forbidden_multiplex
+                                     if len(f) == 2 and f[0] != f[1]))
+    d_pos = {f: k for k, f in enumerate(d_multiplex)}
+    m_pos = {f: k for k, f in enumerate(m_multiplex)}
+    times_hands = [(t, hand) for t in range(max_time + 1) for hand in range(nb_hands)]
+    x_items: List[Item] = []
+    x_start = []
+    for throw in all_throws:
+        x_start.append(len(x_items))
         for hand in range(nb_hands):
-            w = WItem(max_weight=max_weight, time=t, hand=hand)
-            w_items[(t, hand)] = w
-
-            c = CItem(time=t, hand=hand)
-            c_items[(t, hand)] = c
-
-            for f in forbidden_multiplex:
-                if len(f) == 1 and f[0] not in fflying_time:
-                    fflying_time.append(f[0])
-                elif len(f) == 1:
-                    pass
-                elif len(f) == 2 and f[0] == f[1]:
-                    d = DItem(time=t, hand=hand, multiplex=f)
-                    d_items[(t, hand, f)] = d
-                    # m = MItem(time=t, hand=hand, multiplex=f)
-                    # m_items[(t, hand, f)] = m
-                    # m_items_bounds[f] = (0, len(f) - 1)
-                elif len(f) == 2:
-                    m = MItem(time=t, hand=hand, multiplex=f)
-                    m_items[(t, hand, f)] = m
-                else:
-                    raise Exception("Erreur: l'interdiction de lancers multiplex de taille > 2 n'est pas supportée.")
-
-            for ball in balls:
-                u = UItem(ball=ball, time=t, hand=hand)
-                u_items[(ball, t, hand)] = u
+            for flying_time in range(min(H, throw.max_height) + 1):
+                x_items.append(XItem(throw=throw, hand=hand, flying_time=flying_time))
+    prim = ItemRegistry()
+    sec = ItemRegistry()
+    x_base = prim.add_family("x", x_items)
+    l_base = prim.add_family("l", [LItem(throw=throw) for throw in all_throws])
+    w_base = prim.add_family("w", [WItem(max_weight=max_weight, time=t, hand=hand)
+                                   for t, hand in times_hands])
+    c_base = prim.add_family("c", [CItem(time=t, hand=hand) for t, hand in times_hands])
+    u_base = prim.add_family("u", [UItem(ball=ball, time=t, hand=hand)
+                                   for t, hand in times_hands for ball in balls_list])
+    d_base = prim.add_family("d", [DItem(time=t, hand=hand, multiplex=f)
+                                   for t, hand in times_hands for f in d_multiplex])
+    sec.add_family("m", [MItem(time=t, hand=hand, multiplex=f)
+                         for t, hand in times_hands for f in m_multiplex])
     # Génération des couleurs
     # colors["false"] = 1
     # colors["true"] = 2
+    # Une couleur par durée de vol possible (`max_height` ne concerne que
+    # les premiers lancers)
     k = 1
-    for h in range(1, max_height + 1):
+    for h in range(1, H + 1):
         colors[h] = k
         k += 1
-    # Génération des lignes
+    # Génération des lignes, directement au format CSR : les numéros des
+    # éléments sont calculés à partir de leurs paramètres
+    indptr, indices = [0], []
+    sec_indptr, sec_indices, sec_colors = [0], [], []
+    nb_balls = len(balls_list)
+    rank = 0
     for t in range(len(throws)):
         for throw in throws[t]:
-            for hand in range(nb_hands):
-                for flying_time in range(1, min(H, throw.max_height) + 1):
+            # Élimination des symétries : le lancer de rang `rank` est fait
+            # par l'une des `rank + 1` premières mains
+            allowed_hands = min(nb_hands, rank + 1) if symmetric_hands else nb_hands
+            nb_flying_times = min(H, throw.max_height) + 1
+            x = x_base + x_start[rank]
+            u = u_base + ball_index[throw.ball]
+            l_item = l_base + rank
+            rank += 1
+            for hand in range(allowed_hands):
+                for flying_time in range(1, nb_flying_times):
                     if flying_time in fflying_time:
                         continue
-                    row: List[Union[Item, Tuple[Item, int]]] = \
-                        [x_items[(throw, hand, flying_time)], l_items[throw]]
+                    e = t + throw.max_height - flying_time
+                    indices.append(x + hand * nb_flying_times + flying_time)
+                    indices.append(l_item)
                     if not multiple_throws:
-                        row.append(c_items[(t + throw.max_height - flying_time, hand)])
+                        indices.append(c_base + e * nb_hands + hand)
                     for fmulti in fmultiplex[flying_time]:
                         if fmulti[0] == fmulti[1]:
-                            row.append(d_items[(t + throw.max_height - flying_time,
-                                                hand, fmulti)])
+                            indices.append(d_base + (e * nb_hands + hand) * len(d_multiplex)
+                                           + d_pos[fmulti])
                         else:
-                            row.append((m_items[(t + throw.max_height - flying_time,
-                                                 hand, fmulti)],
-                                        colors[flying_time]))
-                    for t1 in range(t, t + throw.max_height - flying_time + 1):
-                        row.append(w_items[(t1, hand)])
+                            sec_indices.append((e * nb_hands + hand) * len(m_multiplex)
+                                               + m_pos[fmulti])
+                            sec_colors.append(colors[flying_time])
+                    for t1 in range(t, e + 1):
+                        indices.append(w_base + t1 * nb_hands + hand)
 
                     # On garde ça pour l'instant ...
-                    row.append(u_items[(throw.ball, throw.time, hand)])
+                    indices.append(u + (throw.time * nb_hands + hand) * nb_balls)
                     if flying_time == 1:
-                        row.append(u_items[(throw.ball,
-                                            throw.time + throw.max_height,
-                                            hand)])
-                    rows.append(row)
+                        indices.append(u + ((throw.time + throw.max_height) * nb_hands + hand)
+                                       * nb_balls)
+                    indptr.append(len(indices))
+                    sec_indptr.append(len(sec_indices))
+    rows: List[List[Union[Item, Tuple[Item, int]]]] = []
+    for r in range(len(indptr) - 1):
+        row: List[Union[Item, Tuple[Item, int]]] = \
+            [prim.items[i] for i in indices[indptr[r]:indptr[r + 1]]]
+        for j in range(sec_indptr[r], sec_indptr[r + 1]):
+            row.append((sec.items[sec_indices[j]], sec_colors[j]))
+        rows.append(row)
 
     colors_list: List[int] = [0 for i in range(k)]
     for h, clr in colors.items():
         colors_list[clr] = h
 
-    return ExactCoverInstance(prim_items=list(x_items.values())  # type: ignore
-                              + list(l_items.values())           # type: ignore
-                              + list(w_items.values())           # type: ignore
-                              + list(m_items.values())           # type: ignore
-                              + list(c_items.values())           # type: ignore
-                              + list(u_items.values())           # type: ignore
-                              + list(d_items.values()),          # type: ignore
-                              sec_items=list(m_items.values()),
+    return ExactCoverInstance(prim_items=prim.items,
+                              sec_items=sec.items,
                               colors=colors_list,
                               rows=rows,
+                              csr=(indptr, indices, sec_indptr, sec_indices, sec_colors),
                               params={
                                   'max_time': max_time,
                                   'max_weight': max_weight,
                                   'nb_hands': nb_hands,
-                                  'balls': balls})
+                                  'balls': balls,
+                                  'symmetric_hands': symmetric_hands})
+
+
+def permute_hands(item: Item, perm: Tuple[int, ...]) -> Item:
+    """ Renvoie une copie de `item` où la main h est remplacée par
+    `perm[h]`. """
+    if 'hand' not in item._fields:
+        return item
+    return item.replace(hand=perm[item.hand])
+
+
+def symmetric_solutions(sol: ExactCoverSolution) -> List[ExactCoverSolution]:
+    """ Renvoie les solutions obtenues en permutant les mains de `sol`
+    (`sol` comprise, en premier), sans doublons. Sert à retrouver toutes les
+    solutions à partir de celles d'une instance construite avec
+    `symmetric_hands=True`. """
+    sols = []
+    seen = set()
+    for perm in permutations(range(sol.params['nb_hands'])):
+        rows = []
+        for row in sol.rows:
+            new_row: List[Union[Item, Tuple[Item, int]]] = []
+            for item in row:
+                if isinstance(item, Item):
+                    new_row.append(permute_hands(item, perm))
+                else:
+                    it, clr = item
+                    new_row.append((permute_hands(it, perm), clr))
+            rows.append(new_row)
+        key = frozenset(str(item) for row in rows for item in row
+                        if isinstance(item, XItem))
+        if key not in seen:
+            seen.add(key)
+            sols.append(ExactCoverSolution(params=sol.params, rows=rows))
+    return sols
 
 
 def solve_exact_cover_with_milp(ec_instance: ExactCoverInstance,
                                 optimize: bool = False,
-                                maximize: List[int] = []) \
-        -> ExactCoverSolution:
+                                maximize: List[int] = [],
+                                backend: Optional[str] = None,
+                                warm_start: Optional[ExactCoverSolution] = None,
+                                time_limit: Optional[float] = None,
+                                mip_gap: Optional[float] = None,
+                                stats: Optional[Dict[str, Any]] = None) \
+        -> Optional[ExactCoverSolution]:
+    """ Résout `ec_instance` comme un programme linéaire en nombres entiers
+    (seuls les éléments primaires sont contraints). Si `optimize` est vrai,
+    le nombre de lancers multiplex est minimisé, puis celui des lancers
+    dont la hauteur n'est pas dans `maximize`. Avec `backend` à "sage", le
+    programme est construit contrainte par contrainte par Sage ; avec
+    "highs", il est assemblé en matrices creuses (cf. `milp_model`) et
+    résolu par HiGHS, sans Sage, et `None` est renvoyé s'il n'a pas de
+    solution.
+
+    Avec HiGHS, la résolution peut partir d'une solution de l'instance
+    `warm_start` (par exemple la première trouvée par DLX), s'arrêter après
+    `time_limit` secondes ou dès que l'écart relatif entre la meilleure
+    solution et la borne inférieure de l'objectif est au plus `mip_gap`.
+    La meilleure solution trouvée est alors renvoyée, et jamais une moins
+    bonne que `warm_start`. Par défaut, Sage est utilisé s'il est installé
+    et qu'aucune de ces options n'est donnée.
+
+    Si `stats` est donné, on y range l'issue de la résolution (`status` :
+    "optimal", à `mip_gap` près, "time limit", "infeasible" ou "error"),
+    l'objectif de la solution renvoyée (`objective`), la borne inférieure
+    (`bound`) et l'écart relatif entre les deux (`gap`). """
+    highs_only = warm_start is not None or time_limit is not None or mip_gap is not None
+    if backend is None:
+        backend = "sage" if MixedIntegerLinearProgram is not None and not highs_only \
+            else "highs"
+    if backend == "highs":
+        return _solve_exact_cover_with_highs(ec_instance, optimize, maximize, warm_start,
+                                             time_limit, mip_gap, stats)
+    if backend != "sage":
+        raise ValueError("backend inconnu : {}".format(backend))
+    if highs_only:
+        raise ValueError("warm_start, time_limit et mip_gap demandent backend=\"highs\"")
+    p, x = sage_milp_model(ec_instance, optimize, maximize)
+
+    # Résolution
+    objective = p.solve()
+    selected_rows = p.get_values(x)
+    if stats is not None:
+        stats.update(status="optimal", objective=objective, bound=objective, gap=0.0)
+
+    return ExactCoverSolution(rows=[ec_instance.rows[i]
+                                    for i in selected_rows if selected_rows[i] == 1.0],
+                              params=ec_instance.params)
+
+
+def sage_milp_model(ec_instance: ExactCoverInstance, optimize: bool = False,
+                    maximize: List[int] = []):
+    """ Construit le programme linéaire Sage de `solve_exact_cover_with_milp`
+    et renvoie ce programme et les variables des lignes. """
+    if MixedIntegerLinearProgram is None:
+        raise ImportError("Sage n'est pas installé, utiliser backend=\"highs\"")
     p = MixedIntegerLinearProgram(maximization=False)
 
     # Calcul, pour chaque colonne, des lignes qui ont un élément dans cette
@@ -461,15 +604,171 @@ def solve_exact_cover_with_milp(ec_instance: ExactCoverInstance,
         # Optimisation du score lié au jonglage
         # p.set_objective(max_expr + min_high - min_expr)
 
-    # Résolution
-    p.solve()
-    selected_rows = p.get_values(x)
+    return p, x
+
+
+def milp_model(ec_instance: ExactCoverInstance, optimize: bool = False,
+               maximize: List[int] = []) \
+        -> Tuple[np.ndarray, sparse.csr_matrix, np.ndarray, np.ndarray]:
+    """ Programme linéaire de `solve_exact_cover_with_milp` sous forme de
+    matrices (c, A, lower, upper) : minimiser c.v avec lower <= A v <= upper,
+    les variables v, toutes binaires, étant les lignes de l'instance puis,
+    si `optimize` est vrai, une variable o par élément w (la main contient
+    plusieurs balles). A est assemblée d'un bloc à partir de la matrice
+    d'incidence des éléments primaires et des lignes, dont seuls les
+    éléments qui apparaissent dans une ligne sont gardés. """
+    nb_rows = len(ec_instance.rows)
+    prim_items = ec_instance.prim_items
+    if ec_instance.csr is not None:
+        indptr, indices = ec_instance.csr[0], ec_instance.csr[1]
+    else:
+        prim_index = {id(item): k for k, item in enumerate(prim_items)}
+        indptr, indices = [0], []
+        for row in ec_instance.rows:
+            indices.extend(prim_index[id(item)] for item in row if isinstance(item, Item))
+            indptr.append(len(indices))
+    # incidence[k, r] vaut 1 si l'élément k est dans la ligne r
+    incidence = sparse.csr_matrix((np.ones(len(indices)), indices, indptr),
+                                  shape=(nb_rows, len(prim_items))).T.tocsr()
+    counts = np.diff(incidence.indptr)
+    used = counts > 0
+    low = np.array([item.bounds[0] for item in prim_items], dtype=float)
+    high = np.array([item.bounds[1] for item in prim_items], dtype=float)
+    A = incidence[used]
+    lower, upper = low[used], high[used]
+    c = np.zeros(nb_rows)
 
+    if optimize:
+        minimized = np.array([isinstance(item, XItem) and item.flying_time not in maximize
+                              for item in prim_items], dtype=bool)
+        c = np.asarray(incidence[minimized].sum(axis=0), dtype=float).ravel()
+        # o >= (somme des lignes de l'élément w - 1) / max_weight
+        weights = np.flatnonzero(used & np.array([isinstance(item, WItem)
+                                                  for item in prim_items], dtype=bool))
+        A = sparse.bmat([[A, None],
+                         [-incidence[weights],
+                          ec_instance.params['max_weight'] * sparse.identity(len(weights))]],
+                        format="csr")
+        lower = np.concatenate((lower, np.full(len(weights), -1.0)))
+        upper = np.concatenate((upper, np.full(len(weights), np.inf)))
+        c = np.concatenate((c, np.full(len(weights), float(counts[minimized].sum()))))
+    return c, A, lower, upper
+
+
+def milp_start(ec_instance: ExactCoverInstance, sol: ExactCoverSolution,
+               A: sparse.csr_matrix, nb_vars: int) -> np.ndarray:
+    """ Valeurs des variables de `milp_model` (de matrice `A`, avec `nb_vars`
+    variables) pour la solution `sol` : ses lignes, retrouvées dans
+    `ec_instance` par leurs éléments (ceux de `sol` peuvent venir de
+    `row_obj`, sans éléments w, cf. `dlx_solver_instance`), et les
+    variables o des éléments w couverts plusieurs fois. """
+    def key(row):
+        return tuple(sorted(id(item) for item in row
+                            if isinstance(item, Item) and not isinstance(item, WItem))) \
+            + tuple(sorted((id(item[0]), item[1]) for item in row if not isinstance(item, Item)))
+
+    index: Dict[Tuple, List[int]] = {}
+    for r, row in enumerate(ec_instance.rows):
+        index.setdefault(key(row), []).append(r)
+    nb_rows = len(ec_instance.rows)
+    v = np.zeros(nb_vars)
+    for row in sol.rows:
+        rows = index.get(key(row))
+        if not rows:
+            raise ValueError("milp_start : ligne absente de l'instance")
+        v[rows.pop()] = 1
+    if nb_vars > nb_rows:
+        # lignes des contraintes o - (somme des lignes) / max_weight >= -1 / max_weight
+        o_rows = A[A.shape[0] - (nb_vars - nb_rows):, :nb_rows]
+        v[nb_rows:] = -(o_rows @ v[:nb_rows]) > 1
+    return v
+
+
+def _solve_exact_cover_with_highs(ec_instance: ExactCoverInstance,
+                                  optimize: bool, maximize: List[int],
+                                  warm_start: Optional[ExactCoverSolution] = None,
+                                  time_limit: Optional[float] = None,
+                                  mip_gap: Optional[float] = None,
+                                  stats: Optional[Dict[str, Any]] = None) \
+        -> Optional[ExactCoverSolution]:
+    c, A, lower, upper = milp_model(ec_instance, optimize, maximize)
+    start = milp_start(ec_instance, warm_start, A, len(c)) if warm_start is not None else None
+    if len(c) == 0:
+        x, status, bound = np.zeros(0), "optimal", 0.0
+    elif highspy is not None:
+        x, status, bound = _run_highspy(c, A, lower, upper, start, time_limit, mip_gap)
+    else:
+        options: Dict[str, Any] = {}
+        if time_limit is not None:
+            options['time_limit'] = time_limit
+        if mip_gap is not None:
+            options['mip_rel_gap'] = mip_gap
+        res = milp(c, integrality=np.ones(len(c)), bounds=Bounds(0, 1),
+                   constraints=[LinearConstraint(A, lower, upper)] if A.shape[0] > 0 else [],
+                   options=options)
+        x = res.x
+        status = {0: "optimal", 1: "time limit", 2: "infeasible"}.get(res.status, "error")
+        bound = getattr(res, 'mip_dual_bound', None)
+        if bound is None:
+            bound = res.fun if res.status == 0 else -np.inf
+    # scipy.optimize.milp ne part pas de `warm_start`, qui reste la solution
+    # renvoyée si rien de mieux n'a été trouvé
+    if start is not None and (x is None or c @ start < c @ x):
+        x = start
+    if stats is not None:
+        objective = float(c @ x) if x is not None else None
+        gap = None
+        if objective is not None:
+            gap = 0.0 if objective <= bound \
+                else (objective - bound) / abs(objective) if objective != 0 else np.inf
+        stats.update(status=status, objective=objective, bound=bound, gap=gap)
+    if x is None:
+        return None
     return ExactCoverSolution(rows=[ec_instance.rows[i]
-                                    for i in selected_rows if selected_rows[i] == 1.0],
+                                    for i in np.flatnonzero(x[:len(ec_instance.rows)] > 0.5)],
                               params=ec_instance.params)
 
 
+def _run_highspy(c, A, lower, upper, start, time_limit, mip_gap):
+    """ Résout le programme de `milp_model` avec l'interface de HiGHS, qui
+    accepte une solution de départ. Renvoie les valeurs des variables
+    (`None` si aucune solution n'a été trouvée), l'issue de la résolution
+    et la borne inférieure de l'objectif. """
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    if time_limit is not None:
+        h.setOptionValue("time_limit", float(time_limit))
+    if mip_gap is not None:
+        h.setOptionValue("mip_rel_gap", float(mip_gap))
+    lp = highspy.HighsLp()
+    lp.num_col_ = len(c)
+    lp.num_row_ = A.shape[0]
+    lp.col_cost_ = c
+    lp.col_lower_ = np.zeros(len(c))
+    lp.col_upper_ = np.ones(len(c))
+    lp.row_lower_ = np.maximum(lower, -highspy.kHighsInf)
+    lp.row_upper_ = np.minimum(upper, highspy.kHighsInf)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    lp.integrality_ = [highspy.HighsVarType.kInteger] * len(c)
+    h.passModel(lp)
+    if start is not None:
+        sol = highspy.HighsSolution()
+        sol.col_value = list(start)
+        h.setSolution(sol)
+    h.run()
+    model_status = h.getModelStatus()
+    info = h.getInfo()
+    if model_status == highspy.HighsModelStatus.kInfeasible:
+        return None, "infeasible", np.inf
+    status = "optimal" if model_status == highspy.HighsModelStatus.kOptimal else "time limit"
+    if info.primal_solution_status != highspy.SolutionStatus.kSolutionStatusFeasible:
+        return None, status, info.mip_dual_bound
+    return np.array(h.getSolution().col_value), status, info.mip_dual_bound
+
+
 def exact_cover_solution_to_juggling_solution(sol: ExactCoverSolution):
     max_time = sol.params['max_time']
     nb_hands = sol.params['nb_hands']
@@ -501,6 +800,7 @@ def exact_cover_solution_to_juggling_solution(sol: ExactCoverSolution):
                                 for t1 in range(item.throw.time + item.throw.max_height, max_time + 1):
                                     in_hand[t1][h].add(item.throw.ball)
                                     hand[t1][item.throw.ball] = h
+                                break
     final_throws = []
     for row in sol.rows:
         for item in row:
@@ -516,41 +816,142 @@ def exact_cover_solution_to_juggling_solution(sol: ExactCoverSolution):
                             throws=final_throws)
 
 
-def dlx_solver_instance(ec_instance: ExactCoverInstance) -> DLXM:
-    dlx = DLXM()
-
-    primary = {}
-    secondary = dlx.new_variable(secondary=True)
-    vars = {}
-    for item in ec_instance.prim_items:
-        if item.bounds not in vars:
-            vars[item.bounds] = dlx.new_variable(item.bounds[0], item.bounds[1])
-        primary[item] = vars[item.bounds][item]
-
-    for row in ec_instance.rows:
-        row_primary = []
-        row_secondary = []
-        for item in row:
-            if isinstance(item, Item):
-                row_primary.append(primary[item])
-            else:
-                it, clr = item
-                row_secondary.append((secondary[it], clr))
-        dlx.add_row(row_primary, row_secondary)
+def dlx_solver_instance(ec_instance: ExactCoverInstance,
+                        timelines: bool = False) -> IntDLXM:
+    """ Construit l'instance DLX de `ec_instance`. Si `timelines` est vrai,
+    les éléments w d'une main sont remplacés par une ressource de capacité
+    `max_weight` (cf. `DLXM.new_timeline`) : chaque ligne utilise
+    l'intervalle des instants où la balle est dans la main au lieu d'un
+    élément par instant, ce qui raccourcit les lignes d'autant plus que les
+    lancers sont hauts. Les lignes renvoyées par `row_obj` n'ont alors plus
+    d'éléments w. """
+    # Éléments w remplacés par des ressources : ceux dont les bornes sont
+    # celles des autres éléments w de leur main (les autres, restreints par
+    # une réduction de l'instance, restent des éléments)
+    capacity: Dict[int, int] = {}
+    if timelines:
+        for item in ec_instance.prim_items:
+            if isinstance(item, WItem) and item.bounds[0] == 0:
+                capacity[item.hand] = max(capacity.get(item.hand, 0), item.bounds[1])
+    converted = np.array([isinstance(item, WItem) and item.bounds == (0, capacity.get(item.hand))
+                          for item in ec_instance.prim_items], dtype=bool)
+
+    # Les éléments primaires sont regroupés par bornes : `pos[k]` est le
+    # numéro dans l'instance DLX de l'élément `ec_instance.prim_items[k]`
+    by_bounds: Dict[Tuple[int, int], List[int]] = {}
+    for k, item in enumerate(ec_instance.prim_items):
+        if not converted[k]:
+            by_bounds.setdefault(item.bounds, []).append(k)
+    order = [k for ks in by_bounds.values() for k in ks]
+    primary_items = [ec_instance.prim_items[k] for k in order]
+    pos = np.full(len(ec_instance.prim_items), -1, dtype=np.int64)
+    pos[order] = np.arange(len(order))
+    if ec_instance.csr is not None:
+        indptr, indices, sec_indptr, sec_indices, sec_colors = ec_instance.csr
+        secondary_items = ec_instance.sec_items
+    else:
+        # Les lignes sont mises au format CSR, les éléments secondaires étant
+        # numérotés dans l'ordre de leur première apparition
+        prim_index = {id(item): k for k, item in enumerate(ec_instance.prim_items)}
+        secondary_items = []
+        secondary_pos: Dict[int, int] = {}
+        indptr, indices = [0], []
+        sec_indptr, sec_indices, sec_colors = [0], [], []
+        for row in ec_instance.rows:
+            for item in row:
+                if isinstance(item, Item):
+                    indices.append(prim_index[id(item)])
+                else:
+                    it, clr = item
+                    if id(it) not in secondary_pos:
+                        secondary_pos[id(it)] = len(secondary_items)
+                        secondary_items.append(it)
+                    sec_indices.append(secondary_pos[id(it)])
+                    sec_colors.append(clr)
+            indptr.append(len(indices))
+            sec_indptr.append(len(sec_indices))
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+
+    intervals = None
+    hands = sorted(capacity)
+    if converted.any():
+        # Les éléments w de chaque ligne sont regroupés en intervalles
+        # d'instants consécutifs d'une même main
+        hand_of = np.array([hands.index(item.hand) if converted[k] else -1
+                            for k, item in enumerate(ec_instance.prim_items)])
+        time_of = np.array([item.time if converted[k] else -1
+                            for k, item in enumerate(ec_instance.prim_items)])
+        nb_rows = len(indptr) - 1
+        row_of = np.repeat(np.arange(nb_rows), np.diff(indptr))
+        w = converted[indices]
+        r, h, t = row_of[w], hand_of[indices[w]], time_of[indices[w]]
+        by_time = np.lexsort((t, h, r))
+        r, h, t = r[by_time], h[by_time], t[by_time]
+        new = np.ones(len(r), dtype=bool)
+        new[1:] = (r[1:] != r[:-1]) | (h[1:] != h[:-1]) | (t[1:] != t[:-1] + 1)
+        starts = np.flatnonzero(new)
+        ends = np.append(starts[1:], len(r)) - 1
+        intervals = (np.concatenate(([0], np.cumsum(np.bincount(r[starts], minlength=nb_rows)))),
+                     h[starts], t[starts], t[ends])
+        indices = indices[~w]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(row_of[~w], minlength=nb_rows))))
+
+    dlx = IntDLXM([item.bounds[0] for item in primary_items],
+                  [item.bounds[1] for item in primary_items],
+                  len(secondary_items),
+                  primary_objs=primary_items,
+                  secondary_objs=secondary_items)
+    if intervals is not None:
+        length = int(time_of.max()) + 1
+        for hand in hands:
+            dlx.new_timeline(capacity[hand], length)
+    dlx.add_rows(indptr, pos[indices], sec_indptr, sec_indices, sec_colors,
+                 intervals)
 
     dlx.compile()
 
     return dlx
 
 
+def item_time(item: Item) -> int:
+    """ Renvoie l'instant concerné par un élément de l'instance. """
+    if isinstance(item, (XItem, LItem)):
+        return item.throw.time
+    return item.time
+
+
+def set_dlx_strategy(dlx: IntDLXM, ec_instance: ExactCoverInstance,
+                     maximize: List[int] = [], earliest_first: bool = False):
+    """ Choisit la stratégie de recherche de `dlx` : les éléments x des
+    lancers de hauteur dans `maximize` sont couverts en premier, puis, si
+    `earliest_first` est vrai, les éléments sont couverts par ordre
+    chronologique. """
+    if not any(isinstance(item, XItem) for item in dlx.primary_objs):
+        raise Exception("No x variables.")
+
+    maximized_xvars = []
+    for k, item in enumerate(dlx.primary_objs):
+        if isinstance(item, XItem) and item.flying_time in maximize:
+            maximized_xvars.append(k)
+
+    keys = {}
+    if earliest_first:
+        for k, item in enumerate(dlx.primary_objs):
+            # les numéros libres d'une `IncrementalExactCover` n'ont pas d'objet
+            if item is not None:
+                keys[k] = item_time(item)
+
+    dlx.set_strategy(priority=maximized_xvars, keys=keys)
+
+
 def all_solutions_with_dlx(ec_instance: ExactCoverInstance,
-                           maximize: List[int] = []) \
+                           maximize: List[int] = [],
+                           earliest_first: bool = False) \
         -> List[ExactCoverSolution]:
 
-    cppyy.cppdef(_choose_model)
-
     dlx = dlx_solver_instance(ec_instance)
-    dlx.set_choose_function(cppyy.gbl.choose)
+    set_dlx_strategy(dlx, ec_instance, maximize, earliest_first)
 
     sols_selected_rows = dlx.all_solutions()
     sols = []
@@ -563,7 +964,27 @@ def all_solutions_with_dlx(ec_instance: ExactCoverInstance,
     return sols
 
 
-def check_hand_position(sol: ExactCoverSolution):
+def exact_cover_zdd(ec_instance: ExactCoverInstance) -> SolutionZDD:
+    """ Construit le ZDD de toutes les solutions de `ec_instance`, sans
+    vérification des positions des balles dans les mains. Le numéro de ligne
+    r du diagramme désigne `ec_instance.rows[r]` (cf. `zdd_solution`). Les
+    lignes étant générées par date de lancer, seuls les éléments des
+    instants proches de la ligne courante sont actifs à un moment donné. """
+    return dlx_solver_instance(ec_instance).zdd()
+
+
+def zdd_solution(ec_instance: ExactCoverInstance,
+                 selected_rows: Set[int]) -> ExactCoverSolution:
+    """ Solution correspondant à un ensemble de lignes du ZDD. """
+    return ExactCoverSolution(params=ec_instance.params,
+                              rows=[ec_instance.rows[r] for r in sorted(selected_rows)])
+
+
+def check_hand_position_bfs(sol: ExactCoverSolution):
+    """ Version d'origine de `check_hand_position`, par parcours en largeur
+    sans mémoïsation (la file peut croître exponentiellement avec la durée
+    des périodes sans lancer). Seule la première main est vérifiée. Elle
+    est conservée comme référence pour `test_hand_position.py`. """
     max_time = sol.params['max_time']
     nb_hands = sol.params['nb_hands']
     max_weight = sol.params['max_weight']
@@ -653,48 +1074,1245 @@ def check_hand_position(sol: ExactCoverSolution):
         return False
 
 
-def get_solution_with_dlx(ec_instance: ExactCoverInstance,
-                          maximize: List[int] = []) \
-        -> ExactCoverSolution:
-
-    global _choose_counter
-    _choose_counter += 1
-
-    dlx = dlx_solver_instance(ec_instance)
-
-    maximized_xvars: List[int] = []
-    pvar = dlx.primary_variables(0, 1)
-    if pvar is None:
-        raise Exception("No x variables.")
-    for item in ec_instance.prim_items:
-        if isinstance(item, XItem):
-            if item.flying_time in maximize:
-                maximized_xvars.append(pvar[item].get_id())
+def hand_orders(throws: List[Tuple[int, int, str]], locks: Set[int],
+                start: int, end: int) -> Optional[List[Tuple[str, ...]]]:
+    """ Cherche un ordre des balles d'une main à chaque instant de `start`
+    à `end`. `throws` donne, pour chaque passage d'une balle dans la main,
+    l'instant où elle y arrive (0 si elle y est au départ), l'instant où
+    elle est lancée et son nom. `locks` contient d'autres instants où la
+    main est occupée.
+
+    La main contient une file de balles : les balles lancées à l'instant t
+    doivent être en tête de file et celles qui arrivent à t + 1 sont
+    ajoutées en fin de file. Aux instants où la main ne lance ni ne reçoit
+    rien, elle peut faire passer la balle de tête en fin de file. Les files
+    possibles sont calculées instant par instant, sans doublons : leur
+    nombre ne dépend que du nombre de balles dans la main, si bien que le
+    calcul est linéaire en la durée.
+
+    Renvoie la suite des files (la tête en premier), ou `None` s'il n'y en
+    a pas. """
+    catches: Dict[int, List[str]] = {}
+    thrown: Dict[int, Set[str]] = {}
+    for c, e, ball in throws:
+        catches.setdefault(c, []).append(ball)
+        thrown.setdefault(e, set()).add(ball)
+    locked = set(locks) | set(thrown) | {c for c in catches if c > 0}
+
+    # files possibles à l'instant t, avec la file de l'instant précédent
+    # dont elles proviennent
+    states: Dict[Tuple[str, ...], Optional[Tuple[str, ...]]] = \
+        {state: None for state in permutations(catches.get(start, []))}
+    layers = [states]
+    for t in range(start, end + 1):
+        balls = thrown.get(t, set())
+        n = len(balls)
+        new_states: Dict[Tuple[str, ...], Optional[Tuple[str, ...]]] = {}
+        for state in states:
+            if set(state[:n]) != balls:
+                continue
+            rest = state[n:]
+            nexts = [rest]
+            if t not in locked and len(rest) > 1:
+                nexts.append(rest[1:] + rest[:1])
+            if t == end:
+                new_states.setdefault(rest, state)
+                continue
+            for perm in permutations(catches.get(t + 1, [])):
+                for nxt in nexts:
+                    new_states.setdefault(nxt + perm, state)
+        if len(new_states) == 0:
+            return None
+        states = new_states
+        layers.append(states)
+
+    # Reconstruction d'une suite de files en remontant les prédécesseurs
+    orders = []
+    state: Optional[Tuple[str, ...]] = next(iter(layers[-1]))
+    for k in range(len(layers) - 1, 0, -1):
+        state = layers[k][state]  # type: ignore
+        orders.append(state)
+    orders.reverse()
+    return orders  # type: ignore
+
+
+def hand_schedules(sol: ExactCoverSolution) \
+        -> List[Tuple[List[Tuple[int, int, str]], Set[int]]]:
+    """ Renvoie, pour chaque main, les passages des balles dans la main et
+    les autres instants où elle est occupée (cf. `hand_orders`). La main qui
+    reçoit chaque balle après son dernier lancer est la première qui peut la
+    garder jusqu'à la fin ; ces balles sont seulement tenues et ne comptent
+    pas dans l'ordre de la main. Lève `ImpossibleHandPosition` si aucune
+    main ne peut recevoir une balle. """
+    max_time = sol.params['max_time']
+    nb_hands = sol.params['nb_hands']
+    max_weight = sol.params['max_weight']
+    weight: List[List[int]] = [[0 for _ in range(nb_hands)]
+                               for _ in range(max_time + 1)]
+    hand: List[Dict[str, int]] = [{} for _ in range(max_time + 1)]
+    schedules: List[Tuple[List[Tuple[int, int, str]], Set[int]]] = \
+        [([], set()) for _ in range(nb_hands)]
+
+    x_items = [item for row in sol.rows for item in row
+               if isinstance(item, XItem)]
+    for item in x_items:
+        c = item.throw.time
+        e = c + item.throw.max_height - item.flying_time
+        for t in range(c, e + 1):
+            weight[t][item.hand] += 1
+            hand[t][item.throw.ball] = item.hand
+        schedules[item.hand][0].append((c, e, item.throw.ball))
+    for item in x_items:
+        landing = item.throw.time + item.throw.max_height
+        if item.throw.ball in hand[landing]:
+            continue
+        # dernier lancer de la balle : il faut choisir la main qui la reçoit
+        for h in range(nb_hands):
+            if item.flying_time == 1 and h == hand[item.throw.time][item.throw.ball]:
+                continue
+            if all(weight[t][h] < max_weight for t in range(landing, max_time + 1)):
+                break
+        else:
+            raise ImpossibleHandPosition()
+        schedules[h][1].add(landing)
+        for t in range(landing, max_time + 1):
+            weight[t][h] += 1
+            hand[t][item.throw.ball] = h
+    return schedules
+
+
+def hand_positions(sol: ExactCoverSolution) \
+        -> Optional[List[List[Tuple[str, ...]]]]:
+    """ Renvoie, pour chaque main et chaque instant, l'ordre des balles dans
+    la main (cf. `hand_orders`), ou `None` si les lancers de `sol` ne
+    peuvent pas être réalisés. """
+    orders = []
+    for throws, locks in hand_schedules(sol):
+        hand_order = hand_orders(throws, locks, 0, sol.params['max_time'])
+        if hand_order is None:
+            return None
+        orders.append(hand_order)
+    return orders
+
+
+def check_hand_position(sol: ExactCoverSolution) -> bool:
+    return hand_positions(sol) is not None
+
+
+class HandPositionPropagator(object):
+    """ Propagateur (cf. `DLXM.set_propagator`) qui rejette une ligne dès
+    que les lancers déjà choisis pour sa main ne peuvent plus être ordonnés
+    dans la main (cf. `hand_orders`). Retirer des balles d'une suite de
+    files valide en donne une autre : si les lancers déjà choisis ne
+    peuvent pas être ordonnés, aucune solution complétant la solution
+    partielle ne peut convenir. Les balles reçues après leur dernier lancer,
+    dont la main n'est choisie qu'une fois la solution complète, sont
+    ignorées, ainsi que les lignes désactivées (cf. `DLXM.set_rows_active`). """
+
+    def __init__(self, dlx: IntDLXM):
+        # main, instant de réception, instant de lancer et balle de chaque
+        # ligne
+        self.throws: List[Optional[Tuple[int, int, int, str]]] = []
+        for i in range(len(dlx.rows)):
+            throw = None
+            if i not in dlx.inactive_rows:
+                for item in dlx.row_obj(i):
+                    if isinstance(item, XItem):
+                        throw = (item.hand, item.throw.time,
+                                 item.throw.time + item.throw.max_height - item.flying_time,
+                                 item.throw.ball)
+                        break
+            self.throws.append(throw)
+        # passages choisis dans chaque main, avec leur profondeur
+        self.chosen: Dict[int, List[Tuple[int, Tuple[int, int, str]]]] = {}
+
+    def __call__(self, row: int, k: int) -> bool:
+        hand, c0, e0, ball0 = self.throws[row]  # type: ignore
+        for chosen in self.chosen.values():
+            while len(chosen) > 0 and chosen[-1][0] >= k:
+                chosen.pop()
+        chosen = self.chosen.setdefault(hand, [])
+        chosen.append((k, (c0, e0, ball0)))
+        throws = sorted(passage for _, passage in chosen)
+        # Quand la main est vide à un instant, les balles passées avant et
+        # celles passées après n'interagissent pas : seul le bloc de
+        # passages qui se chevauchent contenant la nouvelle ligne est vérifié,
+        # les autres l'ayant déjà été
+        block: List[Tuple[int, int, str]] = []
+        end = -1
+        found = False
+        for c, e, ball in throws:
+            if c > end:
+                if found:
+                    break
+                block = []
+            block.append((c, e, ball))
+            end = max(end, e)
+            found = found or (c, e, ball) == (c0, e0, ball0)
+        return hand_orders(block, set(), block[0][0], end) is not None
+
+
+def valid_solution(dlx: IntDLXM, ec_instance: ExactCoverInstance,
+                   sol: Set[int]) -> Optional[ExactCoverSolution]:
+    """ Renvoie la solution formée des lignes `sol` de `dlx` si elle
+    respecte les contraintes sur les mains, `None` sinon (y compris si une
+    balle ne peut être reçue par aucune main). Si l'instance a été
+    construite avec `symmetric_hands=True`, renvoie la première de ses
+    variantes symétriques qui les respecte. """
+    rows = []
+    for i in sol:
+        rows.append(dlx.row_obj(i))
+    # Les mains de réception des derniers lancers sont choisies dans l'ordre
+    # des lignes, qui doit être chronologique : ce n'est pas le cas des
+    # numéros de lignes d'une `IncrementalExactCover`
+    rows.sort(key=lambda row: item_time(row[0]))  # type: ignore
+    return valid_variant(ec_instance,
+                         ExactCoverSolution(params=ec_instance.params, rows=rows))
+
+
+def valid_variant(ec_instance: ExactCoverInstance,
+                  ec_sol: ExactCoverSolution) -> Optional[ExactCoverSolution]:
+    """ Renvoie `ec_sol`, ou sa première variante symétrique si l'instance
+    a été construite avec `symmetric_hands=True`, qui respecte les
+    contraintes sur les mains, `None` s'il n'y en a pas. """
+    variants = [ec_sol]
+    if ec_instance.params.get('symmetric_hands', False):
+        variants = symmetric_solutions(ec_sol)
+    for variant in variants:
+        try:
+            if check_hand_position(variant):
+                return variant
+        except ImpossibleHandPosition:
+            pass
+    return None
 
-    if maximized_xvars == []:
-        cppyy.cppdef(_choose_model.format(str(_choose_counter), ""))
-    else:
-        max = _maximize_model.format(", ".join([str(x) for x in maximized_xvars]))
-        cppyy.cppdef(_choose_model.format(str(_choose_counter), max))
 
-    dlx.set_choose_function(getattr(cppyy.gbl, 'choose_' + str(_choose_counter)))
+def first_valid_solution_with_dlx(dlx: IntDLXM, ec_instance: ExactCoverInstance,
+                                  timeout: Optional[float] = None,
+                                  seed: Optional[int] = None) \
+        -> Optional[ExactCoverSolution]:
+    """ Renvoie la première solution de `dlx` qui respecte les contraintes
+    sur les mains (cf. `valid_solution`), ou `None` s'il n'y en a pas, si la
+    recherche a duré plus de `timeout` secondes ou si elle a été annulée
+    (`dlx.status` donne la raison). Si `seed` est donné, la recherche est
+    aléatoire avec redémarrages (cf. `DLXM.search_with_restarts`). """
+    if seed is not None:
+        sol = dlx.search_with_restarts(
+            seed, accept=lambda sol: valid_solution(dlx, ec_instance, sol) is not None,
+            timeout=timeout)
+        return None if sol is None else valid_solution(dlx, ec_instance, sol)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        remaining = None
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 1e-6)
+        sol = dlx.search(timeout=remaining)
+        if sol is None:
+            return None
+
+        ec_sol = valid_solution(dlx, ec_instance, sol)
+        if ec_sol is not None:
+            return ec_sol
+
+
+def set_dlx_costs(dlx: IntDLXM, maximize: List[int]):
+    """ Donne à `dlx` l'objectif de `solve_exact_cover_with_milp` : chaque
+    ligne coûte 1 si la durée de vol de son lancer n'est pas dans
+    `maximize`, et chaque élément w (ou instant d'une ressource, cf.
+    `dlx_solver_instance`) couvert par plusieurs lignes coûte autant que
+    toutes les lignes réunies, de sorte que le nombre de mains contenant
+    plusieurs balles est minimisé en premier, comme dans `milp_model`. Chaque ligne contient
+    un seul élément L, ce qui permet de les utiliser pour la borne
+    inférieure. """
+    costs = []
+    for i in range(len(dlx.rows)):
+        cost = 1
+        for item in dlx.row_obj(i):
+            if isinstance(item, XItem) and item.flying_time in maximize:
+                cost = 0
+        costs.append(cost)
+    l_items = [k for k, item in enumerate(dlx.primary_objs)
+               if isinstance(item, LItem)]
+    w_items = [k for k, item in enumerate(dlx.primary_objs)
+               if isinstance(item, WItem)]
+    hold_cost = sum(cost for i, cost in enumerate(costs) if i not in dlx.inactive_rows)
+    dlx.set_costs(costs, bound_items=l_items, hold_items=w_items,
+                  hold_timelines=range(len(dlx.timelines)), hold_cost=hold_cost)
+
+
+def best_valid_solution_with_dlx(dlx: IntDLXM, ec_instance: ExactCoverInstance,
+                                 maximize: List[int],
+                                 timeout: Optional[float] = None) \
+        -> Optional[ExactCoverSolution]:
+    """ Renvoie une solution de `dlx` qui respecte les contraintes sur les
+    mains et minimise l'objectif de `solve_exact_cover_with_milp` (cf.
+    `set_dlx_costs`), par séparation et évaluation (cf. `DLXM.optimize`).
+    Après `timeout` secondes, renvoie la meilleure solution trouvée ;
+    `dlx.status` indique si elle est optimale. """
+    set_dlx_costs(dlx, maximize)
+    sol = dlx.optimize(
+        accept=lambda sol: valid_solution(dlx, ec_instance, sol) is not None,
+        timeout=timeout)
+    return None if sol is None else valid_solution(dlx, ec_instance, sol)
 
-    sol = dlx.search()
 
-    rows = []
-    for i in sol:
-        rows.append(dlx.row_obj(i))
-    ec_sol = ExactCoverSolution(params=ec_instance.params,
-                                rows=rows)
+def get_solution_with_dlx(ec_instance: ExactCoverInstance,
+                          maximize: List[int] = [],
+                          earliest_first: bool = False,
+                          timeout: Optional[float] = None,
+                          seed: Optional[int] = None,
+                          propagate: bool = True,
+                          optimize: bool = False,
+                          timelines: bool = False) \
+        -> Optional[ExactCoverSolution]:
+    """ Renvoie une solution de `ec_instance` qui respecte les contraintes
+    sur les mains (cf. `first_valid_solution_with_dlx`), ou, si `optimize`
+    est vrai, la meilleure au sens de `best_valid_solution_with_dlx`. Si
+    `propagate` est vrai, l'ordre des balles dans chaque main est vérifié
+    pendant la recherche (cf. `HandPositionPropagator`). Pour `timelines`,
+    voir `dlx_solver_instance`. """
+    dlx = dlx_solver_instance(ec_instance, timelines)
+    set_dlx_strategy(dlx, ec_instance, maximize, earliest_first)
+    if propagate:
+        dlx.set_propagator(HandPositionPropagator(dlx))
 
-    while not check_hand_position(ec_sol):
-        sol = dlx.search()
+    if optimize:
+        return best_valid_solution_with_dlx(dlx, ec_instance, maximize, timeout)
+    return first_valid_solution_with_dlx(dlx, ec_instance, timeout, seed)
+
+
+class IncrementalExactCover(object):
+    """ Instance de couverture exacte d'un morceau que l'on modifie petit à
+    petit, avec les mêmes éléments et les mêmes lignes que
+    `throws_to_extended_exact_cover` (sans élimination des symétries).
+
+    À chaque appel à `update`, la nouvelle liste de lancers est comparée à
+    la précédente et seules les lignes des lancers ajoutés ou retirés
+    changent : la structure DLX compilée `dlx` est modifiée sur place (cf.
+    `DLXM.set_rows_active` et `IntDLXM.set_item`) au lieu d'être
+    reconstruite. Les lignes d'un lancer retiré sont désactivées, et
+    réactivées s'il est remis alors que ses éléments n'ont pas changé de
+    numéro ; celles d'un nouveau lancer sont ajoutées à la fin. Un élément
+    qui n'apparaît plus dans aucune ligne active est désactivé et son
+    numéro peut être repris par un nouvel élément, en commençant par ceux
+    qu'aucune ligne désactivée n'utilise. La structure n'est
+    reconstruite que s'il n'y a plus de numéro libre ou si les lignes
+    désactivées deviennent trop nombreuses. Les clés des éléments sont
+    leur classe suivie de leurs paramètres.
+
+    `solve` cherche ensuite une solution en ne remettant en cause que les
+    lancers proches des instants modifiés. """
+
+    def __init__(self, nb_hands: int, H: int, max_weight: int,
+                 forbidden_multiplex: List[Tuple[int, ]],
+                 multiple_throws: bool = True):
+        self.nb_hands = nb_hands
+        self.H = H
+        self.max_weight = max_weight
+        self.forbidden_multiplex = list(forbidden_multiplex)
+        self.multiple_throws = multiple_throws
+        self.fmultiplex: Dict[int, List[Tuple[int, ]]] = {i: [] for i in range(1, H + 1)}
+        self.fflying_time: Set[int] = set()
+        for fm in forbidden_multiplex:
+            if len(fm) == 2:
+                self.fmultiplex[fm[0]].append(fm)
+                if fm[0] != fm[1]:
+                    self.fmultiplex[fm[1]].append(fm)
+            elif len(fm) == 1:
+                self.fflying_time.add(fm[0])
+            elif len(fm) > 2:
+                raise Exception("Erreur: l'interdiction de lancers multiplex de taille > 2 n'est pas supportée.")
+        self.dlx: Optional[IntDLXM] = None
+        self.balls: Set[str] = set()
+        self.stats = {'rebuilds': 0, 'added': 0, 'removed': 0, 'restored': 0}
+
+    def matches(self, nb_hands: int, H: int, max_weight: int,
+                forbidden_multiplex: List[Tuple[int, ]],
+                multiple_throws: bool = True) -> bool:
+        """ Indique si la session a été créée avec ces paramètres. """
+        return (self.nb_hands, self.H, self.max_weight,
+                self.forbidden_multiplex, self.multiple_throws) \
+            == (nb_hands, H, max_weight, list(forbidden_multiplex), multiple_throws)
+
+    def _throw_rows(self, throw: Throw) \
+            -> List[Tuple[List[Tuple[Any, ...]], List[Tuple[Tuple[Any, ...], int]]]]:
+        """ Lignes du lancer `throw`, dans l'ordre de
+        `throws_to_extended_exact_cover`, les éléments étant donnés par leur
+        clé. """
         rows = []
-        for i in sol:
-            rows.append(dlx.row_obj(i))
-        ec_sol = ExactCoverSolution(params=ec_instance.params,
-                                    rows=rows)
-    return ec_sol
+        for hand in range(self.nb_hands):
+            for flying_time in range(1, min(self.H, throw.max_height) + 1):
+                if flying_time in self.fflying_time:
+                    continue
+                e = throw.time + throw.max_height - flying_time
+                prim: List[Tuple[Any, ...]] = [(XItem, throw, hand, flying_time),
+                                               (LItem, throw)]
+                sec: List[Tuple[Tuple[Any, ...], int]] = []
+                if not self.multiple_throws:
+                    prim.append((CItem, e, hand))
+                for fmulti in self.fmultiplex[flying_time]:
+                    if fmulti[0] == fmulti[1]:
+                        prim.append((DItem, e, hand, fmulti))
+                    else:
+                        sec.append(((MItem, e, hand, fmulti), flying_time))
+                for t1 in range(throw.time, e + 1):
+                    prim.append((WItem, self.max_weight, t1, hand))
+                prim.append((UItem, throw.time, throw.ball, hand))
+                if flying_time == 1:
+                    prim.append((UItem, throw.time + throw.max_height, throw.ball, hand))
+                rows.append((prim, sec))
+        return rows
+
+    def update(self, balls: Set[str], throws: List[List[Throw]]) -> ExactCoverInstance:
+        """ Remplace les lancers de l'instance par `throws` et renvoie
+        l'instance obtenue (cf. `instance`). Les instants concernés par les
+        lancers ajoutés ou retirés sont donnés par `changed`. """
+        new_throws = list(dict.fromkeys(throw for ts in throws for throw in ts))
+        self.balls = balls
+        if self.dlx is None:
+            self.changed = range(0, max((throw.time + throw.max_height for throw in new_throws),
+                                        default=0) + 1)
+            self._rebuild(new_throws)
+            return self.instance()
+        kept = set(new_throws)
+        removed = [throw for throw in self.rows_of if throw not in kept]
+        added = [throw for throw in new_throws if throw not in self.rows_of]
+        self.changed = range(min((throw.time for throw in removed + added), default=0),
+                             max((throw.time + throw.max_height + 1 for throw in removed + added),
+                                 default=0))
+        # Les coûts imposent de reconstruire la structure quand des lignes
+        # sont ajoutées (cf. `DLXM._compiled`) : ils sont redonnés à chaque
+        # recherche
+        self.dlx.set_costs(None)
+        for throw in removed:
+            self._hide(throw)
+        try:
+            self._append([throw for throw in added if not self._restore(throw)])
+        except IndexError:
+            # plus de numéro libre
+            self._rebuild(new_throws)
+            return self.instance()
+        if len(self.dlx.rows) > 2 * sum(len(rs) for rs in self.rows_of.values()) + 64:
+            self._rebuild(new_throws)
+        return self.instance()
+
+    def _rebuild(self, throws: List[Throw]):
+        """ Reconstruit la structure DLX, en prévoyant des numéros libres
+        pour les éléments à venir. """
+        rows = {throw: self._throw_rows(throw) for throw in throws}
+        prim_keys = list(dict.fromkeys(key for rs in rows.values() for p, _ in rs for key in p))
+        sec_keys = list(dict.fromkeys(key for rs in rows.values() for _, s in rs for key, _ in s))
+        self.keys: List[Optional[Tuple[Any, ...]]] = \
+            prim_keys + [None] * (len(prim_keys) // 2 + 16)
+        self.sec_keys: List[Optional[Tuple[Any, ...]]] = \
+            sec_keys + [None] * (len(sec_keys) // 2 + 16 if len(sec_keys) > 0 else 0)
+        self.slot = {key: k for k, key in enumerate(prim_keys)}
+        self.sec_slot = {key: k for k, key in enumerate(sec_keys)}
+        self.count = [0] * len(self.keys)
+        self.sec_count = [0] * len(self.sec_keys)
+        # nombre de lignes désactivées de chaque élément, dont le numéro
+        # n'est repris qu'en dernier recours
+        self.held = [0] * len(self.keys)
+        self.sec_held = [0] * len(self.sec_keys)
+        # numéros libres, les plus anciens en premier
+        self.idle = dict.fromkeys(range(len(prim_keys), len(self.keys)))
+        self.sec_idle = dict.fromkeys(range(len(sec_keys), len(self.sec_keys)))
+        self.rows_of: Dict[Throw, List[int]] = {}
+        self.hidden: Dict[Throw, List[int]] = {}
+
+        objs: List[Optional[Item]] = [key[0](*key[1:]) for key in prim_keys]
+        objs.extend(None for _ in self.idle)
+        sec_objs: List[Optional[Item]] = [key[0](*key[1:]) for key in sec_keys]
+        sec_objs.extend(None for _ in self.sec_idle)
+        self.dlx = IntDLXM([0 if obj is None else obj.bounds[0] for obj in objs],
+                           [1 if obj is None else obj.bounds[1] for obj in objs],
+                           len(sec_objs), primary_objs=objs, secondary_objs=sec_objs)
+        for k in self.idle:
+            self.dlx.set_item(k, 0, 1, active=False)
+        self._append(throws, rows)
+        self.dlx.compile()
+        self.stats['rebuilds'] += 1
+
+    def _append(self, throws: List[Throw],
+                rows: Optional[Dict[Throw, List[Tuple[List[Tuple[Any, ...]],
+                                                      List[Tuple[Tuple[Any, ...], int]]]]]] = None):
+        """ Ajoute à la fin de `dlx` les lignes des lancers `throws`. """
+        indptr, indices = [0], []
+        sec_indptr, sec_indices, sec_colors = [0], [], []
+        r = len(self.dlx.rows)
+        for throw in throws:
+            throw_rows = rows[throw] if rows is not None else self._throw_rows(throw)
+            self.rows_of[throw] = list(range(r, r + len(throw_rows)))
+            r += len(throw_rows)
+            for prim, sec in throw_rows:
+                indices.extend(self._take(key) for key in prim)
+                for key, clr in sec:
+                    sec_indices.append(self._take_secondary(key))
+                    sec_colors.append(clr)
+                indptr.append(len(indices))
+                sec_indptr.append(len(sec_indices))
+        if len(indptr) > 1:
+            self.dlx.add_rows(indptr, indices, sec_indptr, sec_indices, sec_colors)
+        self.stats['added'] += len(throws)
+
+    def _take(self, key: Tuple[Any, ...]) -> int:
+        """ Numéro de l'élément primaire `key`, attribué au besoin, dont le
+        compteur de lignes actives est augmenté. """
+        k = self.slot.get(key)
+        if k is None:
+            if len(self.idle) == 0:
+                raise IndexError("plus de numéro libre")
+            k = next((k for k in self.idle if self.held[k] == 0), next(iter(self.idle)))
+            if self.keys[k] is not None:
+                del self.slot[self.keys[k]]
+            self.keys[k] = key
+            self.slot[key] = k
+            obj = key[0](*key[1:])
+            del self.idle[k]
+            self.dlx.set_item(k, obj.bounds[0], obj.bounds[1], obj=obj)  # type: ignore
+        elif k in self.idle:
+            del self.idle[k]
+            bounds = self.dlx.primary_objs[k].bounds  # type: ignore
+            self.dlx.set_item(k, bounds[0], bounds[1])  # type: ignore
+        self.count[k] += 1
+        return k
+
+    def _take_secondary(self, key: Tuple[Any, ...]) -> int:
+        k = self.sec_slot.get(key)
+        if k is None:
+            if len(self.sec_idle) == 0:
+                raise IndexError("plus de numéro libre")
+            k = next((k for k in self.sec_idle if self.sec_held[k] == 0),
+                     next(iter(self.sec_idle)))
+            if self.sec_keys[k] is not None:
+                del self.sec_slot[self.sec_keys[k]]
+            self.sec_keys[k] = key
+            self.sec_slot[key] = k
+            self.dlx.secondary_objs[k] = key[0](*key[1:])  # type: ignore
+        self.sec_idle.pop(k, None)
+        self.sec_count[k] += 1
+        return k
+
+    def _hide(self, throw: Throw):
+        """ Désactive les lignes du lancer `throw` et les éléments qui
+        n'apparaissent plus dans aucune ligne active. """
+        rs = self.rows_of.pop(throw)
+        self.dlx.set_rows_active(rs, False)  # type: ignore
+        for r in rs:
+            prim, sec = self.dlx.rows[r]  # type: ignore
+            for k in prim:
+                self.count[k] -= 1
+                self.held[k] += 1
+                if self.count[k] == 0:
+                    self.idle[k] = None
+                    self.dlx.set_item(k, 0, 1, active=False)  # type: ignore
+            for k, _ in sec:
+                self.sec_count[k] -= 1
+                self.sec_held[k] += 1
+                if self.sec_count[k] == 0:
+                    self.sec_idle[k] = None
+        self.hidden[throw] = rs
+        self.stats['removed'] += 1
+
+    def _restore(self, throw: Throw) -> bool:
+        """ Réactive les lignes désactivées du lancer `throw` si ses
+        éléments ont gardé leurs numéros. """
+        rs = self.hidden.pop(throw, None)
+        if rs is None:
+            return False
+        for r in rs:
+            p, s = self.dlx.rows[r]  # type: ignore
+            for k in p:
+                self.held[k] -= 1
+            for k, _ in s:
+                self.sec_held[k] -= 1
+        throw_rows = self._throw_rows(throw)
+        for r, (prim, sec) in zip(rs, throw_rows):
+            p, s = self.dlx.rows[r]  # type: ignore
+            if any(self.keys[k] != key for k, key in zip(p, prim)) \
+                    or any(self.sec_keys[k] != key for (k, _), (key, _) in zip(s, sec)):
+                return False
+        for prim, sec in throw_rows:
+            for key in prim:
+                self._take(key)
+            for key, _ in sec:
+                self._take_secondary(key)
+        self.dlx.set_rows_active(rs, True)  # type: ignore
+        self.rows_of[throw] = rs
+        self.stats['restored'] += 1
+        return True
+
+    def solve(self, previous: Optional[ExactCoverSolution] = None,
+              maximize: List[int] = [], optimize: bool = False,
+              margin: int = 8, timeout: Optional[float] = None) \
+            -> Optional[ExactCoverSolution]:
+        """ Renvoie une solution de l'instance qui respecte les contraintes
+        sur les mains (cf. `get_solution_with_dlx`), en partant de la
+        solution `previous` de l'instance d'avant la dernière mise à jour.
+        Les lancers qui se terminent plus de `margin` temps avant les
+        instants modifiés (`changed`), ou commencent plus de `margin` temps
+        après, gardent leur ligne de `previous` : leurs autres lignes sont
+        désactivées le temps de la recherche. S'il n'y a pas de solution, la
+        marge est doublée (plus un), jusqu'à ce que tous les lancers soient
+        libres.
+        Avec `optimize`, la solution n'est optimale que pour les lancers
+        libres. """
+        dlx: IntDLXM = self.dlx  # type: ignore
+        choice: Dict[Throw, Tuple[int, int]] = {}
+        if previous is not None:
+            for row in previous.rows:
+                for item in row:
+                    if isinstance(item, XItem):
+                        choice[item.throw] = (item.hand, item.flying_time)
+        ec_instance = self.instance()
+        set_dlx_strategy(dlx, ec_instance, maximize, earliest_first=True)
+        while True:
+            pinned = []
+            for throw, rs in self.rows_of.items():
+                if throw in choice and (throw.time + throw.max_height < self.changed.start - margin
+                                        or throw.time >= self.changed.stop + margin):
+                    pinned.extend(r for r in rs if self._row_choice(r) != choice[throw])
+            dlx.set_rows_active(pinned, False)
+            dlx.set_propagator(HandPositionPropagator(dlx))
+            if optimize:
+                sol = best_valid_solution_with_dlx(dlx, ec_instance, maximize, timeout)
+            else:
+                sol = first_valid_solution_with_dlx(dlx, ec_instance, timeout)
+            dlx.set_rows_active(pinned, True)
+            dlx.set_costs(None)
+            if sol is not None or len(pinned) == 0 \
+                    or dlx.status in (SearchStatus.CANCELLED, SearchStatus.BUDGET_EXHAUSTED):
+                return sol
+            margin = 2 * margin + 1
+
+    def _row_choice(self, r: int) -> Tuple[int, int]:
+        """ Main et durée de vol de la ligne `r`. """
+        item = self.dlx.primary_objs[self.dlx.rows[r][0][0]]  # type: ignore
+        return item.hand, item.flying_time
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {'max_time': max((throw.time + throw.max_height for throw in self.rows_of),
+                                default=0),
+                'max_weight': self.max_weight,
+                'nb_hands': self.nb_hands,
+                'balls': self.balls,
+                'symmetric_hands': False}
+
+    def instance(self) -> ExactCoverInstance:
+        """ Instance formée des lignes actives, dans l'ordre chronologique
+        des lancers, et des éléments qui y apparaissent. """
+        dlx: IntDLXM = self.dlx  # type: ignore
+        rows = [dlx.row_obj(r) for throw in sorted(self.rows_of, key=lambda throw: throw.time)
+                for r in self.rows_of[throw]]
+        return ExactCoverInstance(
+            prim_items=[dlx.primary_objs[k] for k in range(len(self.keys))  # type: ignore
+                        if self.count[k] > 0],
+            sec_items=[dlx.secondary_objs[k] for k in range(len(self.sec_keys))  # type: ignore
+                       if self.sec_count[k] > 0],
+            colors=list(range(self.H + 1)),
+            rows=rows,
+            params=self.params)
+
+
+def sub_instance(ec_instance: ExactCoverInstance,
+                 rows: List[int]) -> ExactCoverInstance:
+    """ Renvoie l'instance formée des lignes `rows` de `ec_instance` et des
+    seuls éléments qui apparaissent dans ces lignes. """
+    sub_rows = [ec_instance.rows[r] for r in rows]
+    items = {id(item if isinstance(item, Item) else item[0])
+             for row in sub_rows for item in row}
+    return ExactCoverInstance(
+        prim_items=[item for item in ec_instance.prim_items if id(item) in items],
+        sec_items=[item for item in ec_instance.sec_items if id(item) in items],
+        colors=ec_instance.colors,
+        rows=sub_rows,
+        params=ec_instance.params)
+
+
+def presolve(ec_instance: ExactCoverInstance,
+             stats: Optional[Dict[str, Any]] = None) -> Optional[ExactCoverInstance]:
+    """ Réduit `ec_instance` sans changer l'ensemble de ses solutions (à
+    l'échange près de lignes identiques) et renvoie l'instance réduite, ou
+    `None` si l'on a montré qu'elle n'a pas de solution. Les lignes gardées
+    sont celles de `ec_instance`, dans le même ordre.
+
+    - Une ligne identique à une ligne précédente est retirée si les deux ne
+      peuvent pas être choisies ensemble (elles ont un élément primaire de
+      borne supérieure 1).
+    - Une ligne est forcée quand un élément primaire ne peut atteindre sa
+      borne inférieure qu'en la prenant (en particulier, c'est la seule
+      ligne d'un élément à couvrir).
+    - Une ligne est retirée quand elle est incompatible avec les lignes
+      forcées : un de ses éléments primaires est déjà couvert autant de fois
+      que le permet sa borne supérieure, ou un de ses éléments secondaires a
+      une autre couleur dans une ligne forcée.
+    - Les éléments qui n'apparaissent plus dans aucune ligne sont retirés.
+
+    Les lignes forcées restent dans l'instance. Si `stats` est donné, on y
+    range le nombre d'éléments retirés (`items`), de lignes retirées car
+    identiques à une autre (`duplicates`) ou incompatibles avec les lignes
+    forcées (`conflicts`), et de lignes forcées (`forced`). """
+    rows = ec_instance.rows
+    bounds = {id(item): item.bounds for item in ec_instance.prim_items}
+    item_rows: Dict[int, List[int]] = {}
+    for r, row in enumerate(rows):
+        for item in row:
+            it = item if isinstance(item, Item) else item[0]
+            item_rows.setdefault(id(it), []).append(r)
+    alive = [True] * len(rows)
+    forced = [False] * len(rows)
+    nb_duplicates = nb_conflicts = 0
+
+    # Lignes identiques
+    seen = set()
+    for r, row in enumerate(rows):
+        key = tuple(sorted((id(item), 0) if isinstance(item, Item) else (id(item[0]), item[1])
+                           for item in row))
+        if key not in seen:
+            seen.add(key)
+        elif any(isinstance(item, Item) and item.bounds[1] == 1 for item in row):
+            alive[r] = False
+            nb_duplicates += 1
+
+    # Propagation des lignes forcées
+    nb_forced: Dict[int, int] = {i: 0 for i in bounds}
+    colors: Dict[int, int] = {}
+    queue = list(bounds)
+
+    def remove(r: int):
+        nonlocal nb_conflicts
+        alive[r] = False
+        nb_conflicts += 1
+        queue.extend(id(item) for item in rows[r] if isinstance(item, Item))
+
+    def force(r: int) -> bool:
+        forced[r] = True
+        for item in rows[r]:
+            if isinstance(item, Item):
+                nb_forced[id(item)] += 1
+                queue.append(id(item))
+                continue
+            it, clr = item
+            if id(it) in colors and (colors[id(it)] != clr or clr == 0):
+                return False
+            colors[id(it)] = clr
+            for r1 in item_rows[id(it)]:
+                if alive[r1] and not forced[r1] and any(
+                        not isinstance(item1, Item) and item1[0] is it
+                        and (item1[1] != clr or clr == 0) for item1 in rows[r1]):
+                    remove(r1)
+        return True
+
+    while queue:
+        i = queue.pop()
+        low, high = bounds[i]
+        free = [r for r in item_rows.get(i, []) if alive[r] and not forced[r]]
+        if nb_forced[i] > high or nb_forced[i] + len(free) < low:
+            return None
+        if free and nb_forced[i] == high:
+            for r in free:
+                remove(r)
+        elif free and nb_forced[i] + len(free) == low:
+            for r in free:
+                if alive[r] and not forced[r] and not force(r):
+                    return None
+
+    kept = [r for r in range(len(rows)) if alive[r]]
+    reduced = sub_instance(ec_instance, kept)
+    if stats is not None:
+        stats['items'] = len(ec_instance.prim_items) + len(ec_instance.sec_items) \
+            - len(reduced.prim_items) - len(reduced.sec_items)
+        stats['duplicates'] = nb_duplicates
+        stats['conflicts'] = nb_conflicts
+        stats['forced'] = sum(forced)
+    return reduced
+
+
+def connected_components(ec_instance: ExactCoverInstance) -> List[ExactCoverInstance]:
+    """ Découpe `ec_instance` selon les composantes connexes du graphe
+    d'incidence entre lignes et éléments : deux lignes sont dans la même
+    composante si elles sont reliées par une suite de lignes dont chacune a
+    un élément en commun avec la suivante. Les solutions de l'instance
+    sont exactement les unions de solutions de ses composantes. Les
+    éléments primaires qui n'apparaissent dans aucune ligne sont ignorés,
+    sauf s'ils doivent être couverts : chacun forme alors une composante
+    sans ligne, qui n'a pas de solution. """
+    # Union-find sur les lignes, par l'intermédiaire des éléments
+    parent = list(range(len(ec_instance.rows)))
+
+    def find(r: int) -> int:
+        while parent[r] != r:
+            parent[r] = parent[parent[r]]
+            r = parent[r]
+        return r
+
+    first_row: Dict[int, int] = {}
+    for r, row in enumerate(ec_instance.rows):
+        for item in row:
+            it = item if isinstance(item, Item) else item[0]
+            if id(it) in first_row:
+                parent[find(r)] = find(first_row[id(it)])
+            else:
+                first_row[id(it)] = r
+
+    groups: Dict[int, List[int]] = {}
+    for r in range(len(ec_instance.rows)):
+        groups.setdefault(find(r), []).append(r)
+    components = [sub_instance(ec_instance, rows) for rows in groups.values()]
+    for item in ec_instance.prim_items:
+        if id(item) not in first_row and item.bounds[0] > 0:
+            components.append(ExactCoverInstance(prim_items=[item], sec_items=[],
+                                                 colors=ec_instance.colors, rows=[],
+                                                 params=ec_instance.params))
+    return components
+
+
+def get_solution_with_components(ec_instance: ExactCoverInstance,
+                                 maximize: List[int] = [],
+                                 optimize: bool = False,
+                                 timeout: Optional[float] = None,
+                                 workers: Optional[int] = None,
+                                 stats: Optional[Dict[str, Any]] = None) \
+        -> Optional[ExactCoverSolution]:
+    """ Résout séparément chaque composante connexe de `ec_instance` (cf.
+    `connected_components`) avec `get_solution_with_dlx`, dans `workers`
+    threads (un par composante par défaut), et réunit les lignes
+    choisies. Si `stats` est donné, on y range le nombre de composantes
+    (`components`) et le nombre de lignes et d'éléments primaires de
+    chacune (`sizes`).
+
+    Les contraintes sur les mains sont vérifiées dans chaque composante,
+    puis sur la solution réunie, car les balles reçues après leur dernier
+    lancer peuvent être gardées par une main jusqu'à la fin. Si la
+    solution réunie est rejetée, on résout l'instance entière. """
+    components = connected_components(ec_instance)
+    if stats is not None:
+        stats['components'] = len(components)
+        stats['sizes'] = [(len(c.rows), len(c.prim_items)) for c in components]
+    if len(components) == 1:
+        return get_solution_with_dlx(ec_instance, maximize, timeout=timeout,
+                                     optimize=optimize)
+    if any(len(c.rows) == 0 for c in components):
+        return None
+
+    def solve(component: ExactCoverInstance) -> Optional[ExactCoverSolution]:
+        return get_solution_with_dlx(component, maximize, timeout=timeout,
+                                     optimize=optimize)
+
+    with ThreadPoolExecutor(workers or len(components)) as executor:
+        sols = list(executor.map(solve, components))
+    if any(sol is None for sol in sols):
+        return None
+    sol = valid_variant(ec_instance, ExactCoverSolution(
+        params=ec_instance.params,
+        rows=[row for s in sols for row in s.rows]))  # type: ignore
+    if sol is None:
+        return get_solution_with_dlx(ec_instance, maximize, timeout=timeout,
+                                     optimize=optimize)
+    return sol
+
+
+def repeated_sections(throws: List[List[Throw]], min_period: int = 2,
+                      max_period: int = 32) -> Optional[Tuple[int, int]]:
+    """ Cherche un découpage du morceau en sections de même durée qui se
+    répètent : renvoie la durée p (entre `min_period` et `max_period`) et
+    le début o des sections (qui commencent aux instants o + k * p) pour
+    lesquels le plus d'instants sont couverts par une section dont les
+    lancers (balle, instant relatif et durée maximale) sont les mêmes
+    qu'une section précédente, ou `None` si aucune section ne se répète. """
+    def key(start: int, period: int) -> Tuple[Tuple[str, int, int], ...]:
+        return tuple(sorted((throw.ball, t - start, throw.max_height)
+                            for t in range(max(start, 0), min(start + period, len(throws)))
+                            for throw in throws[t]))
+
+    best = None
+    best_score = 0
+    for period in range(min_period, min(max_period, len(throws) // 2) + 1):
+        for offset in range(period):
+            seen = set()
+            score = 0
+            for start in range(offset - period, len(throws), period):
+                k = key(start, period)
+                if len(k) > 0 and k in seen:
+                    score += period
+                seen.add(k)
+            if score > best_score:
+                best, best_score = (period, offset), score
+    return best
+
+
+def get_solution_with_windows(ec_instance: ExactCoverInstance,
+                              window: Optional[int] = None,
+                              maximize: List[int] = [],
+                              timeout: Optional[float] = None,
+                              offset: int = 0,
+                              stats: Optional[Dict[str, Any]] = None) \
+        -> Optional[ExactCoverSolution]:
+    """ Résout `ec_instance` par fenêtres de `window` instants, pour les
+    morceaux trop longs pour une seule recherche. Les fenêtres commencent
+    aux instants `offset` + k * `window` et chacune contient les lancers
+    qui commencent dans la fenêtre. Les lignes déjà choisies pour les balles
+    encore dans une main ou en vol au début de la fenêtre (au plus
+    `max_height` instants avant) y sont ajoutées comme seules options de
+    leur lancer : elles fixent le contenu des mains et les balles en vol à
+    la frontière. Chaque fenêtre est résolue avec DLX, en vérifiant l'ordre
+    des balles dans les mains depuis le début du morceau. Si une fenêtre
+    n'a pas de solution, on reprend la recherche de la précédente là où
+    elle s'était arrêtée pour en essayer une autre.
+
+    Une fenêtre dont les lancers et la frontière sont, à un décalage près,
+    ceux d'une fenêtre déjà résolue reprend sa solution décalée sans
+    nouvelle recherche (on ne cherche que si elle ne convient pas ou si la
+    suite du morceau oblige à revenir sur cette fenêtre). Si `window` n'est
+    pas donné, les fenêtres sont alignées sur les sections répétées du
+    morceau (cf. `repeated_sections`). Si `stats` est donné, on y range le
+    nombre de fenêtres (`windows`), de recherches (`searches`) et de
+    solutions reprises (`reused`).
+
+    La solution n'est pas forcément la meilleure : `maximize` sert
+    seulement à choisir l'ordre de la recherche, comme dans
+    `get_solution_with_dlx`. Renvoie `None` s'il n'y a pas de solution ou
+    si la recherche a duré plus de `timeout` secondes. """
+    # Main, instant de réception, instant de lancer, instant d'arrivée,
+    # balle, durée maximale et durée de vol de chaque ligne
+    throws: List[Tuple[int, int, int, int, str, int, int]] = []
+    for row in ec_instance.rows:
+        x = next(item for item in row if isinstance(item, XItem))
+        throws.append((x.hand, x.throw.time,
+                       x.throw.time + x.throw.max_height - x.flying_time,
+                       x.throw.time + x.throw.max_height, x.throw.ball,
+                       x.throw.max_height, x.flying_time))
+    row_index = {(ball, c, hand, f): r
+                 for r, (hand, c, _, _, ball, _, f) in enumerate(throws)}
+    if window is None:
+        music_throws: List[List[Throw]] = [[] for _ in range(ec_instance.params['max_time'] + 1)]
+        for row in ec_instance.rows:
+            x = next(item for item in row if isinstance(item, XItem))
+            if x.throw not in music_throws[x.throw.time]:
+                music_throws[x.throw.time].append(x.throw)
+        # Des sections plus courtes que le plus long vol seraient presque
+        # entièrement fixées par leur frontière, et le coût de la recherche
+        # croît vite avec la taille des fenêtres : une longue section est
+        # coupée en fenêtres de même durée, qui se répètent aussi
+        min_window = max(max((throw[6] for throw in throws), default=1), 2)
+        period, offset = repeated_sections(music_throws, min_window) or (8, 0)
+        window = max([d for d in range(min_window, 2 * min_window + 1)
+                      if period % d == 0], default=period)
+    shift = (window - offset % window) % window
+    windows: Dict[int, List[int]] = {}
+    for r, throw in enumerate(throws):
+        windows.setdefault((throw[1] + shift) // window, []).append(r)
+    nb_windows = max(windows) + 1 if len(windows) > 0 else 0
+
+    def valid_prefix(selected: List[int]) -> bool:
+        """ Vérifie l'ordre des balles dans les mains pour les lignes
+        choisies, sans les réceptions qui suivent un dernier lancer. """
+        by_hand: Dict[int, List[Tuple[int, int, str]]] = {}
+        for r in selected:
+            hand, c, e, _, ball, _, _ = throws[r]
+            by_hand.setdefault(hand, []).append((c, e, ball))
+        return all(hand_orders(hand_throws, set(), 0,
+                               max(e for _, e, _ in hand_throws)) is not None
+                   for hand_throws in by_hand.values())
+
+    def relative(r: int, start: int) -> Tuple[Any, ...]:
+        hand, c, _, _, ball, max_height, f = throws[r]
+        return (ball, c - start, hand, f, max_height)
+
+    def finish(sol: Optional[ExactCoverSolution]) -> Optional[ExactCoverSolution]:
+        if stats is not None:
+            stats.update(windows=nb_windows, searches=nb_searches, reused=nb_reused)
+        return sol
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    # Solutions des fenêtres déjà résolues, par lancers et frontière
+    # relatifs au début de la fenêtre
+    cache: Dict[Any, List[Tuple[Any, ...]]] = {}
+    nb_searches = nb_reused = 0
+    # Pour chaque fenêtre commencée : la recherche en cours (ou la solution
+    # reprise d'une fenêtre identique), les lignes de l'instance de la
+    # fenêtre et la clé de la fenêtre
+    searches: List[Any] = []
+    chosen: List[List[int]] = []
+    k = 0
+    while k >= 0:
+        if k == nb_windows:
+            sol = valid_variant(ec_instance, ExactCoverSolution(
+                params=ec_instance.params,
+                rows=[ec_instance.rows[r] for rows in chosen for r in rows]))
+            if sol is not None:
+                return finish(sol)
+            k -= 1
+            continue
+        del chosen[k:]
+        start = k * window - shift
+        prefix = [r for rows_j in chosen for r in rows_j]
+        own = windows.get(k, [])
+        if len(searches) == k:
+            forced = [r for r in prefix if throws[r][3] >= start]
+            key = (tuple(sorted(relative(r, start) for r in own)),
+                   tuple(sorted(relative(r, start) for r in forced)))
+            searches.append([None, forced + own, key])
+            if len(own) == 0:
+                chosen.append([])
+                k += 1
+                continue
+            # Reprise de la solution d'une fenêtre identique
+            if key in cache:
+                rows = [row_index.get((ball, c + start, hand, f))
+                        for ball, c, hand, f, _ in cache[key]]
+                if None not in rows and valid_prefix(prefix + rows):  # type: ignore
+                    nb_reused += 1
+                    searches[k][0] = sorted(rows)  # type: ignore
+                    chosen.append(rows)  # type: ignore
+                    k += 1
+                    continue
+        search, rows, key = searches[k]
+        if len(own) == 0:
+            searches.pop()
+            k -= 1
+            continue
+        reused = None
+        if not isinstance(search, IntDLXM):
+            # Première recherche, ou retour sur une solution reprise
+            reused = search
+            instance = sub_instance(ec_instance, rows)
+            search = dlx_solver_instance(instance)
+            set_dlx_strategy(search, instance, maximize)
+            search.set_propagator(HandPositionPropagator(search))
+            searches[k][0] = search
+            nb_searches += 1
+        selected = None
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 1e-6)
+            sol_rows = search.search(timeout=remaining)
+            if sol_rows is None:
+                if search.status != SearchStatus.NO_SOLUTION:
+                    return finish(None)
+                break
+            own_rows = [rows[i] for i in sorted(sol_rows)
+                        if throws[rows[i]][1] >= start]
+            if own_rows != reused and valid_prefix(prefix + own_rows):
+                selected = own_rows
+                break
+        if selected is None:
+            # Plus de solution pour cette fenêtre : retour à la précédente
+            searches.pop()
+            k -= 1
+            continue
+        cache.setdefault(key, [relative(r, start) for r in selected])
+        chosen.append(selected)
+        k += 1
+    return finish(None)
+
+
+def _sweep_options(ec_instance: ExactCoverInstance, maximize: List[int]) \
+        -> Tuple[Dict[int, List[List[Tuple[Any, ...]]]],
+                 Dict[int, Tuple[int, int]], Dict[int, List[int]]]:
+    """ Prépare les données de `get_solution_with_sweep` : pour chaque
+    instant, les options de chacun des lancers qui commencent à cet
+    instant, puis les bornes des éléments primaires traités de façon
+    générique et, pour chaque instant, ceux qui ne servent plus après lui.
+    Une option est donnée par sa ligne, sa main, sa durée de vol, l'instant
+    du lancer, l'instant d'arrivée, le fait que ce soit le dernier lancer
+    de la balle, ses éléments génériques et son coût. """
+    throw_keys = {(item.throw.ball, item.throw.time)
+                  for row in ec_instance.rows for item in row
+                  if isinstance(item, XItem)}
+    by_throw: Dict[Tuple[str, int], List[Tuple[Any, ...]]] = {}
+    bounds: Dict[int, Tuple[int, int]] = {}
+    last: Dict[int, int] = {}
+    for r, row in enumerate(ec_instance.rows):
+        x = next(item for item in row if isinstance(item, XItem))
+        t = x.throw.time
+        landing = t + x.throw.max_height
+        # Les éléments x, L et w sont gérés par le balayage lui-même : une
+        # option par lancer, et le poids d'une main est la taille de sa file
+        items: List[Tuple[int, Optional[int]]] = []
+        for item in row:
+            if isinstance(item, (XItem, LItem, WItem)):
+                continue
+            if isinstance(item, Item):
+                items.append((id(item), None))
+                bounds[id(item)] = item.bounds
+            else:
+                it, clr = item
+                items.append((id(it), clr))
+            last[items[-1][0]] = max(t, last.get(items[-1][0], t))
+        by_throw.setdefault((x.throw.ball, t), []).append(
+            (r, x.hand, x.flying_time, landing - x.flying_time, landing,
+             (x.throw.ball, landing) not in throw_keys, items,
+             0 if x.flying_time in maximize else 1))
+    options: Dict[int, List[List[Tuple[Any, ...]]]] = {}
+    for (_, t), opts in by_throw.items():
+        options.setdefault(t, []).append(opts)
+    exits: Dict[int, List[int]] = {}
+    for i, t in last.items():
+        exits.setdefault(t, []).append(i)
+    return options, bounds, exits
+
+
+def _sweep_take(items: Dict[int, int], row_items: List[Tuple[int, Optional[int]]],
+                bounds: Dict[int, Tuple[int, int]]) -> Optional[Dict[int, int]]:
+    """ Ajoute les éléments génériques d'une option à ceux déjà pris
+    (nombre d'utilisations des éléments primaires, couleur des éléments
+    secondaires, -1 pour une utilisation sans couleur), ou renvoie `None`
+    si l'option est incompatible avec eux. """
+    items = dict(items)
+    for i, clr in row_items:
+        current = items.get(i)
+        if clr is None:
+            n = 1 if current is None else current + 1
+            if n > bounds[i][1]:
+                return None
+            items[i] = n
+        elif clr == 0:
+            if current is not None:
+                return None
+            items[i] = -1
+        elif current is None or current == clr:
+            items[i] = clr
+        else:
+            return None
+    return items
+
+
+def _sweep_step(t: int, state, throw_options: List[List[Tuple[Any, ...]]],
+                exits: List[int], bounds: Dict[int, Tuple[int, int]],
+                nb_hands: int, max_weight: int, hold_cost: int):
+    """ Énumère les états à la fin de l'instant t accessibles depuis
+    `state`, avec le coût et les lignes choisies pour y arriver. Chaque
+    main qui tient plusieurs balles à l'instant t (l'élément w est couvert
+    par plusieurs lignes) coûte `hold_cost`. """
+    frontier, queues, finals, flying = state
+
+    # Choix d'une option pour chaque lancer qui commence à l'instant t
+    choices = [(dict(frontier), tuple(() for _ in range(nb_hands)),
+                flying, 0, ())]
+    for opts in throw_options:
+        new_choices = []
+        for items, caught, in_flight, cost, rows in choices:
+            for r, hand, flying_time, e, landing, final, row_items, c in opts:
+                new_items = _sweep_take(items, row_items, bounds)
+                if new_items is None:
+                    continue
+                new_caught = caught[:hand] + (caught[hand] + (e,),) + caught[hand + 1:]
+                new_flying = in_flight
+                if final:
+                    new_flying = in_flight + ((landing, hand if flying_time == 1 else -1),)
+                new_choices.append((new_items, new_caught, new_flying,
+                                    cost + c, rows + (r,)))
+        choices = new_choices
+
+    for items, caught, in_flight, cost, rows in choices:
+        if any(items.get(i, 0) < bounds[i][0] for i in exits if i in bounds):
+            continue
+        for i in exits:
+            items.pop(i, None)
+        new_frontier = tuple(sorted(items.items()))
+        cost += hold_cost * sum(1 for h in range(nb_hands)
+                                if len(queues[h]) + len(caught[h]) >= 2)
+
+        # Choix de la main qui reçoit chaque balle arrivant après son
+        # dernier lancer
+        landings = [forbidden for landing, forbidden in in_flight if landing == t]
+        new_flying = tuple(sorted(f for f in in_flight if f[0] != t))
+        hand_choices = [[h for h in range(nb_hands) if h != forbidden]
+                        for forbidden in landings]
+        for receivers in product(*hand_choices):
+            new_finals = list(finals)
+            for h in receivers:
+                new_finals[h] += 1
+
+            # Files possibles de chaque main, cf. `hand_orders`
+            hand_queues = []
+            for h in range(nb_hands):
+                rest, new = queues[h], caught[h]
+                if len(rest) + len(new) + new_finals[h] > max_weight:
+                    break
+                n = sum(1 for e in rest + new if e == t)
+                locked = n > 0 or (t > 0 and len(new) > 0) or h in receivers
+                outs = set()
+                for perm in set(permutations(new)):
+                    queue = rest + perm
+                    if any(e != t for e in queue[:n]):
+                        continue
+                    queue = queue[n:]
+                    outs.add(queue)
+                    if not locked and len(queue) > 1:
+                        outs.add(queue[1:] + queue[:1])
+                if len(outs) == 0:
+                    break
+                hand_queues.append(sorted(outs))
+            else:
+                for new_queues in product(*hand_queues):
+                    yield ((new_frontier, new_queues, tuple(new_finals), new_flying),
+                           cost, rows)
+
+
+def get_solution_with_sweep(ec_instance: ExactCoverInstance,
+                            maximize: List[int] = []) \
+        -> Optional[ExactCoverSolution]:
+    """ Résout `ec_instance` par programmation dynamique, en balayant le
+    temps de gauche à droite. Les lignes d'un lancer ne concernent que les
+    instants entre sa réception et son arrivée : à la fin de chaque
+    instant, il suffit de connaître la frontière, c'est-à-dire, pour chaque
+    main, la file des balles qu'elle tient (chacune réduite à l'instant où
+    elle sera lancée, cf. `hand_orders`) et le nombre de balles reçues après
+    leur dernier lancer, les balles en vol après leur dernier lancer et les
+    éléments c, d, m et u encore utiles. Les solutions partielles qui mènent
+    à la même frontière sont fusionnées en ne gardant que la moins coûteuse,
+    si bien que le temps de calcul est linéaire en la durée du morceau pour
+    `max_height` et `max_weight` fixés.
+
+    La solution renvoyée respecte les contraintes sur les mains et
+    minimise l'objectif de `solve_exact_cover_with_milp` (comme
+    `best_valid_solution_with_dlx`, cf. `set_dlx_costs`). Le balayage
+    choisit la main qui reçoit chaque balle après son dernier lancer ; si
+    l'affectation gloutonne de `hand_schedules` rejette la solution
+    obtenue, on se rabat sur `get_solution_with_dlx`. Renvoie `None` s'il
+    n'y a pas de solution. """
+    params = ec_instance.params
+    nb_hands = params['nb_hands']
+    options, bounds, exits = _sweep_options(ec_instance, maximize)
+    # Une main qui tient plusieurs balles coûte autant que tous les lancers
+    # réunis, cf. `milp_model`
+    hold_cost = sum(opt[-1] for throw_options in options.values()
+                    for opts in throw_options for opt in opts)
+
+    # Pour chaque état de la frontière : coût minimal, état précédent et
+    # lignes choisies à cet instant
+    initial = ((), tuple(() for _ in range(nb_hands)), (0,) * nb_hands, ())
+    layers: List[Dict[Any, Tuple[int, Any, Tuple[int, ...]]]] = \
+        [{initial: (0, None, ())}]
+    for t in range(params['max_time'] + 1):
+        layer: Dict[Any, Tuple[int, Any, Tuple[int, ...]]] = {}
+        for state, (cost, _, _) in layers[-1].items():
+            for new_state, c, rows in _sweep_step(t, state, options.get(t, []),
+                                                  exits.get(t, []), bounds,
+                                                  nb_hands, params['max_weight'],
+                                                  hold_cost):
+                if new_state not in layer or cost + c < layer[new_state][0]:
+                    layer[new_state] = (cost + c, state, rows)
+        if len(layer) == 0:
+            return None
+        layers.append(layer)
+
+    state = min(layers[-1], key=lambda s: layers[-1][s][0])
+    selected: List[int] = []
+    for k in range(len(layers) - 1, 0, -1):
+        _, prev, rows = layers[k][state]
+        selected.extend(rows)
+        state = prev
+    sol = valid_variant(ec_instance, ExactCoverSolution(
+        params=params, rows=[ec_instance.rows[r] for r in sorted(selected)]))
+    if sol is None:
+        return get_solution_with_dlx(ec_instance, maximize, optimize=True)
+    return sol
 
 
 def juggling_sol_to_simulator(sol: JugglingSolution, colors):
@@ -718,16 +2336,25 @@ def juggling_sol_to_simulator(sol: JugglingSolution, colors):
     return balls, throws
 
 
-def solve_and_print(music, nb_hands, max_height, max_weight, forbidden_multiplex, method="DLX", optimize=True, maximize=[]):
+def solve_and_print(music, nb_hands, max_height, max_weight, forbidden_multiplex, method="DLX", optimize=True, maximize=[], symmetric_hands=False, window=None, sections=False):
     balls, throws = music_to_throws(music)
     ec_instance = throws_to_extended_exact_cover(balls, throws, nb_hands, max_height, max_weight,
-                                                 forbidden_multiplex, True)
+                                                 forbidden_multiplex, True, symmetric_hands)
+    ec_instance = presolve(ec_instance)
+    if ec_instance is None:
+        raise RuntimeError("No solution.")
     sol = None
-    if method == "DLX":
-        sol = get_solution_with_dlx(ec_instance, maximize)
+    if method == "DLX" and (window is not None or sections):
+        sol = get_solution_with_windows(ec_instance, window, maximize)
+    elif method == "DLX":
+        # `optimize` ne concerne que le programme linéaire : prouver
+        # l'optimalité par DLX peut être très long sur un morceau entier
+        sol = get_solution_with_components(ec_instance, maximize)
     elif method == "MILP":
         sol = solve_exact_cover_with_milp(ec_instance, optimize, maximize)
-    if len(sol) == 0:
+    elif method == "SWEEP":
+        sol = get_solution_with_sweep(ec_instance, maximize)
+    if sol is None or len(sol) == 0:
         raise RuntimeError("No solution.")
     jsol = exact_cover_solution_to_juggling_solution(sol)
 
@@ -735,16 +2362,25 @@ def solve_and_print(music, nb_hands, max_height, max_weight, forbidden_multiplex
     return jsol
 
 
-def solve_and_simulate(music, nb_hands, max_height, max_weight, forbidden_multiplex, colors, sides, method="DLX", optimize=True, maximize=[], step=10):
+def solve_and_simulate(music, nb_hands, max_height, max_weight, forbidden_multiplex, colors, sides, method="DLX", optimize=True, maximize=[], step=10, symmetric_hands=False, window=None, sections=False):
     balls, throws = music_to_throws(music)
     ec_instance = throws_to_extended_exact_cover(balls, throws, nb_hands, max_height, max_weight,
-                                                 forbidden_multiplex, True)
+                                                 forbidden_multiplex, True, symmetric_hands)
+    ec_instance = presolve(ec_instance)
+    if ec_instance is None:
+        raise RuntimeError("No solution.")
     sol = None
-    if method == "DLX":
-        sol = get_solution_with_dlx(ec_instance, maximize)
+    if method == "DLX" and (window is not None or sections):
+        sol = get_solution_with_windows(ec_instance, window, maximize)
+    elif method == "DLX":
+        # `optimize` ne concerne que le programme linéaire : prouver
+        # l'optimalité par DLX peut être très long sur un morceau entier
+        sol = get_solution_with_components(ec_instance, maximize)
     elif method == "MILP":
         sol = solve_exact_cover_with_milp(ec_instance, optimize, maximize)
-    if len(sol) == 0:
+    elif method == "SWEEP":
+        sol = get_solution_with_sweep(ec_instance, maximize)
+    if sol is None or len(sol) == 0:
         raise RuntimeError("No solution.")
     jsol = exact_cover_solution_to_juggling_solution(sol)
     balls, pattern = juggling_sol_to_simulator(jsol, colors)
@@ -1017,6 +2653,13 @@ def display_interface():
         layout=ipw.Layout(width='475px', margin='0px 0px 10px 0px')
     )
     w_working = ipw.Label('Prêt')
+    w_cancel = ipw.Button(
+        description='Annuler',
+        disabled=True,
+        button_style='',
+        icon='times',
+        layout=ipw.Layout(width='150px')
+    )
     w_solve = ipw.Button(
         description='Résoudre les contraintes',
         disabled=False,
@@ -1050,7 +2693,8 @@ def display_interface():
     )
     w_method = ipw.RadioButtons(
         options=['Programmation Linéaire (rapide, ne respecte pas les contraintes sur les mains)',
-                 'Dancing Links (lent, respecte les contraintes sur les mains)'],
+                 'Dancing Links (lent, respecte les contraintes sur les mains)',
+                 'Balayage du temps (respecte les contraintes sur les mains)'],
         description='',
         disabled=False,
         layout={'width': 'max-content'}
@@ -1065,6 +2709,12 @@ def display_interface():
     # balls = {}
     # pattern = [[], []]
     jsol = None
+    running_dlx = None
+    # Instance modifiée sur place d'une recherche à l'autre, et dernière
+    # solution trouvée avec les objectifs qui ont servi à la trouver
+    session = None
+    last_sol = None
+    last_goal = None
     tab_res_sim = ipw.Tab()
 
     def ui_view(view, play, slider):
@@ -1080,14 +2730,14 @@ def display_interface():
                     ipw.Label('Orientation des mains :'), w_sides,
                     ipw.Label('Couleurs :'), w_colors
                 ], layout=ipw.Layout(grid_template_columns='repeat(2, 150px)')),
-                w_working,
+                ipw.HBox([w_working, w_cancel]),
                 w_method,
                 ipw.HBox([w_solve, w_simulate])], layout=ipw.Layout(margin="10px")),
             tab_res_sim
         ])
 
     def solve(args):
-        nonlocal jsol
+        nonlocal session, last_sol
         if w_working.value != "Prêt":
             return
         music = []
@@ -1114,26 +2764,69 @@ def display_interface():
             j = int(s.split(', ')[1])
             forbidden_multiplex.append((i, j))
         maximize = [int(s) for s in w_maximize.value.split(' ')] if w_maximize.value.strip() != '' else []
-        method = 'DLX' if w_method.value.startswith('Dancing Links') else 'MILP'
+        method = 'DLX' if w_method.value.startswith('Dancing Links') \
+            else 'SWEEP' if w_method.value.startswith('Balayage') else 'MILP'
         optimize = w_maximize.value != ""
         w_working.value = "En cours..."
         balls, throws = music_to_throws(music)
-        ec_instance = throws_to_extended_exact_cover(balls, throws, nb_hands, max_height, max_weight,
-                                                     forbidden_multiplex, True)
+        if method == 'DLX':
+            # Seuls les lancers modifiés changent l'instance DLX, et la
+            # recherche repart de la solution précédente
+            if session is None or not session.matches(nb_hands, max_height, max_weight,
+                                                      forbidden_multiplex):
+                session = IncrementalExactCover(nb_hands, max_height, max_weight,
+                                                forbidden_multiplex)
+                last_sol = None
+            ec_instance = session.update(balls, throws)
+        else:
+            ec_instance = throws_to_extended_exact_cover(balls, throws, nb_hands, max_height,
+                                                         max_weight, forbidden_multiplex, True)
+            ec_instance = presolve(ec_instance)
+        if ec_instance is None:
+            w_working.value = "Prêt"
+            w_result.value = "No solution."
+            tab_res_sim.selected_index = 1
+            return
+        # La recherche est faite dans un autre thread pour que le bouton
+        # d'annulation reste utilisable
+        threading.Thread(target=run_solver,
+                         args=(ec_instance, method, optimize, maximize)).start()
+
+    def run_solver(ec_instance, method, optimize, maximize):
+        nonlocal jsol, running_dlx, last_sol, last_goal
         sol = None
+        message = "No solution."
         if method == "DLX":
-            sol = get_solution_with_dlx(ec_instance, maximize=maximize)
+            running_dlx = session.dlx
+            w_cancel.disabled = False
+            if last_goal != (optimize, maximize):
+                last_sol = None
+            sol = session.solve(last_sol, maximize, optimize)
+            if running_dlx.status == SearchStatus.CANCELLED:
+                message = "Recherche annulée."
+            elif sol is not None:
+                last_sol, last_goal = sol, (optimize, maximize)
+            w_cancel.disabled = True
+            running_dlx = None
         elif method == "MILP":
             sol = solve_exact_cover_with_milp(ec_instance, optimize=optimize, maximize=maximize)
-        if len(sol) == 0:
-            raise RuntimeError("No solution.")
+        elif method == "SWEEP":
+            sol = get_solution_with_sweep(ec_instance, maximize)
+        w_working.value = "Prêt"
+        if sol is None or len(sol) == 0:
+            w_result.value = message
+            tab_res_sim.selected_index = 1
+            return
         jsol = exact_cover_solution_to_juggling_solution(sol)
         formatted_str = juggling_to_formatted_str(jsol)
         w_result.value = formatted_str
-        w_working.value = "Prêt"
         w_simulate.disabled = False
         tab_res_sim.selected_index = 1
 
+    def cancel(args):
+        if running_dlx is not None:
+            running_dlx.cancel()
+
     def simulate(args):
         colors = w_colors.value.split(', ')
         sides = [int(x) for x in w_sides.value.split(', ')]
@@ -1161,6 +2854,7 @@ def display_interface():
     w_generate_forbidden_multiplex.on_click(fill_forbidden_multiplex)
     w_generate_hands.on_click(fill_hand_constraints)
     w_solve.on_click(solve)
+    w_cancel.on_click(cancel)
     w_simulate.on_click(simulate)
 
     ui = ui_view(view, play, slider)
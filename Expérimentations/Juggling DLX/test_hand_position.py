@@ -0,0 +1,113 @@
+""" Comparaison de `check_hand_position` avec sa version d'origine par
+parcours en largeur (`check_hand_position_bfs`) sur des solutions tirées au
+hasard.
+
+Usage : python test_hand_position.py [nombre de cas] [graine]
+
+La version d'origine ne vérifie que la première main et n'est bien définie
+que dans certains cas. Les solutions sont donc tirées avec une seule main,
+les lancers de l'instant 0 partant directement (hauteur maximale) et aucun
+dernier lancer n'ayant une durée de vol de 1. Les cas où la version
+d'origine échoue (instant final sans lancer ni réception) sont écartés.
+"""
+import random
+import sys
+import time
+
+from juggling_dlx_milp import music_to_throws, XItem, ExactCoverSolution, \
+    ImpossibleHandPosition, check_hand_position, check_hand_position_bfs, \
+    hand_positions, hand_schedules
+
+notes = ["do", "re", "mi"]
+
+
+def random_solution(rng):
+    nb_notes = rng.randint(2, 8)
+    times = sorted(rng.sample(range(1, 16), nb_notes))
+    music = [(t, rng.choice(notes)) for t in times]
+    balls, throws = music_to_throws(music)
+    last = {}
+    rows = []
+    for ts in throws:
+        for throw in ts:
+            if throw.time == 0:
+                flying_time = throw.max_height
+            else:
+                flying_time = rng.randint(1, throw.max_height)
+            rows.append([XItem(throw=throw, hand=0, flying_time=flying_time)])
+            last[throw.ball] = rows[-1][0]
+    if any(item.flying_time == 1 for item in last.values()):
+        return None
+    max_time = max(item.throw.time + item.throw.max_height
+                   for item in last.values())
+    return ExactCoverSolution(params={'max_time': max_time,
+                                      'max_weight': rng.randint(1, 3),
+                                      'nb_hands': 1,
+                                      'balls': balls},
+                              rows=rows)
+
+
+def outcome(check, sol):
+    try:
+        return check(sol)
+    except ImpossibleHandPosition:
+        return "impossible"
+
+
+def valid_orders(sol, orders):
+    """ Vérifie que les balles lancées à chaque instant sont en tête de la
+    file donnée par `hand_positions`. """
+    for h, (throws, _) in enumerate(hand_schedules(sol)):
+        for c, e, ball in throws:
+            n = sum(1 for _, e1, _ in throws if e1 == e)
+            if ball not in orders[h][e][:n]:
+                return False
+    return True
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    compared = skipped = differences = invalid = 0
+    while compared < nb_cases:
+        sol = random_solution(rng)
+        if sol is None:
+            continue
+        try:
+            ref = outcome(check_hand_position_bfs, sol)
+        except (IndexError, KeyError):
+            skipped += 1
+            continue
+        compared += 1
+        if outcome(check_hand_position, sol) != ref:
+            differences += 1
+        elif ref is True and not valid_orders(sol, hand_positions(sol)):
+            invalid += 1
+    print("{} cas comparés, {} écartés, {} différences, {} ordres invalides"
+          .format(compared, skipped, differences, invalid))
+    assert differences == 0 and invalid == 0
+
+
+def test2():
+    # Longue période sans lancer : la version d'origine ne termine pas
+    music = [(1, "do"), (2, "re"), (3, "mi"), (60, "do"), (61, "re"), (62, "mi")]
+    balls, throws = music_to_throws(music)
+    rows = []
+    for ts in throws:
+        for throw in ts:
+            flying_time = throw.max_height if throw.time == 0 else 2
+            rows.append([XItem(throw=throw, hand=0, flying_time=flying_time)])
+    sol = ExactCoverSolution(params={'max_time': 62, 'max_weight': 3,
+                                     'nb_hands': 1, 'balls': balls},
+                             rows=rows)
+    start = time.perf_counter()
+    ok = check_hand_position(sol)
+    print("{} en {:.3f} s".format(ok, time.perf_counter() - start))
+    assert ok is True
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    print("======== TEST 2 ========")
+    test2()
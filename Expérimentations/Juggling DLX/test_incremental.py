@@ -0,0 +1,86 @@
+""" Comparaison de l'instance modifiée sur place par `IncrementalExactCover`
+avec l'instance reconstruite (`throws_to_extended_exact_cover`) après des
+modifications tirées au hasard d'un morceau, puis modification d'une note
+d'un morceau et annulation, qui doit réactiver les lignes retirées sans
+reconstruire la structure (les temps sont mesurés par bench_incremental.py).
+
+Usage : python test_incremental.py [nombre de cas] [graine]
+"""
+import random
+import sys
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    dlx_solver_instance, get_solution_with_dlx, get_solution_with_windows, \
+    valid_variant, IncrementalExactCover
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def edit(rng, music):
+    """ Ajoute, retire ou déplace une note de `music`. """
+    music = list(music)
+    choice = rng.randint(0, 2)
+    if choice == 0 or len(music) < 3:
+        music.append((rng.randint(1, 14), rng.choice(notes)))
+    elif choice == 1:
+        music.pop(rng.randrange(len(music)))
+    else:
+        t, n = music.pop(rng.randrange(len(music)))
+        music.append((max(1, t + rng.choice([-1, 1])), n))
+    return sorted(set(music))
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    edits = differences = 0
+    for _ in range(nb_cases):
+        nb_hands, H, max_weight = rng.randint(1, 2), rng.randint(2, 4), rng.randint(1, 3)
+        forbidden = [(rng.randint(1, 2), rng.randint(1, 2))]
+        session = IncrementalExactCover(nb_hands, H, max_weight, forbidden)
+        music = sorted({(t, rng.choice(notes)) for t in rng.sample(range(1, 12), 5)})
+        sol = None
+        for _ in range(rng.randint(1, 6)):
+            balls, throws = music_to_throws(music)
+            session.update(balls, throws)
+            ec_instance = throws_to_extended_exact_cover(balls, throws, nb_hands, H,
+                                                         max_weight, forbidden, True)
+            session.dlx.set_propagator(None)
+            count = session.dlx.count_solutions()
+            ref = get_solution_with_dlx(ec_instance)
+            sol = session.solve(sol, margin=rng.randint(0, 3))
+            if count != dlx_solver_instance(ec_instance).count_solutions() \
+                    or (sol is None) != (ref is None) \
+                    or (sol is not None and valid_variant(ec_instance, sol) is None):
+                differences += 1
+            edits += 1
+            music = edit(rng, music)
+    print("{} cas, {} modifications, {} différences".format(nb_cases, edits, differences))
+    assert differences == 0
+
+
+def test2():
+    # Au clair de la lune, répété ; on déplace une note au milieu du morceau,
+    # puis on annule la modification
+    music = [(1, "do"), (2, "do"), (3, "do"), (4, "re"), (5, "mi"), (7, "re"),
+             (9, "do"), (10, "mi"), (11, "re"), (12, "re"), (13, "do")]
+    full = [(t + 14 * k, n) for k in range(4) for t, n in music]
+    edited = [(t + 1, n) if t == 14 * 2 + 5 else (t, n) for t, n in full]
+    session = IncrementalExactCover(2, 5, 3, [(1, 1), (2, 3)])
+    sol = get_solution_with_windows(session.update(*music_to_throws(full)), 8)
+    valid = True
+    for version in (edited, full):
+        balls, throws = music_to_throws(version)
+        ec_instance = session.update(balls, throws)
+        sol = session.solve(sol)
+        valid = valid and sol is not None and valid_variant(ec_instance, sol) is not None
+    print("{}, {}".format(valid, session.stats))
+    # l'annulation réactive les lignes du lancer déplacé, sans reconstruire
+    assert valid and session.stats['rebuilds'] == 1 and session.stats['restored'] > 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    print("======== TEST 2 ========")
+    test2()
@@ -0,0 +1,149 @@
+""" Comparaison de la résolution par HiGHS du programme linéaire de
+`solve_exact_cover_with_milp` (`backend="highs"`) avec l'énumération des
+solutions par DLX, sur des morceaux tirés au hasard et sans multiplex
+interdits (le programme linéaire ne contraint pas les éléments
+secondaires) : existence d'une solution, respect des bornes des éléments
+et, avec `optimize`, valeur optimale. Puis résolution d'Au clair de la lune
+répété à partir de la solution trouvée par DLX, en temps limité ou à un
+écart relatif près : la solution renvoyée n'est pas moins bonne que celle de
+départ et l'optimum est entre la borne et son objectif (les temps sont
+mesurés par bench_milp.py). Enfin, comparaison de l'objectif de la
+solution de `get_solution_with_dlx` avec `optimize` à l'optimum de HiGHS :
+ils sont égaux, sauf si les solutions optimales du programme linéaire ne
+respectent pas les contraintes sur les mains, que DLX vérifie en plus.
+
+Usage : python test_milp.py [nombre de cas] [graine]
+"""
+import random
+import sys
+
+import numpy as np
+
+from juggling_dlx_milp import Item, music_to_throws, throws_to_extended_exact_cover, \
+    dlx_solver_instance, milp_model, milp_start, solve_exact_cover_with_milp, \
+    get_solution_with_dlx, valid_solution
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def objective(ec_instance, rows, maximize):
+    """ Valeur de l'objectif de `milp_model` pour les lignes `rows`, les
+    variables o valant 1 quand la main contient plusieurs balles. """
+    c, A, lower, upper = milp_model(ec_instance, True, maximize)
+    v = np.zeros(len(c))
+    v[list(rows)] = 1
+    nb_rows = len(ec_instance.rows)
+    weights = A[A.shape[0] - (len(c) - nb_rows):, :nb_rows]
+    v[nb_rows:] = -(weights @ v[:nb_rows]) > 1
+    return c @ v
+
+
+def covers(ec_instance, rows):
+    counts = {id(item): 0 for item in ec_instance.prim_items}
+    for row in rows:
+        for item in row:
+            if isinstance(item, Item):
+                counts[id(item)] += 1
+    return all(item.bounds[0] <= counts[id(item)] <= item.bounds[1]
+               for item in ec_instance.prim_items)
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 10), rng.randint(3, 6)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), rng.randint(2, 4),
+            rng.randint(1, 3), [], True)
+        maximize = rng.sample(range(1, 5), rng.randint(0, 2))
+        sols = dlx_solver_instance(ec_instance).all_solutions()
+        sol = solve_exact_cover_with_milp(ec_instance, False, maximize, backend="highs")
+        best = solve_exact_cover_with_milp(ec_instance, True, maximize, backend="highs")
+        if len(sols) > 0:
+            solved += 1
+        if (sol is None) != (len(sols) == 0) or (best is None) != (len(sols) == 0):
+            differences += 1
+        elif sol is not None:
+            index = {id(row): r for r, row in enumerate(ec_instance.rows)}
+            if not covers(ec_instance, sol.rows) or not covers(ec_instance, best.rows) \
+                    or objective(ec_instance, [index[id(row)] for row in best.rows], maximize) \
+                    != min(objective(ec_instance, s, maximize) for s in sols):
+                differences += 1
+    print("{} cas, {} avec solution, {} différences".format(nb_cases, solved, differences))
+    assert differences == 0
+
+
+def test2():
+    # Au clair de la lune
+    music = [(1, "do"), (2, "do"), (3, "do"),
+             (4, "re"), (5, "mi"), (7, "re"),
+             (9, "do"), (10, "mi"), (11, "re"),
+             (12, "re"), (13, "do")]
+    music = [(t + 14 * k, n) for k in range(16) for t, n in music]
+    balls, throws = music_to_throws(music)
+    ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3, [], True)
+    first = get_solution_with_dlx(ec_instance)
+    c, A, lower, upper = milp_model(ec_instance, True, [3])
+    start = c @ milp_start(ec_instance, first, A, len(c))
+    print("départ : objectif {}".format(start))
+    optimum = None
+    for options in ({}, {'warm_start': first, 'time_limit': 0.05},
+                    {'warm_start': first, 'time_limit': 0.2}, {'mip_gap': 0.5}):
+        stats = {}
+        sol = solve_exact_cover_with_milp(ec_instance, True, [3], backend="highs",
+                                          stats=stats, **options)
+        if optimum is None:
+            optimum = stats['objective']
+        ok = sol is not None and covers(ec_instance, sol.rows) \
+            and stats['bound'] <= optimum <= stats['objective'] \
+            and ('warm_start' not in options or stats['objective'] <= start) \
+            and ('mip_gap' not in options or stats['gap'] <= options['mip_gap'])
+        print("{} : {}, {}".format(sorted(options), ok, stats['status']))
+        assert ok
+
+
+def test3(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = equal = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 10), rng.randint(3, 6)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), rng.randint(2, 4),
+            rng.randint(1, 3), [], True)
+        maximize = rng.sample(range(1, 5), rng.randint(0, 2))
+        dlx = dlx_solver_instance(ec_instance)
+        values = [objective(ec_instance, s, maximize) for s in dlx.all_solutions()
+                  if valid_solution(dlx, ec_instance, s) is not None]
+        sol = get_solution_with_dlx(ec_instance, maximize, optimize=True,
+                                    timelines=rng.random() < 0.5)
+        stats = {}
+        solve_exact_cover_with_milp(ec_instance, True, maximize, backend="highs", stats=stats)
+        if (sol is None) != (len(values) == 0):
+            differences += 1
+        elif sol is not None:
+            solved += 1
+            c, A, lower, upper = milp_model(ec_instance, True, maximize)
+            value = c @ milp_start(ec_instance, sol, A, len(c))
+            if value == stats['objective']:
+                equal += 1
+            elif value != min(values) or value < stats['objective']:
+                differences += 1
+    print("{} cas, {} avec solution, {} à l'optimum de HiGHS, {} différences".format(
+        nb_cases, solved, equal, differences))
+    assert differences == 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    print("======== TEST 2 ========")
+    test2()
+    print("======== TEST 3 ========")
+    test3(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,48 @@
+""" Comparaison de la recherche par DLX sur l'instance réduite par
+`presolve` et sur l'instance d'origine, sur des morceaux tirés au hasard
+(la réduction est mesurée par bench_presolve.py).
+
+Usage : python test_presolve.py [nombre de cas] [graine]
+"""
+import random
+import sys
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    get_solution_with_dlx, presolve, valid_variant
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = reduced = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 12), rng.randint(3, 7)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), rng.randint(2, 4),
+            rng.randint(1, 3), [(rng.randint(1, 2), rng.randint(1, 2))], True,
+            rng.random() < 0.3)
+        ref = get_solution_with_dlx(ec_instance)
+        if ref is not None:
+            solved += 1
+        small = presolve(ec_instance)
+        if small is None:
+            reduced += 1
+            if ref is not None:
+                differences += 1
+            continue
+        sol = get_solution_with_dlx(small)
+        if (sol is None) != (ref is None) \
+                or (sol is not None and valid_variant(ec_instance, sol) is None):
+            differences += 1
+    print("{} cas, {} avec solution, {} sans solution après réduction, {} différences"
+          .format(nb_cases, solved, reduced, differences))
+    assert differences == 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
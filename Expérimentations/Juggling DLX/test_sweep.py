@@ -0,0 +1,59 @@
+""" Comparaison de `get_solution_with_sweep` avec la recherche par DLX
+(`get_solution_with_dlx` avec `optimize=True`) sur des morceaux tirés au
+hasard (le temps de calcul est mesuré par bench_sweep.py).
+
+Usage : python test_sweep.py [nombre de cas] [graine]
+"""
+import random
+import sys
+from collections import Counter
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    XItem, WItem, get_solution_with_dlx, get_solution_with_sweep, valid_variant
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def cost(ec_instance, sol, maximize):
+    """ Valeur de l'objectif de `milp_model` pour la solution `sol`, dont
+    les mains peuvent être permutées (cf. `valid_variant`). """
+    def throws(rows):
+        return sum(1 for row in rows for item in row
+                   if isinstance(item, XItem) and item.flying_time not in maximize)
+    weights = Counter((item.time, item.hand) for row in sol.rows for item in row
+                      if isinstance(item, WItem))
+    return throws(sol.rows) \
+        + throws(ec_instance.rows) * sum(1 for n in weights.values() if n >= 2)
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 12), rng.randint(3, 7)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        max_height = rng.randint(2, 4)
+        maximize = [rng.randint(1, max_height)]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), max_height, rng.randint(1, 3),
+            [], True, rng.random() < 0.3)
+        sol = get_solution_with_sweep(ec_instance, maximize)
+        ref = get_solution_with_dlx(ec_instance, maximize, optimize=True)
+        if ref is not None:
+            solved += 1
+        if (sol is None) != (ref is None):
+            differences += 1
+        elif sol is not None and (cost(ec_instance, sol, maximize)
+                                  != cost(ec_instance, ref, maximize)
+                                  or valid_variant(ec_instance, sol) is None):
+            differences += 1
+    print("{} cas, {} avec solution, {} différences"
+          .format(nb_cases, solved, differences))
+    assert differences == 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,49 @@
+""" Comparaison des instances DLX où le poids des mains est donné par des
+éléments w (un par instant) et par des ressources (`dlx_solver_instance`
+avec `timelines`), sur des morceaux tirés au hasard, réduits ou non par
+`presolve` : nombre de solutions, ZDD et solution respectant les contraintes
+sur les mains.
+
+Usage : python test_timelines.py [nombre de cas] [graine]
+"""
+import random
+import sys
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    dlx_solver_instance, get_solution_with_dlx, presolve, valid_variant
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 12), rng.randint(3, 7)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), rng.randint(2, 5),
+            rng.randint(1, 3), [(rng.randint(1, 2), rng.randint(1, 2))], True,
+            rng.random() < 0.3)
+        if rng.random() < 0.3:
+            ec_instance = presolve(ec_instance) or ec_instance
+        items = dlx_solver_instance(ec_instance)
+        timelines = dlx_solver_instance(ec_instance, timelines=True)
+        count = items.count_solutions()
+        ref = get_solution_with_dlx(ec_instance)
+        sol = get_solution_with_dlx(ec_instance, timelines=True)
+        if ref is not None:
+            solved += 1
+        if timelines.count_solutions() != count or timelines.zdd().count() != count \
+                or (sol is None) != (ref is None) \
+                or (sol is not None and valid_variant(ec_instance, sol) is None):
+            differences += 1
+    print("{} cas, {} avec solution, {} différences".format(nb_cases, solved, differences))
+    assert differences == 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
@@ -0,0 +1,61 @@
+""" Comparaison de `get_solution_with_windows` avec la recherche sur
+l'instance entière (`get_solution_with_dlx`) sur des morceaux tirés au
+hasard (le temps de calcul est mesuré par bench_windows.py), puis nombre de
+fenêtres dont la solution est reprise d'une section répétée.
+
+Usage : python test_windows.py [nombre de cas] [graine]
+"""
+import random
+import sys
+
+from juggling_dlx_milp import music_to_throws, throws_to_extended_exact_cover, \
+    get_solution_with_dlx, get_solution_with_windows, valid_variant, \
+    repeated_sections
+
+notes = ["do", "re", "mi", "fa"]
+
+
+def test1(nb_cases, seed):
+    rng = random.Random(seed)
+    solved = differences = 0
+    for _ in range(nb_cases):
+        times = sorted(rng.sample(range(1, 14), rng.randint(3, 8)))
+        music = [(t, rng.choice(notes[:rng.randint(2, 4)])) for t in times]
+        balls, throws = music_to_throws(music)
+        ec_instance = throws_to_extended_exact_cover(
+            balls, throws, rng.randint(1, 2), rng.randint(2, 4),
+            rng.randint(1, 3), [], True)
+        sol = get_solution_with_windows(ec_instance, rng.randint(1, 5))
+        ref = get_solution_with_dlx(ec_instance)
+        if ref is not None:
+            solved += 1
+        if (sol is None) != (ref is None) \
+                or (sol is not None and valid_variant(ec_instance, sol) is None):
+            differences += 1
+    print("{} cas, {} avec solution, {} différences"
+          .format(nb_cases, solved, differences))
+    assert differences == 0
+
+
+def test2():
+    # Fenêtres alignées sur les sections répétées
+    music = [(1, "do"), (2, "do"), (3, "do"), (4, "re"), (5, "mi"), (7, "re"),
+             (9, "do"), (10, "mi"), (11, "re"), (12, "re"), (13, "do")]
+    balls, throws = music_to_throws([(t + 14 * k, n) for k in range(16)
+                                     for t, n in music])
+    print("sections :", repeated_sections(throws, 5))
+    ec_instance = throws_to_extended_exact_cover(balls, throws, 2, 5, 3, [], True)
+    stats = {}
+    sol = get_solution_with_windows(ec_instance, None, [3, 4], stats=stats)
+    ok = sol is not None and valid_variant(ec_instance, sol) is not None
+    print("{}, {} fenêtres, {} recherches, {} reprises"
+          .format(ok, stats['windows'], stats['searches'], stats['reused']))
+    assert ok and stats['reused'] > 0
+
+
+if __name__ == "__main__":
+    print("======== TEST 1 ========")
+    test1(int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+          int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+    print("======== TEST 2 ========")
+    test2()